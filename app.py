@@ -1,21 +1,41 @@
 import streamlit as st
 import sqlite3
-from datetime import datetime
+from datetime import datetime, timedelta
 import pytz
 from fpdf import FPDF
 import hashlib
+import sys
 import pandas as pd
+import numpy as np
 from io import BytesIO
-from PIL import Image
+from PIL import Image, ImageOps
+import zlib
+import re
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+import multiprocessing
 import tempfile
 import base64
 import json
+import threading
+import functools
+import copy
+import queue
+import time
+import traceback
+import uuid
+from collections import deque
+import os
+import glob
+from collections import OrderedDict
+from contextlib import contextmanager
+from concurrent.futures import Future
+import export_worker
 
 # ---------------------------
 # CONFIG
 # ---------------------------
 DB_PATH = "maintenance_app.db"
-st.set_page_config(page_title="Maintenance & Calibration System", layout="wide")
 
 # ---------------------------
 # HILANGKAN TOOLBAR STREAMLIT
@@ -29,7 +49,6 @@ hide_streamlit_style = """
         footer {visibility: hidden !important;}
     </style>
 """
-st.markdown(hide_streamlit_style, unsafe_allow_html=True)
 
 # ---------------------------
 # UTIL: BOOTSTRAP & MOBILE RESPONSIVE
@@ -96,13 +115,303 @@ def inject_bootstrap():
 # ---------------------------
 # DB FUNCTIONS
 # ---------------------------
+@st.cache_resource(show_spinner=False)
+def _process_singleton(name, _factory):
+    """Process-wide object shared by all sessions. Streamlit re-executes this file on every rerun,
+    so plain module globals (pools, writer threads, caches) would be re-created each time."""
+    return _factory()
+
+POOL_SIZE = 8
+
+# Diset sekali per koneksi saat dibuat, bukan per query
+SQLITE_PRAGMAS = [
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=-16000",       # ~16 MB page cache
+    "PRAGMA mmap_size=134217728",     # 128 MB
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA busy_timeout=5000",
+]
+
+class PooledConnection(sqlite3.Connection):
+    """sqlite3 connection whose close() returns it to the process-wide pool"""
+    def close(self):
+        _release_conn(self)
+
+_conn_pools = _process_singleton("conn_pools", dict)
+_conn_pool_lock = _process_singleton("conn_pool_lock", threading.Lock)
+
+def _new_conn(path):
+    conn = sqlite3.connect(path, check_same_thread=False, factory=PooledConnection, cached_statements=256)
+    for pragma in SQLITE_PRAGMAS:
+        conn.execute(pragma)
+    conn.pool_path = path
+    return conn
+
+def _release_conn(conn):
+    if conn.in_transaction:
+        conn.rollback()
+    with _conn_pool_lock:
+        pool = _conn_pools.setdefault(conn.pool_path, [])
+        if conn in pool:
+            return
+        if len(pool) < POOL_SIZE:
+            pool.append(conn)
+            return
+    sqlite3.Connection.close(conn)
+
 def get_conn():
-    return sqlite3.connect(DB_PATH, check_same_thread=False)
+    """Borrow a connection from the pool (shared by all sessions); conn.close() gives it back"""
+    with _conn_pool_lock:
+        pool = _conn_pools.get(DB_PATH)
+        if pool:
+            return pool.pop()
+    return _new_conn(DB_PATH)
 
-def init_db():
+@contextmanager
+def db_conn():
+    """`with db_conn() as conn:` borrows a pooled connection and always gives it back, also on errors"""
     conn = get_conn()
-    c = conn.cursor()
+    try:
+        yield conn
+    finally:
+        conn.close()
+
+# ---------------------------
+# SINGLE WRITER
+# ---------------------------
+WRITE_BATCH_MAX = 64
+WRITE_TIMEOUT = 30
+
+class DbWriter:
+    """Dedicated writer thread per DB file. Queued write jobs are applied in grouped
+    transactions (one SAVEPOINT per job) and each caller gets a Future that resolves after commit."""
+
+    def __init__(self, path):
+        self.path = path
+        self.jobs = queue.Queue()
+        self.thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+        self.thread.start()
+
+    def submit(self, fn, *args, **kwargs):
+        """Queue fn(cursor, *args, **kwargs) for the writer thread, returns a Future with its result"""
+        future = Future()
+        self.jobs.put((future, fn, args, kwargs))
+        return future
+
+    def _run(self):
+        try:
+            conn = _new_conn(self.path)
+            # Savepoint journal di memori dibaca linear per chunk -> job besar (bulk import + trigger FTS)
+            # jadi kuadratik. Writer pakai temp file biasa, koneksi baca tetap temp_store=MEMORY.
+            conn.execute("PRAGMA temp_store=DEFAULT")
+        except Exception as e:
+            self._fail_forever(e)
+        while True:
+            batch = [self.jobs.get()]
+            while len(batch) < WRITE_BATCH_MAX:
+                try:
+                    batch.append(self.jobs.get_nowait())
+                except queue.Empty:
+                    break
+            self._apply(conn, batch)
+
+    def _fail_forever(self, error):
+        """The DB could not be opened: drop this writer (the next get_writer() tries again) and fail
+        every job queued on it instead of leaving the callers waiting"""
+        with _writers_lock:
+            if _writers.get(self.path) is self:
+                del _writers[self.path]
+        while True:
+            future, _, _, _ = self.jobs.get()
+            if future.set_running_or_notify_cancel():
+                future.set_exception(error)
+
+    def _apply(self, conn, batch):
+        c = conn.cursor()
+        done = []
+        try:
+            c.execute("BEGIN IMMEDIATE")
+            changed = set()
+            for future, fn, args, kwargs in batch:
+                if not future.set_running_or_notify_cancel():
+                    continue
+                # Job yang gagal hanya membatalkan perubahannya sendiri, bukan seluruh batch
+                c.execute("SAVEPOINT write_job")
+                try:
+                    result = fn(c, *args, **kwargs)
+                    c.execute("RELEASE SAVEPOINT write_job")
+                    changed.update(getattr(fn, "tables", ("*",)))
+                    done.append((future, result, None))
+                except Exception as e:
+                    c.execute("ROLLBACK TO SAVEPOINT write_job")
+                    c.execute("RELEASE SAVEPOINT write_job")
+                    done.append((future, None, e))
+            # Versi tabel ikut transaksi yang sama: proses lain (CLI, server kedua) langsung melihatnya
+            bump_tables(c, changed)
+            conn.commit()
+        except Exception as e:
+            if conn.in_transaction:
+                conn.rollback()
+            for future, _, _, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        # Caller baru diberi tahu setelah commit berhasil
+        for future, result, error in done:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+_writers = _process_singleton("writers", dict)
+_writers_lock = _process_singleton("writers_lock", threading.Lock)
+
+def get_writer(path=None):
+    path = path or DB_PATH
+    with _writers_lock:
+        writer = _writers.get(path)
+        if writer is None:
+            writer = _writers[path] = DbWriter(path)
+        return writer
+
+def submit_write(fn, *args, **kwargs):
+    """Queue a write job fn(cursor, ...) on the single writer, returns a Future"""
+    return get_writer().submit(fn, *args, **kwargs)
+
+def run_write(fn, *args, **kwargs):
+    """Queue a write job and block until it is committed; returns fn's result or raises its error.
+    A job still queued after WRITE_TIMEOUT is cancelled, so a timeout error means nothing was written;
+    a job the writer already started is waited for until its real outcome is known."""
+    future = submit_write(fn, *args, **kwargs)
+    try:
+        return future.result(timeout=WRITE_TIMEOUT)
+    except FutureTimeoutError:
+        if future.cancel():
+            raise
+        return future.result()
+
+def writes(*tables):
+    """Mark a write job with the tables it changes. Unmarked jobs invalidate every cached query."""
+    def mark(fn):
+        fn.tables = tables
+        return fn
+    return mark
+
+# ---------------------------
+# QUERY CACHE
+# ---------------------------
+QUERY_CACHE_MAX_BYTES = 32 * 1024 * 1024
+
+_table_versions = _process_singleton("table_versions", dict)  # db path -> (version conn, data_version, {table: version})
+_table_versions_lock = _process_singleton("table_versions_lock", threading.Lock)
+
+def bump_tables(c, tables):
+    """Called by the writer inside the write transaction: results cached for these tables become stale,
+    in this process and in every other process using the same DB file"""
+    c.executemany("""
+        INSERT INTO table_versions (name, version) VALUES (?, 1)
+        ON CONFLICT(name) DO UPDATE SET version = version + 1
+    """, [(table,) for table in sorted(tables)])
+
+def table_versions(path, tables):
+    """Current versions of `tables` (plus "*") from the table_versions table. The table is only re-read
+    when PRAGMA data_version says another connection has committed since the last look."""
+    with _table_versions_lock:
+        conn, data_version, versions = _table_versions.get(path) or (_new_conn(path), None, {})
+        current = conn.execute("PRAGMA data_version").fetchone()[0]
+        if current != data_version:
+            try:
+                versions = dict(conn.execute("SELECT name, version FROM table_versions").fetchall())
+            except sqlite3.OperationalError:
+                versions = {}  # DB belum dimigrasi
+        _table_versions[path] = (conn, current, versions)
+        return tuple(versions.get(table, 0) for table in ("*",) + tuple(tables))
+
+def _freeze(value):
+    """Hashable form of query arguments (filters are dicts)"""
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, set):
+        return frozenset(value)
+    return value
+
+def _result_size(value):
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, (list, tuple)):
+        return 64 + sum(_result_size(v) for v in value)
+    if isinstance(value, dict):
+        return 64 + sum(_result_size(k) + _result_size(v) for k, v in value.items())
+    if isinstance(value, (str, bytes)):
+        return 64 + len(value)
+    return 64
+
+def _copy_result(value):
+    # Caller boleh mengubah hasilnya (mis. tambah kolom) tanpa merusak isi cache
+    if isinstance(value, pd.DataFrame):
+        return value.copy()
+    if isinstance(value, tuple):
+        return tuple(_copy_result(v) for v in value)
+    return copy.deepcopy(value)
+
+class QueryCache:
+    """Read-helper results keyed by (function, DB, arguments) and valid for one version of the
+    tables they read. In-memory LRU bounded by the estimated result size, shared by all sessions."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()  # key -> (version, size, result)
+        self.size = 0
+        self.lock = threading.Lock()
+
+    def get_or_load(self, key, version, load):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry and entry[0] == version:
+                self.entries.move_to_end(key)
+                return _copy_result(entry[2])
+
+        result = load()
+        size = _result_size(result)
+        with self.lock:
+            old = self.entries.pop(key, None)
+            if old:
+                self.size -= old[1]
+            if size <= self.max_bytes:
+                self.entries[key] = (version, size, result)
+                self.size += size
+            while self.size > self.max_bytes:
+                _, (_, evicted, _) = self.entries.popitem(last=False)
+                self.size -= evicted
+        return _copy_result(result)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+query_cache = _process_singleton("query_cache", lambda: QueryCache(QUERY_CACHE_MAX_BYTES))
+
+def cached_query(*tables):
+    """Serve a read helper from query_cache until a committed write touches one of `tables`"""
+    def wrap(fn):
+        @functools.wraps(fn)
+        def cached(*args, **kwargs):
+            # Versi dibaca sebelum query: write yang commit di tengah jalan tidak bisa tersimpan sebagai "baru"
+            version = table_versions(DB_PATH, tables)
+            key = (fn.__name__, DB_PATH, _freeze(args), _freeze(kwargs))
+            return query_cache.get_or_load(key, version, lambda: fn(*args, **kwargs))
+        return cached
+    return wrap
 
+# ---------------------------
+# SCHEMA MIGRATIONS
+# ---------------------------
+def _migration_001_base_schema(c):
+    """Base schema: users, checklist, calibration (+ legacy upgrades) and default users"""
     c.execute("""
     CREATE TABLE IF NOT EXISTS users(
         id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -285,59 +594,792 @@ def init_db():
         except sqlite3.IntegrityError:
             pass
 
-    conn.commit()
-    conn.close()
+def _add_missing_columns(c, table, columns):
+    """ALTER TABLE ADD COLUMN for each (name, type) that the table doesn't have yet"""
+    c.execute(f"PRAGMA table_info({table})")
+    existing = {col[1] for col in c.fetchall()}
+    for name, col_type in columns:
+        if name not in existing:
+            c.execute(f"ALTER TABLE {table} ADD COLUMN {name} {col_type}")
+
+def _migration_002_calibration_extra_columns(c):
+    """Extra calibration report fields (previously added on every save_calibration call)"""
+    _add_missing_columns(c, "calibration", [
+        ("location", "TEXT"),
+        ("interval_cal", "TEXT"),
+        ("reject_error_value", "TEXT"),
+        ("reject_error_span", "TEXT"),
+        ("status_as_found", "TEXT"),
+        ("status_as_left", "TEXT"),
+        ("next_cal_date", "TEXT"),
+        ("calibration_node", "TEXT"),
+        ("calibration_by_name", "TEXT"),
+        ("calibration_by_date", "TEXT"),
+        ("approved_by_name", "TEXT"),
+        ("approved_by_date", "TEXT"),
+    ])
+
+def _migration_003_attachments(c):
+    """Content-addressed attachments table; move checklist photos out of the rows (dedup by SHA-256)"""
+    c.execute("""
+    CREATE TABLE IF NOT EXISTS attachments(
+        sha256 TEXT PRIMARY KEY,
+        data BLOB NOT NULL,
+        size INTEGER,
+        created_at TEXT
+    )""")
+    _add_missing_columns(c, "checklist", [
+        ("image_before_ref", "TEXT"),
+        ("image_after_ref", "TEXT"),
+    ])
+
+    c.connection.create_function("sha256_hex", 1, lambda b: hashlib.sha256(b).hexdigest(), deterministic=True)
+    for col in ("image_before", "image_after"):
+        c.execute(f"""
+            INSERT OR IGNORE INTO attachments (sha256, data, size, created_at)
+            SELECT sha256_hex({col}), {col}, length({col}), created_at
+            FROM checklist
+            WHERE {col} IS NOT NULL AND length({col}) > 0
+        """)
+        c.execute(f"""
+            UPDATE checklist
+            SET {col}_ref = CASE WHEN length({col}) > 0 THEN sha256_hex({col}) END, {col} = NULL
+            WHERE {col} IS NOT NULL
+        """)
+
+def _migration_004_indexes(c):
+    """Secondary indexes for the list, filter, approval and session queries"""
+    # Urutan ORDER BY date DESC, id DESC dilayani langsung oleh index (rowid = id ikut di tiap index)
+    c.execute("CREATE INDEX IF NOT EXISTS idx_checklist_date ON checklist(date)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_checklist_user_date ON checklist(user_id, date)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_checklist_status_date ON checklist(approval_status, date)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_checklist_machine_date ON checklist(machine, date)")
+    # Sesi WRAPPING & REWINDER (machine, sub_area, shift, tanggal)
+    c.execute("CREATE INDEX IF NOT EXISTS idx_checklist_session ON checklist(machine, sub_area, shift, date)")
+
+    c.execute("CREATE INDEX IF NOT EXISTS idx_calibration_date ON calibration(date)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_calibration_user_date ON calibration(user_id, date)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_calibration_status_date ON calibration(approval_status, date)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_calibration_tag_date ON calibration(id_number, date)")
+
+def _migration_005_jobs(c):
+    """Background job table (status, progress and result of long operations)"""
+    c.execute("""
+    CREATE TABLE IF NOT EXISTS jobs(
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        kind TEXT,
+        user_id INTEGER,
+        status TEXT DEFAULT 'queued',
+        progress REAL DEFAULT 0,
+        message TEXT,
+        created_at TEXT,
+        started_at TEXT,
+        finished_at TEXT,
+        result BLOB,
+        result_name TEXT,
+        result_mime TEXT,
+        error TEXT
+    )""")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_jobs_user ON jobs(user_id, id)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status)")
+
+def _migration_006_attachment_thumbnails(c):
+    """Thumbnail + mime type per attachment (filled by the image ingestion on save)"""
+    _add_missing_columns(c, "attachments", [
+        ("thumb", "BLOB"),
+        ("mime", "TEXT"),
+    ])
+
+# Kolom teks yang di-index FTS5 per tabel (external content, disinkronkan oleh trigger)
+FTS_COLUMNS = {
+    "checklist": ("item", "note"),
+    "calibration": ("id_number", "description", "service_name", "calibrators", "calibration_node"),
+}
+
+def _migration_007_fulltext_search(c):
+    """FTS5 index over checklist notes and calibration descriptions, kept in sync by triggers"""
+    for table, columns in FTS_COLUMNS.items():
+        fts = f"{table}_fts"
+        cols = ", ".join(columns)
+        new_vals = ", ".join(f"new.{col}" for col in columns)
+        old_vals = ", ".join(f"old.{col}" for col in columns)
+        c.execute(f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5(
+            {cols}, content='{table}', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+        )""")
+        c.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN
+            INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new_vals});
+        END""")
+        c.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN
+            INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old_vals});
+        END""")
+        # Hanya update kolom teks yang perlu re-index (approval / foto tidak menyentuh FTS)
+        c.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {cols} ON {table} BEGIN
+            INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old_vals});
+            INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new_vals});
+        END""")
+        c.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+
+# Field form calibration yang punya saran "💡 Previous"
+SUGGESTION_FIELDS = ("doc_no", "name", "environmental_temp", "humidity", "id_number", "function_loc", "plant",
+                     "location", "input", "output", "manufacturer", "model", "serial_no", "range_in", "range_out",
+                     "interval_cal")
+
+def _migration_008_suggestions(c):
+    """Autocomplete index: distinct value per form field with frequency and last use, backfilled from calibration"""
+    c.execute("""
+    CREATE TABLE IF NOT EXISTS suggestions(
+        field TEXT NOT NULL,
+        value TEXT NOT NULL,
+        freq INTEGER NOT NULL DEFAULT 1,
+        last_used TEXT,
+        PRIMARY KEY (field, value)
+    ) WITHOUT ROWID""")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_suggestions_recent ON suggestions(field, last_used DESC, freq DESC)")
+    for field in SUGGESTION_FIELDS:
+        c.execute(f"""
+            INSERT OR REPLACE INTO suggestions (field, value, freq, last_used)
+            SELECT ?, TRIM({field}), COUNT(*), MAX(created_at)
+            FROM calibration
+            WHERE TRIM(COALESCE({field}, '')) != ''
+            GROUP BY TRIM({field})
+        """, (field,))
+
+# (kolom calibration_points, key di tabel hasil form / JSON result_data lama)
+CALIBRATION_POINT_FIELDS = [
+    ("percent", "percent"),
+    ("nominal_input", "nominal_bar"),
+    ("nominal_output", "nominal_output"),
+    ("as_found", "as_found"),
+    ("as_left", "as_left"),
+    ("found_error", "found_error"),
+    ("left_error", "left_error"),
+]
+CALIBRATION_POINT_COLS = [col for col, _ in CALIBRATION_POINT_FIELDS]
+# Teks sel seperti diisi ('4 mA', 'N/A', '4,00') untuk PDF; NULL kalau selnya angka (ada di kolom numerik)
+CALIBRATION_POINT_TEXT_COLS = [f"{col}_text" for col in CALIBRATION_POINT_COLS]
+
+def _point_value(value):
+    """Number from a result table cell ('4.00', '4,00', 4.0); None if empty or not numeric"""
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(str(value).strip().replace(",", "."))
+    except ValueError:
+        return None
+
+def _calibration_point_rows(calibration_id, result_data, text=False):
+    """Rows for calibration_points from the result table (list of dicts keyed like the form);
+    with text=True the CALIBRATION_POINT_TEXT_COLS values follow the numeric ones"""
+    rows = []
+    for seq, point in enumerate(result_data or []):
+        if isinstance(point, dict):
+            row = (calibration_id, seq) + tuple(_point_value(point.get(key)) for _, key in CALIBRATION_POINT_FIELDS)
+            if text:
+                row += tuple(value if isinstance(value, str) else None
+                             for value in (point.get(key) for _, key in CALIBRATION_POINT_FIELDS))
+            rows.append(row)
+    return rows
+
+def _migration_009_calibration_points(c):
+    """One row per calibration measurement point (numeric columns) instead of the result_data JSON"""
+    c.execute(f"""
+    CREATE TABLE IF NOT EXISTS calibration_points(
+        calibration_id INTEGER NOT NULL REFERENCES calibration(id),
+        seq INTEGER NOT NULL,
+        {", ".join(f"{col} REAL" for col in CALIBRATION_POINT_COLS)},
+        PRIMARY KEY (calibration_id, seq)
+    ) WITHOUT ROWID""")
+    c.execute("SELECT id, result_data FROM calibration WHERE result_data IS NOT NULL AND result_data NOT IN ('', '[]')")
+    rows = []
+    for calibration_id, result_data in c.fetchall():
+        try:
+            rows.extend(_calibration_point_rows(calibration_id, json.loads(result_data)))
+        except (ValueError, TypeError):
+            pass
+    # JSON lama dibiarkan di result_data sebagai arsip. Teks selnya diisi ke calibration_points oleh migrasi 018;
+    # sejak itu report baru tidak menulis result_data lagi.
+    c.executemany(f"""
+        INSERT OR IGNORE INTO calibration_points (calibration_id, seq, {", ".join(CALIBRATION_POINT_COLS)})
+        VALUES ({", ".join("?" * (len(CALIBRATION_POINT_COLS) + 2))})
+    """, rows)
+
+_INTERVAL_UNITS = [  # (regex satuan, bulan, hari)
+    (r"y(?:ears?|rs?)?|tahun|thn", 12, 0),
+    (r"mo(?:nths?)?|m|bulan|bln", 1, 0),
+    (r"w(?:eeks?|ks?)?|minggu|mgg", 0, 7),
+    (r"d(?:ays?)?|hari", 0, 1),
+]
+_INTERVAL_WORDS = {"annual": 12, "annually": 12, "yearly": 12, "tahunan": 12, "monthly": 1, "bulanan": 1,
+                   "quarterly": 3, "semester": 6, "semiannual": 6, "semi-annual": 6}
+
+def parse_interval(text):
+    """Free-text calibration interval ('6 months', '1 year', '2 thn', 'yearly') -> (months, days); None if unknown"""
+    text = str(text or "").strip().lower()
+    if not text:
+        return None
+    for word, months in _INTERVAL_WORDS.items():
+        if text == word:
+            return months, 0
+    for pattern, months, days in _INTERVAL_UNITS:
+        match = re.fullmatch(r"(\d+(?:[.,]\d+)?)\s*(?:" + pattern + r")\.?", text)
+        if match:
+            count = float(match.group(1).replace(",", "."))
+            if months:
+                return int(round(count * months)), 0
+            return 0, int(round(count * days))
+    return None
+
+def _parse_date(value):
+    try:
+        return datetime.strptime(str(value or "").strip()[:10], "%Y-%m-%d").date()
+    except ValueError:
+        return None
+
+def next_due_date(cal_date, interval_cal, next_cal_date=None):
+    """Due date of a calibration: the Next Calibration Date entered on the form, otherwise date + interval"""
+    due = _parse_date(next_cal_date)
+    if due:
+        return due
+    start, interval = _parse_date(cal_date), parse_interval(interval_cal)
+    if not start or not interval:
+        return None
+    return (pd.Timestamp(start) + pd.DateOffset(months=interval[0], days=interval[1])).date()
+
+def _calibration_latest_row(calibration_id, data):
+    """calibration_latest row for one report (None without Tag ID)"""
+    id_number = str(data.get('id_number') or "").strip()
+    if not id_number:
+        return None
+    interval = parse_interval(data.get('interval_cal')) or (None, None)
+    due = next_due_date(data.get('date'), data.get('interval_cal'), data.get('next_cal_date'))
+    return (id_number, calibration_id, str(data.get('date') or ""), interval[0], interval[1],
+            due.isoformat() if due else None)
+
+def _upsert_calibration_latest(c, rows):
+    """Keep only the newest report (by date, id) per Tag ID"""
+    c.executemany("""
+        INSERT INTO calibration_latest (id_number, calibration_id, date, interval_months, interval_days, next_due_date)
+        VALUES (?, ?, ?, ?, ?, ?)
+        ON CONFLICT(id_number) DO UPDATE SET
+            calibration_id = excluded.calibration_id,
+            date = excluded.date,
+            interval_months = excluded.interval_months,
+            interval_days = excluded.interval_days,
+            next_due_date = excluded.next_due_date
+        WHERE (excluded.date, excluded.calibration_id) >= (calibration_latest.date, calibration_latest.calibration_id)
+    """, [row for row in rows if row])
+
+def _migration_010_calibration_schedule(c):
+    """Latest calibration per Tag ID with normalized interval + due date, and the precomputed daily due list"""
+    c.execute("""
+    CREATE TABLE IF NOT EXISTS calibration_latest(
+        id_number TEXT PRIMARY KEY,
+        calibration_id INTEGER NOT NULL,
+        date TEXT,
+        interval_months INTEGER,
+        interval_days INTEGER,
+        next_due_date TEXT
+    )""")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_calibration_latest_due ON calibration_latest(next_due_date)")
+    c.execute("""
+    CREATE TABLE IF NOT EXISTS calibration_due(
+        as_of TEXT NOT NULL,
+        id_number TEXT NOT NULL,
+        calibration_id INTEGER NOT NULL,
+        next_due_date TEXT NOT NULL,
+        days_left INTEGER NOT NULL,
+        PRIMARY KEY (as_of, id_number)
+    ) WITHOUT ROWID""")
+    c.execute("""
+    CREATE TABLE IF NOT EXISTS calibration_due_runs(
+        as_of TEXT PRIMARY KEY,
+        horizon_days INTEGER,
+        created_at TEXT
+    )""")
+    c.execute("SELECT id, id_number, date, interval_cal, next_cal_date FROM calibration")
+    cols = ["id", "id_number", "date", "interval_cal", "next_cal_date"]
+    _upsert_calibration_latest(c, [_calibration_latest_row(row[0], dict(zip(cols, row))) for row in c.fetchall()])
+
+# Data peralatan yang disimpan sekali per Tag ID di instruments (nilai dari report terbaru).
+# Di calibration kolom ini NULL kalau sama dengan master, jadi selalu baca lewat view calibration_full.
+INSTRUMENT_COLS = ("equipment_name", "function_loc", "plant", "location", "input", "output",
+                   "manufacturer", "model", "serial_no", "range_in", "range_out", "interval_cal")
+
+def _create_calibration_view(c):
+    """calibration_full: calibration rows with the deduplicated equipment columns filled from instruments.
+    Recreate it in any later migration that adds calibration columns."""
+    c.execute("PRAGMA table_info(calibration)")
+    select = [f"COALESCE(cal.{col[1]}, i.{col[1]}) AS {col[1]}" if col[1] in INSTRUMENT_COLS else f"cal.{col[1]}"
+              for col in c.fetchall()]
+    c.execute("DROP VIEW IF EXISTS calibration_full")
+    c.execute(f"""
+    CREATE VIEW calibration_full AS
+    SELECT {", ".join(select)}
+    FROM calibration cal
+    LEFT JOIN instruments i ON i.id = cal.instrument_id""")
+
+def _migration_011_instruments(c):
+    """Instrument master per Tag ID with a foreign key from calibration; repeated equipment text is removed"""
+    c.execute(f"""
+    CREATE TABLE IF NOT EXISTS instruments(
+        id INTEGER PRIMARY KEY,
+        id_number TEXT UNIQUE NOT NULL,
+        {", ".join(f"{col} TEXT" for col in INSTRUMENT_COLS)},
+        updated_at TEXT
+    )""")
+    _add_missing_columns(c, "calibration", [("instrument_id", "INTEGER REFERENCES instruments(id)")])
+    c.execute("CREATE INDEX IF NOT EXISTS idx_calibration_instrument_date ON calibration(instrument_id, date)")
+    cols = ", ".join(INSTRUMENT_COLS)
+    c.execute(f"""
+        INSERT OR IGNORE INTO instruments (id_number, {cols}, updated_at)
+        SELECT l.id_number, {", ".join(f"cal.{col}" for col in INSTRUMENT_COLS)}, cal.created_at
+        FROM calibration_latest l
+        JOIN calibration cal ON cal.id = l.calibration_id
+    """)
+    c.execute("""
+        UPDATE calibration SET instrument_id = (SELECT id FROM instruments WHERE id_number = TRIM(calibration.id_number))
+        WHERE TRIM(COALESCE(id_number, '')) != ''
+    """)
+    # NULL = sama dengan master; NULL asli jadi '' supaya tidak ikut terisi dari master
+    for col in INSTRUMENT_COLS:
+        c.execute(f"""
+            UPDATE calibration
+            SET {col} = CASE WHEN {col} IS (SELECT {col} FROM instruments WHERE id = calibration.instrument_id)
+                             THEN NULL ELSE COALESCE({col}, '') END
+            WHERE instrument_id IS NOT NULL
+        """)
+    _create_calibration_view(c)
+
+def _migration_012_instrument_drift(c):
+    """Per-instrument drift statistics; a row is deleted when a report for the instrument is saved
+    and recomputed on the next read"""
+    c.execute("""
+    CREATE TABLE IF NOT EXISTS instrument_drift(
+        instrument_id INTEGER PRIMARY KEY REFERENCES instruments(id),
+        last_calibration_id INTEGER NOT NULL,
+        calibrations INTEGER NOT NULL,
+        first_date TEXT,
+        last_date TEXT,
+        max_found_error REAL,
+        rms_found_error REAL,
+        last_left_error REAL,
+        drift_per_interval REAL,
+        drift_per_year REAL,
+        reject_error REAL,
+        predicted_reject_date TEXT,
+        recommendation TEXT,
+        computed_at TEXT
+    )""")
+
+CHECKLIST_ROLLUP_DIMENSIONS = ("machine", "sub_area", "shift", "item")
+CHECKLIST_ROLLUP_COUNTS = ("total", "good", "minor", "bad", "ng", "detail_checks")
+# Minggu = tanggal Senin (YYYY-MM-DD) dari minggu tanggal checklist
+WEEK_SQL = "date({date}, '-6 days', 'weekday 1')"
+# Tabel rollup kondisi -> (kolom periode, ekspresi periode dari checklist.date)
+CHECKLIST_ROLLUPS = {
+    "checklist_weekly": ("week", WEEK_SQL.format(date="date")),
+    "checklist_daily": ("date", "date"),
+}
+CHECKLIST_COMPONENT_KEYS = ("date",) + CHECKLIST_ROLLUP_DIMENSIONS + ("component",)
+CHECKLIST_COMPONENT_COUNTS = ("ok", "ng")
+
+def _create_checklist_rollup(c, table):
+    keys = (CHECKLIST_ROLLUPS[table][0],) + CHECKLIST_ROLLUP_DIMENSIONS
+    c.execute(f"""
+    CREATE TABLE IF NOT EXISTS {table}(
+        {", ".join(f"{key} TEXT NOT NULL" for key in keys)},
+        {", ".join(f"{col} INTEGER NOT NULL DEFAULT 0" for col in CHECKLIST_ROLLUP_COUNTS)},
+        PRIMARY KEY ({", ".join(keys)})
+    ) WITHOUT ROWID""")
+
+def _fill_checklist_rollup(c, table):
+    """Recompute a condition rollup table from checklist with one GROUP BY. SUM over a group whose
+    condition is NULL in every row is NULL, so each count is coalesced to 0 (the columns are NOT NULL)."""
+    period, period_sql = CHECKLIST_ROLLUPS[table]
+    keys = [f"COALESCE({period_sql}, '')"] + [f"COALESCE({key}, '')" for key in CHECKLIST_ROLLUP_DIMENSIONS]
+    c.execute(f"DELETE FROM {table}")
+    # ng = baris yang punya minimal satu komponen NG di details, detail_checks = baris yang punya details
+    c.execute(f"""
+        INSERT INTO {table} ({", ".join((period,) + CHECKLIST_ROLLUP_DIMENSIONS + CHECKLIST_ROLLUP_COUNTS)})
+        SELECT {", ".join(keys)},
+               COUNT(*), COALESCE(SUM(condition = 'Good'), 0), COALESCE(SUM(condition = 'Minor'), 0),
+               COALESCE(SUM(condition = 'Bad'), 0),
+               SUM(CASE WHEN json_valid(details) THEN EXISTS (SELECT 1 FROM json_each(details) WHERE value = 'NG') ELSE 0 END),
+               SUM(CASE WHEN json_valid(details) THEN 1 ELSE 0 END)
+        FROM checklist
+        GROUP BY {", ".join(keys)}
+    """)
+
+def _fill_checklist_components(c):
+    """Recompute checklist_component_daily (OK / NG per component of the details JSON objects);
+    a component whose values are all JSON null counts 0 / 0"""
+    c.execute("DELETE FROM checklist_component_daily")
+    keys = [f"COALESCE(ch.{key}, '')" for key in CHECKLIST_COMPONENT_KEYS[:-1]] + ["j.key"]
+    c.execute(f"""
+        INSERT INTO checklist_component_daily ({", ".join(CHECKLIST_COMPONENT_KEYS + CHECKLIST_COMPONENT_COUNTS)})
+        SELECT {", ".join(keys)}, COALESCE(SUM(j.value = 'OK'), 0), COALESCE(SUM(j.value = 'NG'), 0)
+        FROM checklist ch,
+             json_each(COALESCE(CASE WHEN json_valid(ch.details) THEN
+                                    CASE WHEN json_type(ch.details) = 'object' THEN ch.details END END, '{{}}')) j
+        GROUP BY {", ".join(keys)}
+    """)
+
+def _migration_013_checklist_weekly(c):
+    """Weekly checklist counts per machine / sub area / shift / item for the dashboard, backfilled from checklist"""
+    _create_checklist_rollup(c, "checklist_weekly")
+    _fill_checklist_rollup(c, "checklist_weekly")
+
+def _migration_014_checklist_daily(c):
+    """Daily checklist counts and per-component OK / NG counts from details, backfilled from checklist"""
+    _create_checklist_rollup(c, "checklist_daily")
+    c.execute(f"""
+    CREATE TABLE IF NOT EXISTS checklist_component_daily(
+        {", ".join(f"{key} TEXT NOT NULL" for key in CHECKLIST_COMPONENT_KEYS)},
+        {", ".join(f"{col} INTEGER NOT NULL DEFAULT 0" for col in CHECKLIST_COMPONENT_COUNTS)},
+        PRIMARY KEY ({", ".join(CHECKLIST_COMPONENT_KEYS)})
+    ) WITHOUT ROWID""")
+    _fill_checklist_rollup(c, "checklist_daily")
+    _fill_checklist_components(c)
+
+def _migration_015_job_runner(c):
+    """Runner that owns each job, so a new process only fails the jobs of runners that are gone"""
+    _add_missing_columns(c, "jobs", [("runner", "TEXT")])
+
+def _migration_016_table_versions(c):
+    """Per-table write counters for the query cache, shared by every process using this DB file"""
+    c.execute("""
+    CREATE TABLE IF NOT EXISTS table_versions(
+        name TEXT PRIMARY KEY,
+        version INTEGER NOT NULL
+    ) WITHOUT ROWID""")
+
+def _migration_017_job_heartbeat(c):
+    """Last heartbeat of the runner owning each job, so liveness needs no process check (portable)"""
+    _add_missing_columns(c, "jobs", [("heartbeat_at", "TEXT")])
+
+def _migration_018_calibration_point_text(c):
+    """Result cell text next to the numeric points, filled from the result_data JSON, so the PDF
+    renders from calibration_points only"""
+    _add_missing_columns(c, "calibration_points", [(col, "TEXT") for col in CALIBRATION_POINT_TEXT_COLS])
+    c.execute("SELECT id, result_data FROM calibration WHERE result_data IS NOT NULL AND result_data NOT IN ('', '[]')")
+    updates = []
+    for calibration_id, result_data in c.fetchall():
+        try:
+            rows = _calibration_point_rows(calibration_id, json.loads(result_data), text=True)
+        except (ValueError, TypeError):
+            continue
+        updates.extend(row[-len(CALIBRATION_POINT_TEXT_COLS):] + row[:2] for row in rows)
+    c.executemany(f"""
+        UPDATE calibration_points SET {", ".join(f"{col} = ?" for col in CALIBRATION_POINT_TEXT_COLS)}
+        WHERE calibration_id = ? AND seq = ?
+    """, updates)
+
+# Urutan migrasi = versi schema (index + 1). Migrasi baru selalu ditambahkan di akhir,
+# jangan pernah mengubah urutan atau menghapus migrasi yang sudah dirilis.
+MIGRATIONS = [
+    _migration_001_base_schema,
+    _migration_002_calibration_extra_columns,
+    _migration_003_attachments,
+    _migration_004_indexes,
+    _migration_005_jobs,
+    _migration_006_attachment_thumbnails,
+    _migration_007_fulltext_search,
+    _migration_008_suggestions,
+    _migration_009_calibration_points,
+    _migration_010_calibration_schedule,
+    _migration_011_instruments,
+    _migration_012_instrument_drift,
+    _migration_013_checklist_weekly,
+    _migration_014_checklist_daily,
+    _migration_015_job_runner,
+    _migration_016_table_versions,
+    _migration_017_job_heartbeat,
+    _migration_018_calibration_point_text,
+]
+SCHEMA_VERSION = len(MIGRATIONS)
+
+_migrated_dbs = _process_singleton("migrated_dbs", set)
+_migrate_lock = _process_singleton("migrate_lock", threading.Lock)
+
+def get_schema_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+def run_migrations(conn):
+    """Run pending migrations based on PRAGMA user_version, each in its own transaction"""
+    while get_schema_version(conn) < SCHEMA_VERSION:
+        # BEGIN IMMEDIATE ambil write lock dulu, lalu cek ulang versi: proses lain
+        # mungkin sudah menjalankan migrasi yang sama sambil kita menunggu lock.
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            version = get_schema_version(conn)
+            if version >= SCHEMA_VERSION:
+                conn.rollback()
+                break
+            MIGRATIONS[version](conn.cursor())
+            conn.execute(f"PRAGMA user_version = {version + 1}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+def init_db():
+    """Make sure the schema is up to date; after the first call per DB file this is only a set lookup"""
+    if DB_PATH in _migrated_dbs:
+        return
+    with _migrate_lock:
+        if DB_PATH in _migrated_dbs:
+            return
+        with db_conn() as conn:
+            run_migrations(conn)
+        _migrated_dbs.add(DB_PATH)
 
 def hash_password(password):
     return hashlib.sha256((password+'salt2025').encode()).hexdigest()
 
 def verify_user(username, password):
-    conn = get_conn()
-    c = conn.cursor()
-    c.execute("SELECT id, username, fullname, role, password_hash, signature FROM users WHERE username=?", (username,))
-    row = c.fetchone()
-    conn.close()
+    with db_conn() as conn:
+        c = conn.cursor()
+        c.execute("SELECT id, username, fullname, role, password_hash, signature FROM users WHERE username=?", (username,))
+        row = c.fetchone()
     if row and row[4] == hash_password(password):
         return True, {"id": row[0], "username": row[1], "fullname": row[2], "role": row[3], "signature": row[5]}
     return False, None
 
+@writes("users")
+def _write_signature(c, user_id, signature_data):
+    c.execute("UPDATE users SET signature = ? WHERE id = ?", (signature_data, user_id))
+
 def save_signature(user_id, signature_data):
     try:
-        conn = get_conn()
-        c = conn.cursor()
-        c.execute("UPDATE users SET signature = ? WHERE id = ?", (signature_data, user_id))
-        conn.commit()
-        conn.close()
+        run_write(_write_signature, user_id, signature_data)
         return True
     except Exception as e:
         st.error(f"Error saving signature: {e}")
         return False
 
+# ---------------------------
+# IMAGE INGESTION
+# ---------------------------
+# Slot foto di PDF 90x70 mm -> 1280 px sisi terpanjang sudah > 300 dpi
+IMAGE_MAX_PX = 1280
+IMAGE_JPEG_QUALITY = 80
+THUMB_MAX_PX = 256
+THUMB_JPEG_QUALITY = 70
+EXIF_ORIENTATION = 0x0112
+
+def _to_jpeg(img, max_px, quality):
+    img = img.copy()
+    img.thumbnail((max_px, max_px), Image.LANCZOS)
+    out = BytesIO()
+    img.save(out, format='JPEG', quality=quality, optimize=True, progressive=True)
+    return out.getvalue()
+
+def ingest_image(data):
+    """Normalize an uploaded photo: fix EXIF orientation, downscale to IMAGE_MAX_PX, recompress
+    to JPEG and make a thumbnail. Returns (image_bytes, thumb_bytes); (data, None) if it can't be decoded;
+    None for empty data (no photo, callers store nothing)."""
+    if not data:
+        return None
+    try:
+        img = Image.open(BytesIO(data))
+        # Viewer/PDF tidak semuanya membaca tag Orientation: foto yang punya tag selalu disimpan hasil re-encode
+        has_orientation = img.getexif().get(EXIF_ORIENTATION) is not None
+        img = ImageOps.exif_transpose(img)
+        if img.mode != 'RGB':
+            rgba = img.convert('RGBA')
+            img = Image.new('RGB', rgba.size, (255, 255, 255))
+            img.paste(rgba, mask=rgba.getchannel('A'))
+        image = _to_jpeg(img, IMAGE_MAX_PX, IMAGE_JPEG_QUALITY)
+        thumb = _to_jpeg(img, THUMB_MAX_PX, THUMB_JPEG_QUALITY)
+    except Exception:
+        return data, None
+    # Foto yang sudah kecil jangan dibuat lebih besar
+    if len(image) >= len(data) and max(img.size) <= IMAGE_MAX_PX and not has_orientation:
+        return data, thumb
+    return image, thumb
+
+def _store_attachment(c, data, thumb=None):
+    """Store bytes once in the attachments table and return the SHA-256 reference (None if empty)"""
+    if not data:
+        return None
+    sha = hashlib.sha256(data).hexdigest()
+    c.execute("""
+        INSERT OR IGNORE INTO attachments (sha256, data, size, created_at, thumb, mime)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, (sha, data, len(data), datetime.now(pytz.timezone('Asia/Singapore')).isoformat(),
+          thumb, 'image/jpeg' if data[:3] == b'\xff\xd8\xff' else None))
+    return sha
+
+@cached_query("attachments")
+def get_attachment_thumbnails(refs):
+    """sha256 -> thumbnail bytes for the given attachment refs (refs without thumbnail are skipped)"""
+    refs = [r for r in refs if isinstance(r, str) and r]
+    if not refs:
+        return {}
+    with db_conn() as conn:
+        c = conn.cursor()
+        c.execute(f"SELECT sha256, thumb FROM attachments WHERE sha256 IN ({', '.join('?' * len(refs))}) AND thumb IS NOT NULL", refs)
+        rows = c.fetchall()
+    return dict(rows)
+
+@writes("checklist", "attachments", "checklist_weekly", "checklist_daily", "checklist_component_daily")
+def _insert_checklist_items(c, user_id, date_str, machine, sub_area, shift, items, img_before, img_after, created_at):
+    """Insert checklist rows that share one pair of photos (runs on the writer thread).
+    img_before / img_after are ingest_image() results or None."""
+    # Foto yang sama untuk semua part cukup disimpan sekali, tiap row hanya menyimpan referensi
+    img_before_ref = _store_attachment(c, *img_before) if img_before else None
+    img_after_ref = _store_attachment(c, *img_after) if img_after else None
+    
+    rows = [
+        (user_id, date_str, machine, sub_area, shift,
+         item_data['item'], item_data['condition'], item_data['note'],
+         img_before_ref, img_after_ref, created_at,
+         json.dumps(item_data['details']) if item_data.get('details') else None)
+        for item_data in items
+    ]
+    c.executemany("""
+        INSERT INTO checklist (user_id, date, machine, sub_area, shift, item, condition, note, image_before_ref, image_after_ref, created_at, details)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, rows)
+    _update_checklist_rollups(c, [row[1:7] + (row[11],) for row in rows])
+    return len(rows)
+
+def week_start(date):
+    """Monday (YYYY-MM-DD) of the week of a date string, '' if it isn't a date. Same as WEEK_SQL for
+    YYYY-MM-DD dates only; the rollup tables use WEEK_SQL itself."""
+    day = _parse_date(date)
+    return (day - timedelta(days=day.weekday())).isoformat() if day else ""
+
+def _add_rollup_counts(c, table, keys, cols, counts):
+    """Upsert {key tuple: [counts]} into a rollup table, adding to the counts already there"""
+    c.executemany(f"""
+        INSERT INTO {table} ({", ".join(keys + cols)})
+        VALUES ({", ".join("?" * (len(keys) + len(cols)))})
+        ON CONFLICT({", ".join(keys)}) DO UPDATE SET
+            {", ".join(f"{col} = {col} + excluded.{col}" for col in cols)}
+    """, [key + tuple(values) for key, values in counts.items()])
+
+def _update_checklist_rollups(c, rows):
+    """Add new checklist rows (date, machine, sub_area, shift, item, condition, details) to the daily,
+    weekly and component rollups; one upsert per group of the batch (same counting as the _fill_* SQL)"""
+    daily, components = {}, {}
+    for date, machine, sub_area, shift, item, condition, details in rows:
+        key = tuple(value or "" for value in (date, machine, sub_area, shift, item))
+        try:
+            parsed, valid = json.loads(details), True
+        except (TypeError, ValueError):
+            parsed, valid = None, False
+        values = parsed.values() if isinstance(parsed, dict) else parsed if isinstance(parsed, list) else [parsed]
+        ng = valid and any(value == "NG" for value in values)
+        counts = daily.setdefault(key, [0] * len(CHECKLIST_ROLLUP_COUNTS))
+        for i, add in enumerate((1, condition == "Good", condition == "Minor", condition == "Bad", ng, valid)):
+            counts[i] += add
+        if isinstance(parsed, dict):
+            for component, status in parsed.items():
+                counts = components.setdefault(key + (component,), [0, 0])
+                counts[0] += status == "OK"
+                counts[1] += status == "NG"
+    # Minggu dihitung oleh SQLite (WEEK_SQL) seperti _fill_checklist_rollup: date() SQLite dan week_start
+    # berbeda untuk tanggal tidak standar ('2025-3-1', '2025-03-12 08:00')
+    weeks = {date: c.execute(f"SELECT COALESCE({WEEK_SQL.format(date='?')}, '')", (date,)).fetchone()[0]
+             for date in {key[0] for key in daily}}
+    weekly = {}
+    for key, counts in daily.items():
+        week = weekly.setdefault((weeks[key[0]],) + key[1:], [0] * len(CHECKLIST_ROLLUP_COUNTS))
+        for i, count in enumerate(counts):
+            week[i] += count
+    for table, counts in (("checklist_daily", daily), ("checklist_weekly", weekly)):
+        _add_rollup_counts(c, table, (CHECKLIST_ROLLUPS[table][0],) + CHECKLIST_ROLLUP_DIMENSIONS,
+                           CHECKLIST_ROLLUP_COUNTS, counts)
+    _add_rollup_counts(c, "checklist_component_daily", CHECKLIST_COMPONENT_KEYS, CHECKLIST_COMPONENT_COUNTS, components)
+
+CHECKLIST_ROLLUP_TABLES = tuple(CHECKLIST_ROLLUPS) + ("checklist_component_daily",)
+
+@writes(*CHECKLIST_ROLLUP_TABLES)
+def _rebuild_checklist_rollups(c):
+    """Recompute every checklist rollup table from checklist; returns {table: rows}"""
+    for table in CHECKLIST_ROLLUPS:
+        _fill_checklist_rollup(c, table)
+    _fill_checklist_components(c)
+    return {table: c.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0] for table in CHECKLIST_ROLLUP_TABLES}
+
+def rebuild_checklist_rollups():
+    """Backfill / repair the checklist rollups (python app.py rebuild-rollups or the Admin Dashboard button)"""
+    init_db()
+    return run_write(_rebuild_checklist_rollups)
+
+@writes("checklist", "attachments", "checklist_weekly", "checklist_daily", "checklist_component_daily")
+def _bulk_insert_checklists(c, records, created_at):
+    """executemany insert for bulk_import_checklists (runs on the writer thread)"""
+    attachments = {}
+    hashed = {}
+    rows = []
+    for r in records:
+        refs = []
+        for key in ('image_before', 'image_after'):
+            data = r.get(key)
+            if not data:
+                refs.append(None)
+                continue
+            # Foto yang sama (objek bytes yang sama) cukup di-hash sekali
+            sha = hashed.get(id(data))
+            if sha is None:
+                sha = hashed[id(data)] = hashlib.sha256(data).hexdigest()
+                attachments[sha] = data
+            refs.append(sha)
+        date = r.get('date')
+        details = r.get('details')
+        rows.append((
+            r.get('user_id'),
+            date.strftime("%Y-%m-%d") if hasattr(date, 'strftime') else date,
+            r.get('machine'), r.get('sub_area'), r.get('shift'),
+            r.get('item'), r.get('condition'), r.get('note'),
+            refs[0], refs[1],
+            r.get('created_at') or created_at,
+            details if details is None or isinstance(details, str) else json.dumps(details),
+            r.get('approval_status') or 'Pending',
+            r.get('approved_by'), r.get('approved_at'), r.get('signature'),
+        ))
+    c.executemany("""
+        INSERT OR IGNORE INTO attachments (sha256, data, size, created_at)
+        VALUES (?, ?, ?, ?)
+    """, [(sha, data, len(data), created_at) for sha, data in attachments.items()])
+    c.executemany("""
+        INSERT INTO checklist (user_id, date, machine, sub_area, shift, item, condition, note,
+                               image_before_ref, image_after_ref, created_at, details,
+                               approval_status, approved_by, approved_at, signature)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, rows)
+    _update_checklist_rollups(c, [row[1:7] + (row[11],) for row in rows])
+    return len(rows)
+
+def bulk_import_checklists(records):
+    """Import many checklist rows (e.g. historical data) as dicts with the checklist column names;
+    photos as bytes under image_before/image_after. Returns the number of imported rows.
+    All rows go in one writer job (one transaction): on any error nothing is imported."""
+    records = list(records)
+    created_at = datetime.now(pytz.timezone('Asia/Singapore')).isoformat()
+    # Tanpa timeout: import besar boleh lama, hasilnya harus tetap diketahui
+    return submit_write(_bulk_insert_checklists, records, created_at).result()
+
 def save_checklist_batch(user_id, date, machine, sub_area, shift, checklist_data, image_before=None, image_after=None):
     """Save multiple checklist items at once"""
     try:
-        conn = get_conn()
-        c = conn.cursor()
         date_str = date.strftime("%Y-%m-%d") if hasattr(date, 'strftime') else str(date)
-        img_before_binary = image_before.read() if image_before else None
-        img_after_binary = image_after.read() if image_after else None
+        img_before = ingest_image(image_before.read()) if image_before else None
+        img_after = ingest_image(image_after.read()) if image_after else None
         
         singapore_tz = pytz.timezone('Asia/Singapore')
         now = datetime.now(singapore_tz)
         
-        # Insert each item
-        for item_data in checklist_data:
-            details_json = json.dumps(item_data['details']) if item_data.get('details') else None
-            
-            c.execute("""
-                INSERT INTO checklist (user_id, date, machine, sub_area, shift, item, condition, note, image_before, image_after, created_at, details)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (user_id, date_str, machine, sub_area, shift, 
-                  item_data['item'], item_data['condition'], item_data['note'], 
-                  img_before_binary, img_after_binary, now.isoformat(), details_json))
-        
-        conn.commit()
-        conn.close()
+        run_write(_insert_checklist_items, user_id, date_str, machine, sub_area, shift, checklist_data,
+                  img_before, img_after, now.isoformat())
         st.success(f"✅ {len(checklist_data)} item berhasil disimpan!")
         return True
     except Exception as e:
@@ -346,187 +1388,249 @@ def save_checklist_batch(user_id, date, machine, sub_area, shift, checklist_data
 
 def save_checklist(user_id, date, machine, sub_area, shift, item, condition, note, image_before=None, image_after=None, details=None):
     try:
-        conn = get_conn()
-        c = conn.cursor()
         date_str = date.strftime("%Y-%m-%d") if hasattr(date, 'strftime') else str(date)
-        img_before_binary = image_before.read() if image_before else None
-        img_after_binary = image_after.read() if image_after else None
+        img_before = ingest_image(image_before.read()) if image_before else None
+        img_after = ingest_image(image_after.read()) if image_after else None
         
         singapore_tz = pytz.timezone('Asia/Singapore')
         now = datetime.now(singapore_tz)
         
-        details_json = json.dumps(details) if details else None
-        
-        c.execute("""
-            INSERT INTO checklist (user_id, date, machine, sub_area, shift, item, condition, note, image_before, image_after, created_at, details)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (user_id, date_str, machine, sub_area, shift, item, condition, note, img_before_binary, img_after_binary, now.isoformat(), details_json))
-        conn.commit()
-        conn.close()
+        item_data = {'item': item, 'condition': condition, 'note': note, 'details': details}
+        run_write(_insert_checklist_items, user_id, date_str, machine, sub_area, shift, [item_data],
+                  img_before, img_after, now.isoformat())
         st.success("✅ Data berhasil disimpan!")
         return True
     except Exception as e:
         st.error(f"❌ Error menyimpan checklist: {e}")
         return False
 
+@writes("calibration", "calibration_points", "suggestions", "calibration_latest", "calibration_due", "instruments",
+        "instrument_drift")
+def _insert_calibration(c, user_id, calibration_data, created_at):
+    """Insert one calibration report (runs on the writer thread), returns the new id"""
+    c.execute("""
+        INSERT INTO calibration (
+            user_id, doc_no, date, name, environmental_temp, humidity,
+            equipment_name, id_number, function_loc, plant, description, service_name, location,
+            input, output, manufacturer, model, serial_no, range_in, range_out,
+            interval_cal, calibrators, result_data, created_at,
+            reject_error_value, reject_error_span, status_as_found, status_as_left,
+            next_cal_date, calibration_node, calibration_by_name, calibration_by_date,
+            approved_by_name, approved_by_date
+        )
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, (
+        user_id,
+        calibration_data.get('doc_no'),
+        calibration_data.get('date'),
+        calibration_data.get('name'),
+        calibration_data.get('environmental_temp'),
+        calibration_data.get('humidity'),
+        calibration_data.get('equipment_name'),
+        calibration_data.get('id_number'),
+        calibration_data.get('function_loc'),
+        calibration_data.get('plant'),
+        calibration_data.get('description'),
+        calibration_data.get('service_name'),
+        calibration_data.get('location'),
+        calibration_data.get('input'),
+        calibration_data.get('output'),
+        calibration_data.get('manufacturer'),
+        calibration_data.get('model'),
+        calibration_data.get('serial_no'),
+        calibration_data.get('range_in'),
+        calibration_data.get('range_out'),
+        calibration_data.get('interval_cal'),
+        calibration_data.get('calibrators'),
+        None,  # result_data: tabel hasil (angka & teks sel) hanya di calibration_points
+        created_at,
+        calibration_data.get('reject_error_value'),
+        calibration_data.get('reject_error_span'),
+        calibration_data.get('status_as_found'),
+        calibration_data.get('status_as_left'),
+        calibration_data.get('next_cal_date'),
+        calibration_data.get('calibration_node'),
+        calibration_data.get('calibration_by_name'),
+        calibration_data.get('calibration_by_date'),
+        calibration_data.get('approved_by_name'),
+        calibration_data.get('approved_by_date')
+    ))
+    calibration_id = c.lastrowid
+    _insert_calibration_points(c, calibration_id, calibration_data.get('result_data'))
+    _record_suggestions(c, calibration_data, created_at)
+    _upsert_calibration_latest(c, [_calibration_latest_row(calibration_id, calibration_data)])
+    instrument_id = _store_instrument(c, calibration_id, calibration_data, created_at)
+    c.execute("DELETE FROM instrument_drift WHERE instrument_id = ?", (instrument_id,))
+    # Daftar due hari ini dibangun ulang saat dibaca berikutnya
+    c.execute("DELETE FROM calibration_due_runs")
+    return calibration_id
+
+def _store_instrument(c, calibration_id, data, updated_at):
+    """Link a new report to its instrument master row and drop the equipment values it shares with it.
+    The master follows the latest report per Tag ID; older reports keep their own values when it changes.
+    Returns the instrument id (None without Tag ID)."""
+    id_number = str(data.get('id_number') or "").strip()
+    if not id_number:
+        return None
+    values = [data.get(col) for col in INSTRUMENT_COLS]
+    c.execute(f"SELECT id, {', '.join(INSTRUMENT_COLS)} FROM instruments WHERE id_number = ?", (id_number,))
+    row = c.fetchone()
+    if row is None:
+        c.execute(f"""
+            INSERT INTO instruments (id_number, {', '.join(INSTRUMENT_COLS)}, updated_at)
+            VALUES ({', '.join('?' * (len(INSTRUMENT_COLS) + 2))})
+        """, [id_number] + values + [updated_at])
+        instrument_id, master = c.lastrowid, values
+    else:
+        instrument_id, master = row[0], list(row[1:])
+        c.execute("SELECT calibration_id FROM calibration_latest WHERE id_number = ?", (id_number,))
+        latest = c.fetchone()
+        changed = [i for i, (value, old) in enumerate(zip(values, master)) if value != old]
+        if changed and latest and latest[0] == calibration_id:
+            # Report lama yang ikut master menyimpan nilai lamanya sendiri sebelum master diganti
+            for i in changed:
+                col = INSTRUMENT_COLS[i]
+                c.execute(f"UPDATE calibration SET {col} = ? WHERE instrument_id = ? AND {col} IS NULL",
+                          (master[i] if master[i] is not None else "", instrument_id))
+            c.execute(f"UPDATE instruments SET {', '.join(f'{INSTRUMENT_COLS[i]} = ?' for i in changed)}, updated_at = ? WHERE id = ?",
+                      [values[i] for i in changed] + [updated_at, instrument_id])
+            master = values
+    stored = [None if value == old else ("" if value is None else value) for value, old in zip(values, master)]
+    c.execute(f"UPDATE calibration SET instrument_id = ?, {', '.join(f'{col} = ?' for col in INSTRUMENT_COLS)} WHERE id = ?",
+              [instrument_id] + stored + [calibration_id])
+    return instrument_id
+
+def _insert_calibration_points(c, calibration_id, result_data):
+    cols = CALIBRATION_POINT_COLS + CALIBRATION_POINT_TEXT_COLS
+    c.executemany(f"""
+        INSERT INTO calibration_points (calibration_id, seq, {", ".join(cols)})
+        VALUES ({", ".join("?" * (len(cols) + 2))})
+    """, _calibration_point_rows(calibration_id, result_data, text=True))
+
+def _record_suggestions(c, data, used_at):
+    """Upsert the form values of a new report into the autocomplete index"""
+    rows = []
+    for field in SUGGESTION_FIELDS:
+        value = str(data.get(field) or '').strip()
+        if value:
+            rows.append((field, value, used_at))
+    c.executemany("""
+        INSERT INTO suggestions (field, value, freq, last_used) VALUES (?, ?, 1, ?)
+        ON CONFLICT(field, value) DO UPDATE SET
+            freq = freq + 1,
+            last_used = MAX(COALESCE(last_used, ''), excluded.last_used)
+    """, rows)
+
+@cached_query("suggestions")
+def get_suggestions(limits):
+    """{field: limit} -> {field: [values]}, most recently used first (index range scan per field)"""
+    with db_conn() as conn:
+        c = conn.cursor()
+        result = {}
+        for field, limit in limits.items():
+            c.execute("""
+                SELECT value FROM suggestions
+                WHERE field = ?
+                ORDER BY last_used DESC, freq DESC
+                LIMIT ?
+            """, (field, limit))
+            result[field] = [row[0] for row in c.fetchall()]
+    return result
+
 def save_calibration(user_id, calibration_data):
     """Save detailed calibration report"""
     try:
-        conn = get_conn()
-        c = conn.cursor()
-        
-        # Add missing columns if they don't exist
-        try:
-            c.execute("ALTER TABLE calibration ADD COLUMN location TEXT")
-        except:
-            pass
-        try:
-            c.execute("ALTER TABLE calibration ADD COLUMN interval_cal TEXT")
-        except:
-            pass
-        try:
-            c.execute("ALTER TABLE calibration ADD COLUMN reject_error_value TEXT")
-        except:
-            pass
-        try:
-            c.execute("ALTER TABLE calibration ADD COLUMN reject_error_span TEXT")
-        except:
-            pass
-        try:
-            c.execute("ALTER TABLE calibration ADD COLUMN status_as_found TEXT")
-        except:
-            pass
-        try:
-            c.execute("ALTER TABLE calibration ADD COLUMN status_as_left TEXT")
-        except:
-            pass
-        try:
-            c.execute("ALTER TABLE calibration ADD COLUMN next_cal_date TEXT")
-        except:
-            pass
-        try:
-            c.execute("ALTER TABLE calibration ADD COLUMN calibration_node TEXT")
-        except:
-            pass
-        try:
-            c.execute("ALTER TABLE calibration ADD COLUMN calibration_by_name TEXT")
-        except:
-            pass
-        try:
-            c.execute("ALTER TABLE calibration ADD COLUMN calibration_by_date TEXT")
-        except:
-            pass
-        try:
-            c.execute("ALTER TABLE calibration ADD COLUMN approved_by_name TEXT")
-        except:
-            pass
-        try:
-            c.execute("ALTER TABLE calibration ADD COLUMN approved_by_date TEXT")
-        except:
-            pass
-        
         singapore_tz = pytz.timezone('Asia/Singapore')
         now = datetime.now(singapore_tz)
         
-        c.execute("""
-            INSERT INTO calibration (
-                user_id, doc_no, date, name, environmental_temp, humidity,
-                equipment_name, id_number, function_loc, plant, description, service_name, location,
-                input, output, manufacturer, model, serial_no, range_in, range_out,
-                interval_cal, calibrators, result_data, created_at,
-                reject_error_value, reject_error_span, status_as_found, status_as_left,
-                next_cal_date, calibration_node, calibration_by_name, calibration_by_date,
-                approved_by_name, approved_by_date
-            )
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            user_id,
-            calibration_data.get('doc_no'),
-            calibration_data.get('date'),
-            calibration_data.get('name'),
-            calibration_data.get('environmental_temp'),
-            calibration_data.get('humidity'),
-            calibration_data.get('equipment_name'),
-            calibration_data.get('id_number'),
-            calibration_data.get('function_loc'),
-            calibration_data.get('plant'),
-            calibration_data.get('description'),
-            calibration_data.get('service_name'),
-            calibration_data.get('location'),
-            calibration_data.get('input'),
-            calibration_data.get('output'),
-            calibration_data.get('manufacturer'),
-            calibration_data.get('model'),
-            calibration_data.get('serial_no'),
-            calibration_data.get('range_in'),
-            calibration_data.get('range_out'),
-            calibration_data.get('interval_cal'),
-            calibration_data.get('calibrators'),
-            json.dumps(calibration_data.get('result_data', [])),
-            now.isoformat(),
-            calibration_data.get('reject_error_value'),
-            calibration_data.get('reject_error_span'),
-            calibration_data.get('status_as_found'),
-            calibration_data.get('status_as_left'),
-            calibration_data.get('next_cal_date'),
-            calibration_data.get('calibration_node'),
-            calibration_data.get('calibration_by_name'),
-            calibration_data.get('calibration_by_date'),
-            calibration_data.get('approved_by_name'),
-            calibration_data.get('approved_by_date')
-        ))
-        
-        conn.commit()
-        conn.close()
+        run_write(_insert_calibration, user_id, calibration_data, now.isoformat())
         st.success("✅ Calibration report berhasil disimpan!")
         return True
     except Exception as e:
         st.error(f"❌ Error menyimpan calibration: {e}")
         return False
 
-def get_checklists(user_id=None):
-    conn = get_conn()
-    c = conn.cursor()
-    if user_id:
-        c.execute("""
-            SELECT c.id, c.user_id, c.date, c.machine, c.sub_area, c.shift, c.item, c.condition, c.note, 
-                   c.image_before, c.image_after, c.created_at, 
-                   COALESCE(c.approved_by, '') as approved_by, 
-                   COALESCE(c.approved_at, '') as approved_at, 
-                   COALESCE(c.approval_status, 'Pending') as approval_status,
-                   c.signature,
-                   c.details,
-                   u.fullname as input_by
-            FROM checklist c 
-            LEFT JOIN users u ON c.user_id = u.id 
-            WHERE c.user_id=? 
-            ORDER BY c.date DESC, c.id DESC
-        """, (user_id,))
-    else:
-        c.execute("""
-            SELECT c.id, c.user_id, c.date, c.machine, c.sub_area, c.shift, c.item, c.condition, c.note, 
-                   c.image_before, c.image_after, c.created_at, 
-                   COALESCE(c.approved_by, '') as approved_by, 
-                   COALESCE(c.approved_at, '') as approved_at, 
+# Kolom ringan untuk list view (tanpa foto & tanda tangan)
+CHECKLIST_LIST_COLS = ["id", "user_id", "date", "machine", "sub_area", "shift", "item", "condition", "note",
+                       "created_at", "approved_by", "approved_at", "approval_status", "details", "input_by",
+                       "image_before_ref", "image_after_ref"]
+
+CHECKLIST_LIST_SELECT = """
+    SELECT c.id, c.user_id, c.date, c.machine, c.sub_area, c.shift, c.item, c.condition, c.note,
+           c.created_at,
+           COALESCE(c.approved_by, '') as approved_by,
+           COALESCE(c.approved_at, '') as approved_at,
+           COALESCE(c.approval_status, 'Pending') as approval_status,
+           c.details,
+           u.fullname as input_by,
+           c.image_before_ref, c.image_after_ref
+    FROM checklist c
+    LEFT JOIN users u ON c.user_id = u.id
+"""
+
+def _build_df(rows, cols, dtypes=None):
+    df = pd.DataFrame(rows, columns=cols) if rows else pd.DataFrame(columns=cols)
+    for col, dtype in (dtypes or {}).items():
+        if df[col].dtype != dtype:
+            df[col] = df[col].astype(dtype)
+    return df
+
+def get_checklist_records(checklist_ids):
+    """Full checklist rows (incl. photos & signature) for the given ids"""
+    cols = ["id", "user_id", "date", "machine", "sub_area", "shift", "item", "condition", "note", "image_before", "image_after", "created_at", "approved_by", "approved_at", "approval_status", "signature", "details", "input_by"]
+    checklist_ids = [int(i) for i in checklist_ids]
+    if not checklist_ids:
+        return _build_df([], cols)
+    with db_conn() as conn:
+        c = conn.cursor()
+        placeholders = ", ".join("?" * len(checklist_ids))
+        c.execute(f"""
+            SELECT c.id, c.user_id, c.date, c.machine, c.sub_area, c.shift, c.item, c.condition, c.note,
+                   ab.data as image_before, aa.data as image_after, c.created_at,
+                   COALESCE(c.approved_by, '') as approved_by,
+                   COALESCE(c.approved_at, '') as approved_at,
                    COALESCE(c.approval_status, 'Pending') as approval_status,
                    c.signature,
                    c.details,
                    u.fullname as input_by
-            FROM checklist c 
-            LEFT JOIN users u ON c.user_id = u.id 
+            FROM checklist c
+            LEFT JOIN users u ON c.user_id = u.id
+            LEFT JOIN attachments ab ON ab.sha256 = c.image_before_ref
+            LEFT JOIN attachments aa ON aa.sha256 = c.image_after_ref
+            WHERE c.id IN ({placeholders})
             ORDER BY c.date DESC, c.id DESC
-        """)
-    rows = c.fetchall()
-    conn.close()
-    cols = ["id", "user_id", "date", "machine", "sub_area", "shift", "item", "condition", "note", "image_before", "image_after", "created_at", "approved_by", "approved_at", "approval_status", "signature", "details", "input_by"]
-    return pd.DataFrame(rows, columns=cols) if rows else pd.DataFrame(columns=cols)
+        """, checklist_ids)
+        rows = c.fetchall()
+    return _build_df(rows, cols)
 
-def get_calibrations(user_id=None):
-    conn = get_conn()
-    c = conn.cursor()
-    
+def get_checklist_record(checklist_id):
+    """Single full checklist row as dict (None if not found)"""
+    df = get_checklist_records([checklist_id])
+    return df.iloc[0].to_dict() if not df.empty else None
+
+CALIBRATION_COLS = ["id", "user_id", "created_at", "doc_no", "date", "name", "equipment_name", "model", "serial_no",
+                    "environmental_temp", "humidity", "id_number", "function_loc", "plant",
+                    "description", "service_name", "location", "input", "output", "manufacturer",
+                    "range_in", "range_out", "interval_cal", "calibrators", "result_data",
+                    "approved_by", "approved_at", "approval_status", "signature",
+                    "reject_error_value", "reject_error_span", "status_as_found", "status_as_left",
+                    "next_cal_date", "calibration_node", "calibration_by_name", "calibration_by_date",
+                    "approved_by_name", "approved_by_date", "input_by"]
+_calibration_select_clauses = _process_singleton("calibration_select_clauses", dict)  # (db path, schema version) -> SQL
+
+def _calibration_select_clause(c):
+    """SELECT list for CALIBRATION_COLS, introspected once per DB file and schema version.
+    The generated SQL text is stable, so sqlite3's statement cache reuses the prepared statement."""
+    key = (DB_PATH, SCHEMA_VERSION)
+    clause = _calibration_select_clauses.get(key)
+    if clause is None:
+        clause = _calibration_select_clauses[key] = _build_calibration_select_clause(c)
+    return clause
+
+def _build_calibration_select_clause(c):
+    """SELECT list for CALIBRATION_COLS with fallbacks for columns missing in older databases"""
     # First, check which columns exist
-    c.execute("PRAGMA table_info(calibration)")
+    c.execute("PRAGMA table_info(calibration_full)")
     existing_columns = [col[1] for col in c.fetchall()]
     
     # Build SELECT clause dynamically based on existing columns
@@ -597,58 +1701,264 @@ def get_calibrations(user_id=None):
     # Add user fullname
     select_parts.append("COALESCE(u.fullname, '') as input_by")
     
-    select_clause = ", ".join(select_parts)
-    
-    if user_id:
-        query = f"""
+    return ", ".join(select_parts)
+
+def get_calibration_records(calibration_ids):
+    """Full calibration rows (incl. signature) for the given ids as a list of dicts, newest first"""
+    calibration_ids = [int(i) for i in calibration_ids]
+    if not calibration_ids:
+        return []
+    with db_conn() as conn:
+        c = conn.cursor()
+        select_clause = _calibration_select_clause(c)
+        placeholders = ", ".join("?" * len(calibration_ids))
+        c.execute(f"""
             SELECT {select_clause}
-            FROM calibration c 
-            LEFT JOIN users u ON c.user_id = u.id 
-            WHERE c.user_id = ? 
-            ORDER BY c.id DESC
-        """
-        c.execute(query, (user_id,))
+            FROM calibration_full c
+            LEFT JOIN users u ON c.user_id = u.id
+            WHERE c.id IN ({placeholders})
+            ORDER BY c.date DESC, c.id DESC
+        """, calibration_ids)
+        rows = c.fetchall()
+    records = [dict(zip(CALIBRATION_COLS, row)) for row in rows]
+    points = get_calibration_points([r['id'] for r in records], text=True)
+    by_id = {cid: [{col: point[col] if pd.isna(point[f"{col}_text"]) else point[f"{col}_text"] for col in CALIBRATION_POINT_COLS}
+                   for point in group.to_dict('records')]
+             for cid, group in points.groupby('calibration_id')}
+    # points = sel tabel hasil untuk PDF: teks seperti diisi, selain itu angkanya
+    for record in records:
+        record['points'] = by_id.get(record['id'], [])
+    return records
+
+def get_calibration_points(calibration_ids=None, text=False):
+    """Measurement points as a numeric DataFrame (calibration_id, seq, percent, ..., left_error),
+    ordered by calibration and point; all calibrations when calibration_ids is None.
+    text=True adds the CALIBRATION_POINT_TEXT_COLS."""
+    cols = ["calibration_id", "seq"] + CALIBRATION_POINT_COLS + (CALIBRATION_POINT_TEXT_COLS if text else [])
+    query = f"SELECT {', '.join(cols)} FROM calibration_points"
+    params = []
+    if calibration_ids is not None:
+        params = [int(i) for i in calibration_ids]
+        if not params:
+            return _build_df([], cols)
+        query += f" WHERE calibration_id IN ({', '.join('?' * len(params))})"
+    query += " ORDER BY calibration_id, seq"
+    with db_conn() as conn:
+        c = conn.cursor()
+        c.execute(query, params)
+        rows = c.fetchall()
+    return _build_df(rows, cols)
+
+def get_calibration_record(calibration_id):
+    """Single full calibration row (incl. signature) as dict (None if not found)"""
+    records = get_calibration_records([calibration_id])
+    return records[0] if records else None
+
+@cached_query("instruments", "calibration_latest", "calibration")
+def get_instrument(id_number):
+    """Instrument master record for a Tag ID with description / service and due date of its latest report
+    (one indexed lookup, used to prefill the calibration form). None if the tag is unknown"""
+    id_number = str(id_number or "").strip()
+    if not id_number:
+        return None
+    cols = ["id", "id_number"] + list(INSTRUMENT_COLS) + ["description", "service_name", "last_date", "next_due_date"]
+    with db_conn() as conn:
+        c = conn.cursor()
+        c.execute(f"""
+            SELECT i.id, i.id_number, {", ".join(f"COALESCE(i.{col}, '')" for col in INSTRUMENT_COLS)},
+                   COALESCE(cal.description, ''), COALESCE(cal.service_name, ''), l.date, l.next_due_date
+            FROM instruments i
+            LEFT JOIN calibration_latest l ON l.id_number = i.id_number
+            LEFT JOIN calibration cal ON cal.id = l.calibration_id
+            WHERE i.id_number = ?
+        """, (id_number,))
+        row = c.fetchone()
+    return dict(zip(cols, row)) if row else None
+
+# ---------------------------
+# PAGED LIST QUERIES
+# ---------------------------
+PAGE_SIZE = 50
+
+CHECKLIST_FILTERS = ("id", "machine", "sub_area", "shift", "approval_status", "user_id")
+CALIBRATION_FILTERS = ("id", "approval_status", "user_id", "plant", "id_number")
+
+CALIBRATION_LIST_COLS = ["id", "user_id", "doc_no", "date", "name", "equipment_name", "model", "id_number",
+                         "plant", "created_at", "approval_status", "approved_at", "input_by"]
+
+CALIBRATION_LIST_SELECT = """
+    SELECT c.id, c.user_id, COALESCE(c.doc_no, '') as doc_no, c.date, COALESCE(c.name, '') as name,
+           COALESCE(c.equipment_name, '') as equipment_name, COALESCE(c.model, '') as model,
+           COALESCE(c.id_number, '') as id_number, COALESCE(c.plant, '') as plant, c.created_at,
+           COALESCE(c.approval_status, 'Pending') as approval_status,
+           COALESCE(c.approved_at, '') as approved_at,
+           COALESCE(u.fullname, '') as input_by
+    FROM calibration_full c
+    LEFT JOIN users u ON c.user_id = u.id
+"""
+
+def fts_query(text):
+    """Free text from a search box -> FTS5 MATCH expression (None if there is nothing to search).
+    Every word is quoted (so PT/1 or 2-wire are safe), all words must match, the last one as prefix."""
+    terms = [t for t in (text or "").split() if re.search(r"\w", t)]
+    if not terms:
+        return None
+    quoted = ['"' + t.replace('"', '""') + '"' for t in terms]
+    quoted[-1] += "*"
+    return " AND ".join(quoted)
+
+def _filters_sql(filters, allowed, fts_table=None):
+    """WHERE parts + params for list filters; empty values are ignored, date_from/date_to are inclusive.
+    "q" is a full-text search on fts_table."""
+    where, params = [], []
+    for key, value in (filters or {}).items():
+        if value is None or value == "":
+            continue
+        if hasattr(value, 'strftime'):
+            value = value.strftime("%Y-%m-%d")
+        if key == "date_from":
+            where.append("c.date >= ?")
+        elif key == "date_to":
+            where.append("c.date <= ?")
+        elif key == "q" and fts_table:
+            value = fts_query(value)
+            if value is None:
+                continue
+            where.append(f"c.id IN (SELECT rowid FROM {fts_table} WHERE {fts_table} MATCH ?)")
+        elif key in allowed:
+            where.append(f"c.{key} = ?")
+        else:
+            raise ValueError(f"Unknown filter: {key}")
+        params.append(value)
+    return where, params
+
+def _page_rows(select_sql, where, params, fetch):
+    query = select_sql
+    if where:
+        query += " WHERE " + " AND ".join(where)
+    query += " ORDER BY c.date DESC, c.id DESC"
+    if fetch:
+        query += " LIMIT ?"
+        params = params + [fetch]
+    with db_conn() as conn:
+        c = conn.cursor()
+        c.execute(query, params)
+        return c.fetchall()
+
+def _fetch_page(select_sql, cols, where, params, cursor, limit):
+    """Keyset pagination on (date, id) DESC, rows without a date last. Returns (DataFrame, next_cursor or None)"""
+    where, params = list(where), list(params)
+    fetch = limit + 1 if limit else None
+    if cursor and cursor[0] is None:
+        rows = _page_rows(select_sql, where + ["c.date IS NULL", "c.id < ?"], params + [cursor[1]], fetch)
+    elif cursor:
+        rows = _page_rows(select_sql, where + ["(c.date, c.id) < (?, ?)"], params + list(cursor), fetch)
+        # Row value tidak pernah cocok dengan date NULL; baris itu ada di ujung urutan DESC.
+        # Query terpisah supaya keduanya tetap range seek di index (date, id).
+        if fetch is None or len(rows) < fetch:
+            rows += _page_rows(select_sql, where + ["c.date IS NULL"], params, fetch and fetch - len(rows))
     else:
-        query = f"""
-            SELECT {select_clause}
-            FROM calibration c 
-            LEFT JOIN users u ON c.user_id = u.id 
-            ORDER BY c.id DESC
-        """
-        c.execute(query)
-    
-    rows = c.fetchall()
-    conn.close()
-    
-    # Column names in order
-    cols = ["id", "user_id", "created_at", "doc_no", "date", "name", "equipment_name", "model", "serial_no",
-            "environmental_temp", "humidity", "id_number", "function_loc", "plant",
-            "description", "service_name", "location", "input", "output", "manufacturer",
-            "range_in", "range_out", "interval_cal", "calibrators", "result_data",
-            "approved_by", "approved_at", "approval_status", "signature",
-            "reject_error_value", "reject_error_span", "status_as_found", "status_as_left",
-            "next_cal_date", "calibration_node", "calibration_by_name", "calibration_by_date",
-            "approved_by_name", "approved_by_date", "input_by"]
-    
-    return pd.DataFrame(rows, columns=cols) if rows else pd.DataFrame(columns=cols)
+        rows = _page_rows(select_sql, where, params, fetch)
+
+    next_cursor = None
+    if limit and len(rows) > limit:
+        rows = rows[:limit]
+        last = dict(zip(cols, rows[-1]))
+        next_cursor = (last["date"], last["id"])
+    return _build_df(rows, cols), next_cursor
+
+def _count_rows(table, where, params):
+    with db_conn() as conn:
+        c = conn.cursor()
+        query = f"SELECT COUNT(*) FROM {table} c"
+        if where:
+            query += " WHERE " + " AND ".join(where)
+        c.execute(query, params)
+        total = c.fetchone()[0]
+    return total
+
+@cached_query("checklist", "users")
+def get_checklist_page(filters=None, cursor=None, limit=PAGE_SIZE):
+    """One page of checklist list rows (no BLOBs). limit=None returns every matching row"""
+    where, params = _filters_sql(filters, CHECKLIST_FILTERS, "checklist_fts")
+    return _fetch_page(CHECKLIST_LIST_SELECT, CHECKLIST_LIST_COLS, where, params, cursor, limit)
+
+@cached_query("checklist")
+def count_checklists(filters=None):
+    return _count_rows("checklist", *_filters_sql(filters, CHECKLIST_FILTERS, "checklist_fts"))
+
+@cached_query("calibration", "instruments", "users")
+def get_calibration_page(filters=None, cursor=None, limit=PAGE_SIZE):
+    """One page of calibration list rows (no signature / result data). limit=None returns every matching row"""
+    where, params = _filters_sql(filters, CALIBRATION_FILTERS, "calibration_fts")
+    return _fetch_page(CALIBRATION_LIST_SELECT, CALIBRATION_LIST_COLS, where, params, cursor, limit)
+
+@cached_query("calibration", "instruments")
+def count_calibrations(filters=None):
+    return _count_rows("calibration_full", *_filters_sql(filters, CALIBRATION_FILTERS, "calibration_fts"))
+
+SEARCH_LIMIT = 100
+
+def _search(fts_table, select_sql, cols, allowed, text, filters, limit):
+    """Best matches first (FTS5 bm25 rank), other filters applied on top"""
+    match = fts_query(text)
+    if match is None:
+        return _build_df([], cols)
+    filters = {k: v for k, v in (filters or {}).items() if k != "q"}
+    where, params = _filters_sql(filters, allowed)
+    query = select_sql + f" JOIN {fts_table} ON {fts_table}.rowid = c.id WHERE {fts_table} MATCH ?"
+    if where:
+        query += " AND " + " AND ".join(where)
+    query += f" ORDER BY {fts_table}.rank, c.id DESC LIMIT ?"
+
+    with db_conn() as conn:
+        c = conn.cursor()
+        c.execute(query, [match] + params + [limit])
+        rows = c.fetchall()
+    return _build_df(rows, cols)
+
+@cached_query("checklist", "users")
+def search_checklists(text, filters=None, limit=SEARCH_LIMIT):
+    """Ranked full-text search over checklist item / note"""
+    return _search("checklist_fts", CHECKLIST_LIST_SELECT, CHECKLIST_LIST_COLS, CHECKLIST_FILTERS, text, filters, limit)
+
+@cached_query("calibration", "instruments", "users")
+def search_calibrations(text, filters=None, limit=SEARCH_LIMIT):
+    """Ranked full-text search over calibration tag, description, service, calibrators and node"""
+    return _search("calibration_fts", CALIBRATION_LIST_SELECT, CALIBRATION_LIST_COLS, CALIBRATION_FILTERS, text, filters, limit)
+
+APPROVE_CHUNK = 500
+
+@writes("checklist")
+def _approve_checklists(c, checklist_ids, manager_name, approved_at, signature_data):
+    """Set-based approval: one UPDATE ... WHERE id IN (...) per chunk, signature bound once"""
+    checklist_ids = [int(i) for i in checklist_ids]
+    for i in range(0, len(checklist_ids), APPROVE_CHUNK):
+        chunk = checklist_ids[i:i + APPROVE_CHUNK]
+        placeholders = ", ".join("?" * len(chunk))
+        c.execute(f"""
+            UPDATE checklist 
+            SET approval_status = 'Approved', approved_by = ?, approved_at = ?, signature = ?
+            WHERE id IN ({placeholders})
+        """, [manager_name, approved_at, signature_data] + chunk)
+
+@writes("calibration")
+def _approve_calibration(c, calibration_id, manager_name, approved_at, signature_data):
+    c.execute("""
+        UPDATE calibration 
+        SET approval_status = 'Approved', approved_by = ?, approved_at = ?, signature = ?
+        WHERE id = ?
+    """, (manager_name, approved_at, signature_data, calibration_id))
 
 def approve_checklist_batch(checklist_ids, manager_name, signature_data):
     """Approve multiple checklist items at once"""
     try:
-        conn = get_conn()
-        c = conn.cursor()
         singapore_tz = pytz.timezone('Asia/Singapore')
         now = datetime.now(singapore_tz)
         
+        run_write(_approve_checklists, checklist_ids, manager_name, now.isoformat(), signature_data)
         for checklist_id in checklist_ids:
-            c.execute("""
-                UPDATE checklist 
-                SET approval_status = 'Approved', approved_by = ?, approved_at = ?, signature = ?
-                WHERE id = ?
-            """, (manager_name, now.isoformat(), signature_data, checklist_id))
-        
-        conn.commit()
-        conn.close()
+            pdf_cache.invalidate("checklist", checklist_id)
         return True
     except Exception as e:
         st.error(f"❌ Error approve batch: {e}")
@@ -656,19 +1966,11 @@ def approve_checklist_batch(checklist_ids, manager_name, signature_data):
 
 def approve_checklist(checklist_id, manager_name, signature_data):
     try:
-        conn = get_conn()
-        c = conn.cursor()
         singapore_tz = pytz.timezone('Asia/Singapore')
         now = datetime.now(singapore_tz)
         
-        c.execute("""
-            UPDATE checklist 
-            SET approval_status = 'Approved', approved_by = ?, approved_at = ?, signature = ?
-            WHERE id = ?
-        """, (manager_name, now.isoformat(), signature_data, checklist_id))
-        
-        conn.commit()
-        conn.close()
+        run_write(_approve_checklists, [checklist_id], manager_name, now.isoformat(), signature_data)
+        pdf_cache.invalidate("checklist", checklist_id)
         return True
     except Exception as e:
         st.error(f"❌ Error approve: {e}")
@@ -676,24 +1978,566 @@ def approve_checklist(checklist_id, manager_name, signature_data):
 
 def approve_calibration(calibration_id, manager_name, signature_data):
     try:
-        conn = get_conn()
-        c = conn.cursor()
         singapore_tz = pytz.timezone('Asia/Singapore')
         now = datetime.now(singapore_tz)
         
-        c.execute("""
-            UPDATE calibration 
-            SET approval_status = 'Approved', approved_by = ?, approved_at = ?, signature = ?
-            WHERE id = ?
-        """, (manager_name, now.isoformat(), signature_data, calibration_id))
-        
-        conn.commit()
-        conn.close()
+        run_write(_approve_calibration, calibration_id, manager_name, now.isoformat(), signature_data)
+        pdf_cache.invalidate("calibration", calibration_id)
         return True
     except Exception as e:
         st.error(f"❌ Error approve: {e}")
         return False
 
+# ---------------------------
+# CALIBRATION ENGINE
+# ---------------------------
+DEFAULT_REJECT_ERROR = 1.0  # % of span, sesuai teks "Reject if Error > 1% of span" di PDF
+ERROR_DECIMALS = 2
+
+_RANGE_RE = re.compile(r"([-+]?\d+(?:[.,]\d+)?)\s*(?:to|s/d|-|–|~|\.\.)\s*([-+]?\d+(?:[.,]\d+)?)", re.IGNORECASE)
+
+def parse_range(text):
+    """'4 to 20 mA' / '0-10 bar' / '-1 to 1' -> (low, high); (nan, nan) if it can't be read"""
+    match = _RANGE_RE.search(str(text or ""))
+    if not match:
+        return np.nan, np.nan
+    return tuple(float(v.replace(",", ".")) for v in match.groups())
+
+def _reject_threshold(calibrations):
+    """Reject if Error (% of span) per calibration, DEFAULT_REJECT_ERROR where it is empty"""
+    return calibrations['reject_error_value'].map(_point_value).fillna(DEFAULT_REJECT_ERROR).astype(float)
+
+def evaluate_points(points, calibrations, zero_is_empty=False):
+    """Vectorized % of span errors and pass/fail for many calibrations at once.
+
+    points: calibration_points rows (calibration_id, seq, percent, nominal_output, as_found, as_left, ...).
+    calibrations: DataFrame indexed by calibration id with range_out and reject_error_value.
+    Empty readings (NaN) get no error. zero_is_empty: also treat a 0 reading as empty where the nominal
+    output isn't 0, for stored history saved when the form defaulted readings to 0.00.
+    Returns (points with found_error / left_error recomputed,
+             per-calibration DataFrame with max errors and status_as_found / status_as_left)."""
+    points = points.copy()
+    ranges = calibrations['range_out'].map(parse_range)
+    low = ranges.map(lambda r: r[0]).astype(float)
+    high = ranges.map(lambda r: r[1]).astype(float)
+    threshold = _reject_threshold(calibrations)
+
+    ids = points['calibration_id'].to_numpy()
+    lo = low.reindex(ids).to_numpy()
+    span = high.reindex(ids).to_numpy() - lo
+    span[span == 0] = np.nan
+    nominal = points['nominal_output'].to_numpy(dtype=float)
+    # Nominal output kosong -> turunkan dari % titik ukur
+    nominal = np.where(np.isnan(nominal), lo + points['percent'].to_numpy(dtype=float) / 100.0 * span, nominal)
+
+    for reading, error in (("as_found", "found_error"), ("as_left", "left_error")):
+        values = points[reading].to_numpy(dtype=float)
+        if zero_is_empty:
+            # Tiap bacaan dinilai sendiri: A.s Found terukur tetap dihitung walau A.s Left masih default
+            values = np.where((values == 0) & (nominal != 0), np.nan, values)
+        points[error] = np.round((values - nominal) / span * 100.0, ERROR_DECIMALS)
+
+    summary = pd.DataFrame(index=calibrations.index)
+    for error, status in (("found_error", "status_as_found"), ("left_error", "status_as_left")):
+        # NaN kalau tidak ada titik yang bisa dihitung -> status kosong
+        worst = points[error].abs().groupby(points['calibration_id']).max().reindex(summary.index).to_numpy(dtype=float)
+        summary["max_" + error] = worst
+        summary[status] = np.where(np.isnan(worst), "", np.where(worst > threshold.to_numpy(), "Fail", "Pass"))
+    return points, summary
+
+def evaluate_calibration(calibration_data):
+    """Fill the error cells the technician left empty in a new report's result table from its ranges,
+    and As Found / As Left status where it is empty. Rows are kept as typed when Range Out can't be read."""
+    rows = calibration_data.get('result_data') or []
+    points = pd.DataFrame(_calibration_point_rows(0, rows), columns=["calibration_id", "seq"] + CALIBRATION_POINT_COLS)
+    if points.empty or np.isnan(parse_range(calibration_data.get('range_out'))[0]):
+        return calibration_data
+    calibrations = pd.DataFrame({'range_out': [calibration_data.get('range_out')],
+                                 'reject_error_value': [calibration_data.get('reject_error_value')]}, index=[0])
+    points, summary = evaluate_points(points, calibrations)
+
+    data = dict(calibration_data)
+    data['result_data'] = [dict(row) for row in rows]
+    for seq, found, left in points[['seq', 'found_error', 'left_error']].itertuples(index=False):
+        for key, value in (('found_error', found), ('left_error', left)):
+            if not np.isnan(value) and str(rows[seq].get(key) or "").strip() == "":
+                data['result_data'][seq][key] = float(value)
+    for status in ('status_as_found', 'status_as_left'):
+        if not data.get(status):
+            data[status] = summary.at[0, status]
+    return data
+
+def audit_calibration_results(calibration_ids=None):
+    """Recompute errors and pass/fail for the stored history and compare with what was saved.
+    Returns one row per calibration; stored reports are not changed."""
+    with db_conn() as conn:
+        c = conn.cursor()
+        query = """
+            SELECT id, doc_no, date, id_number, range_out, reject_error_value,
+                   COALESCE(status_as_found, ''), COALESCE(status_as_left, ''), COALESCE(approval_status, 'Pending')
+            FROM calibration_full
+        """
+        params = []
+        if calibration_ids is not None:
+            params = [int(i) for i in calibration_ids]
+            query += f" WHERE id IN ({', '.join('?' * len(params)) or 'NULL'})"
+        c.execute(query + " ORDER BY id", params)
+        rows = c.fetchall()
+    calibrations = _build_df(rows, ["id", "doc_no", "date", "id_number", "range_out", "reject_error_value",
+                                    "stored_status_as_found", "stored_status_as_left", "approval_status"]).set_index("id")
+    stored = get_calibration_points(calibration_ids)
+    points, summary = evaluate_points(stored, calibrations, zero_is_empty=True)
+
+    stored_max = stored.assign(found_error=stored['found_error'].abs(), left_error=stored['left_error'].abs()) \
+        .groupby('calibration_id')[['found_error', 'left_error']].max().reindex(calibrations.index)
+    result = calibrations.drop(columns=["reject_error_value"]).join(summary)
+    result["stored_max_found_error"] = stored_max['found_error']
+    result["stored_max_left_error"] = stored_max['left_error']
+    tolerance = 10 ** -ERROR_DECIMALS
+    # Status yang tidak diisi atau "Adjust" (keputusan teknisi) tidak dihitung sebagai beda
+    status_differs = {
+        status: (result[status] != "") & ~result["stored_" + status].isin(["", "Adjust"])
+                & (result[status] != result["stored_" + status])
+        for status in ("status_as_found", "status_as_left")
+    }
+    result["mismatch"] = (
+        status_differs["status_as_found"] | status_differs["status_as_left"]
+        | ((result["max_found_error"] - result["stored_max_found_error"]).abs() > tolerance)
+        | ((result["max_left_error"] - result["stored_max_left_error"]).abs() > tolerance)
+    )
+    return result.reset_index()
+
+def calibration_audit_job(progress):
+    """Background job: audit CSV of recomputed errors / status over the whole calibration history"""
+    progress(0, 1, "Menghitung ulang...")
+    audit = audit_calibration_results()
+    if audit.empty:
+        raise ValueError("Belum ada calibration report")
+    progress(1, 1, f"{int(audit['mismatch'].sum())} dari {len(audit)} report berbeda")
+    name = f"calibration_audit_{datetime.now(pytz.timezone('Asia/Singapore')).strftime('%Y%m%d_%H%M')}.csv"
+    return name, "text/csv", audit.to_csv(index=False).encode("utf-8")
+
+DUE_HORIZON_DAYS = 90  # daftar due harian mencakup overdue + jatuh tempo dalam 90 hari
+
+def _today():
+    return datetime.now(pytz.timezone('Asia/Singapore')).date()
+
+@writes("calibration_due")
+def _refresh_due_list(c, as_of, horizon_days):
+    """Rebuild the due list for as_of from a range scan on calibration_latest.next_due_date"""
+    c.execute("SELECT 1 FROM calibration_due_runs WHERE as_of = ? AND horizon_days >= ?", (as_of, horizon_days))
+    if c.fetchone():
+        return  # sudah dibangun oleh request lain yang antre lebih dulu
+    c.execute("DELETE FROM calibration_due")
+    c.execute("DELETE FROM calibration_due_runs")
+    c.execute("""
+        INSERT INTO calibration_due (as_of, id_number, calibration_id, next_due_date, days_left)
+        SELECT ?, id_number, calibration_id, next_due_date, CAST(julianday(next_due_date) - julianday(?) AS INTEGER)
+        FROM calibration_latest
+        WHERE next_due_date IS NOT NULL AND next_due_date <= date(?, '+' || ? || ' days')
+    """, (as_of, as_of, as_of, horizon_days))
+    c.execute("INSERT INTO calibration_due_runs (as_of, horizon_days, created_at) VALUES (?, ?, ?)",
+              (as_of, horizon_days, datetime.now(pytz.timezone('Asia/Singapore')).isoformat()))
+
+def _due_list_ready(as_of, horizon_days):
+    with db_conn() as conn:
+        c = conn.cursor()
+        c.execute("SELECT 1 FROM calibration_due_runs WHERE as_of = ? AND horizon_days >= ?", (as_of, horizon_days))
+        ready = c.fetchone() is not None
+    return ready
+
+DUE_COLS = ["id_number", "calibration_id", "next_due_date", "days_left", "date", "doc_no", "equipment_name", "plant", "location"]
+
+def get_due_calibrations(days=30, as_of=None):
+    """Instruments overdue or due within `days` (latest report per Tag ID), soonest first.
+    Served from the daily precomputed list; days beyond DUE_HORIZON_DAYS fall back to a range scan."""
+    as_of = (as_of or _today()).isoformat()
+    if days <= DUE_HORIZON_DAYS and not _due_list_ready(as_of, DUE_HORIZON_DAYS):
+        run_write(_refresh_due_list, as_of, DUE_HORIZON_DAYS)
+    return _query_due_calibrations(days, as_of)
+
+@cached_query("calibration_due", "calibration_latest", "instruments")
+def _query_due_calibrations(days, as_of):
+    select = """
+        SELECT d.id_number, d.calibration_id, d.next_due_date, {days_left} as days_left, cal.date,
+               COALESCE(cal.doc_no, ''), COALESCE(cal.equipment_name, ''), COALESCE(cal.plant, ''), COALESCE(cal.location, '')
+        FROM {table} d
+        JOIN calibration_full cal ON cal.id = d.calibration_id
+    """
+    with db_conn() as conn:
+        c = conn.cursor()
+        if days <= DUE_HORIZON_DAYS:
+            c.execute(select.format(days_left="d.days_left", table="calibration_due") +
+                      " WHERE d.as_of = ? AND d.days_left <= ? ORDER BY d.next_due_date, d.id_number", (as_of, days))
+        else:
+            c.execute(select.format(days_left="CAST(julianday(d.next_due_date) - julianday(?) AS INTEGER)", table="calibration_latest") +
+                      " WHERE d.next_due_date <= date(?, '+' || ? || ' days') ORDER BY d.next_due_date, d.id_number",
+                      (as_of, as_of, days))
+        rows = c.fetchall()
+    return _build_df(rows, DUE_COLS)
+
+# ---------------------------
+# CALIBRATION DRIFT
+# ---------------------------
+DAYS_PER_YEAR = 365.25
+DAYS_PER_MONTH = DAYS_PER_YEAR / 12
+
+DRIFT_COLS = ["instrument_id", "last_calibration_id", "calibrations", "first_date", "last_date", "max_found_error",
+              "rms_found_error", "last_left_error", "drift_per_interval", "drift_per_year", "reject_error",
+              "predicted_reject_date", "recommendation"]
+DRIFT_HISTORY_COLS = ["calibration_id", "date", "max_found_error", "rms_found_error", "max_left_error",
+                      "drift", "days", "drift_per_year", "reject_error"]
+# Instrumen yang belum punya baris instrument_drift (baru, atau ada report baru sejak dihitung)
+_STALE_DRIFT = "{col} IN (SELECT i.id FROM instruments i WHERE NOT EXISTS " \
+               "(SELECT 1 FROM instrument_drift d WHERE d.instrument_id = i.id))"
+
+def _day_numbers(dates):
+    """'YYYY-MM-DD' strings -> float days since epoch (NaN if empty / invalid)"""
+    parsed = pd.to_datetime(pd.Series(dates, dtype=object), format="%Y-%m-%d", errors="coerce")
+    return ((parsed - pd.Timestamp(0)) / pd.Timedelta(days=1)).to_numpy(dtype=float)
+
+def _load_drift_data(where, params=()):
+    """Bulk load for the instruments matching `where` ({col} = instrument id column):
+    calibrations sorted by instrument and date, their points, and the due date / interval per instrument"""
+    with db_conn() as conn:
+        c = conn.cursor()
+        c.execute(f"""
+            SELECT cal.id, cal.instrument_id, cal.date, cal.range_out, cal.reject_error_value
+            FROM calibration_full cal
+            WHERE {where.format(col="cal.instrument_id")}
+            ORDER BY cal.instrument_id, cal.date, cal.id
+        """, params)
+        calibrations = _build_df(c.fetchall(), ["id", "instrument_id", "date", "range_out", "reject_error_value"],
+                                 {"id": "int64", "instrument_id": "int64"}).set_index("id")
+        cols = ["calibration_id", "seq"] + CALIBRATION_POINT_COLS
+        c.execute(f"""
+            SELECT {", ".join(f"p.{col}" for col in cols)}
+            FROM calibration_points p
+            JOIN calibration cal ON cal.id = p.calibration_id
+            WHERE {where.format(col="cal.instrument_id")}
+        """, params)
+        points = _build_df(c.fetchall(), cols, {"calibration_id": "int64", "seq": "int64"})
+        c.execute(f"""
+            SELECT i.id, l.next_due_date, l.interval_months, l.interval_days
+            FROM instruments i
+            JOIN calibration_latest l ON l.id_number = i.id_number
+            WHERE {where.format(col="i.id")}
+        """, params)
+        schedule = _build_df(c.fetchall(), ["instrument_id", "next_due_date", "interval_months", "interval_days"],
+                             {"instrument_id": "int64"}).set_index("instrument_id")
+    return calibrations, points, schedule
+
+def drift_by_calibration(calibrations, points):
+    """Error statistics per calibration and drift since the previous calibration of the same instrument.
+
+    calibrations: indexed by calibration id with instrument_id, date, range_out and reject_error_value,
+    sorted by instrument and date. Errors are recomputed in % of span (see evaluate_points); drift is the
+    worst |as found - previous as left| over points with the same seq."""
+    points, summary = evaluate_points(points, calibrations, zero_is_empty=True)
+    n = len(calibrations)
+    rows = calibrations.index.get_indexer(points['calibration_id'])
+    seq = points['seq'].to_numpy(dtype=int)
+    # Matriks calibration x titik ukur, NaN untuk titik yang tidak ada / belum diukur
+    width = int(seq.max()) + 1 if len(seq) else 1
+    found = np.full((n, width), np.nan)
+    left = np.full((n, width), np.nan)
+    found[rows, seq] = points['found_error'].to_numpy(dtype=float)
+    left[rows, seq] = points['left_error'].to_numpy(dtype=float)
+
+    measured = ~np.isnan(found)
+    count = measured.sum(axis=1)
+    square_sum = np.where(measured, found, 0.0) ** 2
+    with np.errstate(invalid="ignore", divide="ignore"):
+        rms = np.sqrt(square_sum.sum(axis=1) / count)
+
+    instrument = calibrations['instrument_id'].to_numpy()
+    day = _day_numbers(calibrations['date'])
+    current = np.flatnonzero(np.r_[False, instrument[1:] == instrument[:-1]])
+    drift = np.full(n, np.nan)
+    days = np.full(n, np.nan)
+    drift[current] = np.fmax.reduce(np.abs(found[current] - left[current - 1]), axis=1)
+    days[current] = day[current] - day[current - 1]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        per_year = np.where(days > 0, drift / days * DAYS_PER_YEAR, np.nan)
+
+    return pd.DataFrame({
+        "instrument_id": instrument,
+        "date": calibrations['date'].to_numpy(),
+        "max_found_error": summary['max_found_error'].to_numpy(dtype=float),
+        "rms_found_error": np.round(rms, ERROR_DECIMALS),
+        "max_left_error": summary['max_left_error'].to_numpy(dtype=float),
+        "drift": np.round(drift, ERROR_DECIMALS),
+        "days": days,
+        "drift_per_year": np.round(per_year, ERROR_DECIMALS),
+        "reject_error": _reject_threshold(calibrations).to_numpy(),
+        "points": count,
+        "square_sum": square_sum.sum(axis=1),
+    }, index=pd.Index(calibrations.index, name="calibration_id"))
+
+def drift_by_instrument(history, schedule):
+    """One row per instrument (DRIFT_COLS) from drift_by_calibration output.
+
+    drift_per_year is the total drift over the total measured interval time. The reject date is
+    extrapolated linearly from the last As Left error at that rate; the recommendation compares it with
+    the current due date: Shorten (reached before due), Extend (still inside after one more interval), Keep."""
+    if history.empty:
+        return _build_df([], DRIFT_COLS)
+    history = history.reset_index()
+    intervals = history[(history['days'] > 0) & history['drift'].notna()]
+    groups = history.groupby('instrument_id', sort=False)
+    last = groups.tail(1).set_index('instrument_id')
+    result = pd.DataFrame({
+        "last_calibration_id": groups['calibration_id'].max(),
+        "calibrations": groups.size(),
+        "first_date": groups['date'].first(),
+        "last_date": last['date'],
+        "max_found_error": groups['max_found_error'].max(),
+        "drift_per_interval": np.round(intervals.groupby('instrument_id')['drift'].mean(), ERROR_DECIMALS),
+        "reject_error": last['reject_error'],
+    })
+    with np.errstate(invalid="ignore", divide="ignore"):
+        result["rms_found_error"] = np.round(np.sqrt(groups['square_sum'].sum() / groups['points'].sum()), ERROR_DECIMALS)
+        interval_sums = intervals.groupby('instrument_id')[['drift', 'days']].sum().reindex(result.index)
+        rate = (interval_sums['drift'] / interval_sums['days'] * DAYS_PER_YEAR).to_numpy(dtype=float)
+    result["drift_per_year"] = np.round(rate, ERROR_DECIMALS)
+    # As Left tidak diisi -> kondisi terakhir = As Found
+    last_left = last['max_left_error'].fillna(last['max_found_error']).reindex(result.index).to_numpy(dtype=float)
+    result["last_left_error"] = last_left
+
+    last_day = _day_numbers(result['last_date'])
+    remaining = result['reject_error'].to_numpy(dtype=float) - last_left
+    with np.errstate(invalid="ignore", divide="ignore"):
+        reject_day = np.where(remaining <= 0, last_day, last_day + remaining / rate * DAYS_PER_YEAR)
+    schedule = schedule.reindex(result.index)
+    due_day = _day_numbers(schedule['next_due_date'])
+    interval = (schedule['interval_months'].astype(float).to_numpy() * DAYS_PER_MONTH
+                + schedule['interval_days'].astype(float).fillna(0).to_numpy())
+    known = ~np.isnan(reject_day) & ~np.isnan(due_day)
+    result["recommendation"] = np.select(
+        [~known, reject_day < due_day, reject_day >= due_day + np.nan_to_num(interval, nan=np.inf)],
+        ["", "Shorten", "Extend"], "Keep")
+    result["predicted_reject_date"] = [_day_to_date(day) for day in reject_day]
+    return result.rename_axis("instrument_id").reset_index()[DRIFT_COLS]
+
+_EPOCH_ORDINAL = datetime(1970, 1, 1).toordinal()
+
+def _day_to_date(day):
+    """Day number (see _day_numbers) -> 'YYYY-MM-DD'; None when unknown or beyond the calendar
+    (a near-zero drift rate predicts a reject thousands of years away)"""
+    if not np.isfinite(day):
+        return None
+    try:
+        return datetime.fromordinal(_EPOCH_ORDINAL + int(day)).strftime("%Y-%m-%d")
+    except (ValueError, OverflowError):
+        return None
+
+def compute_instrument_drift(where=_STALE_DRIFT, params=()):
+    """Drift statistics (DRIFT_COLS) for the instruments matching `where`, all calibrations loaded in bulk"""
+    calibrations, points, schedule = _load_drift_data(where, params)
+    return drift_by_instrument(drift_by_calibration(calibrations, points), schedule)
+
+def _sql_value(value):
+    """numpy / pandas scalar -> value sqlite3 can bind"""
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return None
+    if isinstance(value, np.integer):
+        return int(value)
+    if isinstance(value, np.floating):
+        return float(value)
+    return value
+
+@writes("instrument_drift")
+def _store_instrument_drift(c, rows, computed_at):
+    """Save recomputed rows; skipped for an instrument that got a new report while they were computed"""
+    c.executemany(f"""
+        INSERT OR REPLACE INTO instrument_drift ({", ".join(DRIFT_COLS)}, computed_at)
+        SELECT {", ".join("?" * (len(DRIFT_COLS) + 1))}
+        WHERE (SELECT MAX(id) FROM calibration WHERE instrument_id = ?) = ?
+    """, [row + (computed_at, row[0], row[1]) for row in rows])
+
+@cached_query("instruments", "instrument_drift")
+def _instrument_drift_stale():
+    """True while some instrument has no drift row (new instrument, or a new report since it was computed)"""
+    with db_conn() as conn:
+        c = conn.cursor()
+        c.execute("SELECT EXISTS (SELECT 1 FROM instruments i WHERE NOT EXISTS "
+                  "(SELECT 1 FROM instrument_drift d WHERE d.instrument_id = i.id))")
+        stale = bool(c.fetchone()[0])
+    return stale
+
+def refresh_instrument_drift():
+    """Recompute the instruments whose drift row is missing (everything on first use, afterwards only
+    instruments with new reports). Returns the number of instruments recomputed. Only the stale check is
+    cached, so rows a skipped or raced write left stale are picked up on the next call."""
+    if not _instrument_drift_stale():
+        return 0
+    drift = compute_instrument_drift()
+    if drift.empty:
+        return 0
+    rows = [tuple(_sql_value(v) for v in row) for row in drift.itertuples(index=False)]
+    run_write(_store_instrument_drift, rows, datetime.now(pytz.timezone('Asia/Singapore')).isoformat())
+    return len(rows)
+
+DRIFT_LIST_COLS = ["id_number", "plant", "equipment_name", "interval_cal", "next_due_date", "calibrations",
+                   "first_date", "last_date", "max_found_error", "rms_found_error", "last_left_error",
+                   "drift_per_interval", "drift_per_year", "reject_error", "predicted_reject_date", "recommendation"]
+
+def get_instrument_drift(plant=None, id_number=None):
+    """Drift statistics per instrument (optionally for one plant / Tag ID), earliest predicted reject first"""
+    refresh_instrument_drift()
+    return _query_instrument_drift(plant, id_number)
+
+@cached_query("instrument_drift", "instruments", "calibration_latest")
+def _query_instrument_drift(plant, id_number):
+    where, params = [], []
+    if plant:
+        where.append("i.plant = ?")
+        params.append(plant)
+    if id_number:
+        where.append("i.id_number = ?")
+        params.append(str(id_number).strip())
+    with db_conn() as conn:
+        c = conn.cursor()
+        c.execute(f"""
+            SELECT i.id_number, COALESCE(i.plant, ''), COALESCE(i.equipment_name, ''), COALESCE(i.interval_cal, ''),
+                   l.next_due_date, d.calibrations, d.first_date, d.last_date, d.max_found_error, d.rms_found_error,
+                   d.last_left_error, d.drift_per_interval, d.drift_per_year, d.reject_error, d.predicted_reject_date,
+                   COALESCE(d.recommendation, '')
+            FROM instrument_drift d
+            JOIN instruments i ON i.id = d.instrument_id
+            LEFT JOIN calibration_latest l ON l.id_number = i.id_number
+            {"WHERE " + " AND ".join(where) if where else ""}
+            ORDER BY d.predicted_reject_date IS NULL, d.predicted_reject_date, i.id_number
+        """, params)
+        rows = c.fetchall()
+    return _build_df(rows, DRIFT_LIST_COLS)
+
+@cached_query("calibration", "calibration_points", "instruments")
+def get_drift_history(id_number):
+    """Per-calibration errors and drift (DRIFT_HISTORY_COLS) of one instrument, oldest first"""
+    calibrations, points, _ = _load_drift_data("{col} = (SELECT id FROM instruments WHERE id_number = ?)",
+                                               (str(id_number or "").strip(),))
+    return drift_by_calibration(calibrations, points).reset_index()[DRIFT_HISTORY_COLS]
+
+# ---------------------------
+# CHECKLIST DASHBOARD
+# ---------------------------
+DASHBOARD_DIMENSIONS = ("machine", "sub_area", "item", "shift", "week")
+CONDITION_STATS_COLS = list(CHECKLIST_ROLLUP_COUNTS) + ["minor_bad_rate", "ng_rate"]
+
+@cached_query("checklist_weekly")
+def get_checklist_condition_stats(by, start, end):
+    """Good/Minor/Bad/NG counts and rates (%) from checklist_weekly for the weeks of start..end,
+    grouped by one of DASHBOARD_DIMENSIONS, or one row for the whole period when by is None.
+    ng_rate is over rows with component details only."""
+    if by and by not in DASHBOARD_DIMENSIONS:
+        raise ValueError(f"Unknown dimension: {by}")
+    query = f"""
+        SELECT {f"{by}, " if by else ""}
+               {", ".join(f"COALESCE(SUM({col}), 0)" for col in CHECKLIST_ROLLUP_COUNTS)},
+               ROUND(100.0 * SUM(minor + bad) / SUM(total), 1),
+               ROUND(100.0 * SUM(ng) / NULLIF(SUM(detail_checks), 0), 1)
+        FROM checklist_weekly
+        WHERE week BETWEEN ? AND ?
+    """
+    if by:
+        query += f" GROUP BY {by} ORDER BY {'1' if by == 'week' else 'SUM(minor + bad) * 1.0 / SUM(total) DESC, 1'}"
+    with db_conn() as conn:
+        c = conn.cursor()
+        c.execute(query, (week_start(start), week_start(end)))
+        rows = c.fetchall()
+    return _build_df(rows, ([by] if by else []) + CONDITION_STATS_COLS)
+
+COMPONENT_STATS_COLS = ["component", "checks", "ok", "ng", "ng_rate"]
+
+@cached_query("checklist_component_daily")
+def get_checklist_component_stats(start, end, machine=None):
+    """OK / NG per details component for start..end (inclusive) from checklist_component_daily, worst first"""
+    where, params = ["date BETWEEN ? AND ?"], [str(start), str(end)]
+    if machine:
+        where.append("machine = ?")
+        params.append(machine)
+    with db_conn() as conn:
+        c = conn.cursor()
+        c.execute(f"""
+            SELECT component, SUM(ok + ng), SUM(ok), SUM(ng), ROUND(100.0 * SUM(ng) / NULLIF(SUM(ok + ng), 0), 1) AS ng_rate
+            FROM checklist_component_daily
+            WHERE {" AND ".join(where)}
+            GROUP BY component
+            ORDER BY ng_rate DESC, component
+        """, params)
+        rows = c.fetchall()
+    return _build_df(rows, COMPONENT_STATS_COLS)
+
+# (batas umur dalam hari, label); umur = hari sejak tanggal report
+BACKLOG_BUCKETS = [(1, "0-1 hari"), (7, "2-7 hari"), (30, "8-30 hari"), (None, "> 30 hari")]
+BACKLOG_COLS = ["report", "age", "pending", "oldest_submitted"]
+
+@cached_query("checklist", "calibration")
+def get_approval_backlog(as_of):
+    """Pending approvals per age bucket for checklist items and calibration reports. Age counts from
+    submission (local date of created_at; report date for legacy rows without it), not the report date."""
+    bucket = "CASE " + " ".join(f"WHEN age <= {limit} THEN {i}" for i, (limit, _) in enumerate(BACKLOG_BUCKETS) if limit is not None) \
+             + f" ELSE {len(BACKLOG_BUCKETS) - 1} END"
+    with db_conn() as conn:
+        c = conn.cursor()
+        rows = []
+        for report, table in (("Checklist", "checklist"), ("Calibration", "calibration")):
+            # created_at disimpan ISO dengan offset Asia/Singapore: 10 karakter pertama = tanggal lokal
+            c.execute(f"""
+                SELECT {bucket} AS bucket, COUNT(*), MIN(submitted)
+                FROM (SELECT CAST(julianday(?) - julianday(submitted) AS INTEGER) AS age, submitted
+                      FROM (SELECT COALESCE(NULLIF(substr(created_at, 1, 10), ''), date) AS submitted
+                            FROM {table} WHERE approval_status = 'Pending'))
+                GROUP BY bucket ORDER BY bucket
+            """, (str(as_of),))
+            rows.extend((report, BACKLOG_BUCKETS[b][1], count, oldest) for b, count, oldest in c.fetchall())
+    return _build_df(rows, BACKLOG_COLS)
+
+# ---------------------------
+# PDF IMAGES
+# ---------------------------
+PDF_IMAGE_CACHE_SIZE = 128
+
+_pdf_image_cache = _process_singleton("pdf_image_cache", OrderedDict)  # sha256 -> FPDF image info
+_pdf_image_lock = _process_singleton("pdf_image_lock", threading.Lock)
+
+def _decode_pdf_image(data):
+    """Turn image bytes into an FPDF image info dict: JPEG is embedded as-is (DCTDecode),
+    other formats are flattened on white and embedded as Flate-compressed RGB"""
+    img = Image.open(BytesIO(data))
+    if img.format == 'JPEG' and img.mode in ('RGB', 'L', 'CMYK'):
+        colorspace = {'RGB': 'DeviceRGB', 'L': 'DeviceGray', 'CMYK': 'DeviceCMYK'}[img.mode]
+        return {'w': img.width, 'h': img.height, 'cs': colorspace, 'bpc': 8, 'f': 'DCTDecode', 'data': data}
+
+    # Tanda tangan PNG biasanya transparan -> tempel di atas background putih
+    img = img.convert('RGBA')
+    flat = Image.new('RGB', img.size, (255, 255, 255))
+    flat.paste(img, mask=img.getchannel('A'))
+    return {'w': flat.width, 'h': flat.height, 'cs': 'DeviceRGB', 'bpc': 8, 'f': 'FlateDecode',
+            'data': zlib.compress(flat.tobytes())}
+
+def pdf_image(pdf, data, x, y, w=0, h=0):
+    """pdf.image() for in-memory bytes: no temp file, decoded once per content hash"""
+    key = hashlib.sha256(data).hexdigest()
+    with _pdf_image_lock:
+        info = _pdf_image_cache.get(key)
+        if info is not None:
+            _pdf_image_cache.move_to_end(key)
+    if info is None:
+        info = _decode_pdf_image(data)
+        with _pdf_image_lock:
+            _pdf_image_cache[key] = info
+            while len(_pdf_image_cache) > PDF_IMAGE_CACHE_SIZE:
+                _pdf_image_cache.popitem(last=False)
+
+    # FPDF memakai pdf.images[name] apa adanya jika sudah terdaftar, jadi file tidak pernah dibuka.
+    # Salin dict-nya karena FPDF menambahkan/menghapus key saat output.
+    name = f"mem:{key}"
+    if name not in pdf.images:
+        pdf.images[name] = dict(info, i=len(pdf.images) + 1)
+    pdf.image(name, x=x, y=y, w=w, h=h)
+
 # ---------------------------
 # PDF GENERATOR
 # ---------------------------
@@ -806,13 +2650,10 @@ def generate_pdf_wrapping_rewinder(df_records, date, shift, user_name):
                 pdf.ln(6)
                 
                 try:
-                    with tempfile.NamedTemporaryFile(delete=False, suffix=".png", mode='wb') as tmp:
-                        tmp.write(signature_data)
-                        tmp.flush()
-                        current_x = pdf.get_x()
-                        current_y = pdf.get_y()
-                        pdf.image(tmp.name, x=current_x + 5, y=current_y, w=50, h=20)
-                        pdf.ln(22)
+                    current_x = pdf.get_x()
+                    current_y = pdf.get_y()
+                    pdf_image(pdf, signature_data, x=current_x + 5, y=current_y, w=50, h=20)
+                    pdf.ln(22)
                 except:
                     pass
     
@@ -935,15 +2776,12 @@ def generate_pdf(record, title):
         
         if signature_data and isinstance(signature_data, bytes) and len(signature_data) > 0:
             try:
-                with tempfile.NamedTemporaryFile(delete=False, suffix=".png", mode='wb') as tmp:
-                    tmp.write(signature_data)
-                    tmp.flush()
-                    current_x = pdf.get_x()
-                    current_y = pdf.get_y()
-                    pdf.image(tmp.name, x=current_x + 10, y=current_y, w=60, h=25)
-                    pdf.ln(28)
-                    pdf.set_draw_color(0, 0, 0)
-                    pdf.line(current_x + 10, current_y + 25, current_x + 70, current_y + 25)
+                current_x = pdf.get_x()
+                current_y = pdf.get_y()
+                pdf_image(pdf, signature_data, x=current_x + 10, y=current_y, w=60, h=25)
+                pdf.ln(28)
+                pdf.set_draw_color(0, 0, 0)
+                pdf.line(current_x + 10, current_y + 25, current_x + 70, current_y + 25)
             except:
                 pdf.set_font("Arial", "I", 8)
                 pdf.cell(0, 6, "[Signature not available]", align='L')
@@ -967,23 +2805,17 @@ def generate_pdf(record, title):
 
         if record.get("image_before"):
             try:
-                with tempfile.NamedTemporaryFile(delete=False, suffix=".jpg") as tmp:
-                    tmp.write(record["image_before"])
-                    tmp.flush()
-                    pdf.image(tmp.name, x=30, y=y_pos, w=img_w, h=img_h)
-                    pdf.set_font("Arial", "B", 10)
-                    pdf.text(x=65, y=y_pos + img_h + 4, txt="Before")
+                pdf_image(pdf, record["image_before"], x=30, y=y_pos, w=img_w, h=img_h)
+                pdf.set_font("Arial", "B", 10)
+                pdf.text(x=65, y=y_pos + img_h + 4, txt="Before")
             except:
                 pass
 
         if record.get("image_after"):
             try:
-                with tempfile.NamedTemporaryFile(delete=False, suffix=".jpg") as tmp:
-                    tmp.write(record["image_after"])
-                    tmp.flush()
-                    pdf.image(tmp.name, x=150, y=y_pos, w=img_w, h=img_h)
-                    pdf.set_font("Arial", "B", 10)
-                    pdf.text(x=185, y=y_pos + img_h + 4, txt="After")
+                pdf_image(pdf, record["image_after"], x=150, y=y_pos, w=img_w, h=img_h)
+                pdf.set_font("Arial", "B", 10)
+                pdf.text(x=185, y=y_pos + img_h + 4, txt="After")
             except:
                 pass
 
@@ -992,6 +2824,14 @@ def generate_pdf(record, title):
     except:
         return pdf.output(dest="S").encode("latin-1", errors="ignore")
 
+def _fmt_point(value, spec):
+    """Result table cell for the PDF: text exactly as entered, numbers formatted with spec"""
+    if isinstance(value, str):
+        return value.strip()
+    if value is None or pd.isna(value):
+        return ""
+    return format(value, spec)
+
 def generate_calibration_pdf(record):
     """Generate detailed calibration PDF matching the screenshot format"""
     pdf = FPDF(orientation="P", unit="mm", format="A4")
@@ -1134,12 +2974,7 @@ def generate_calibration_pdf(record):
     pdf.set_font("Arial", "", 8)
     pdf.set_fill_color(173, 216, 230)  # Light blue for data cells
     
-    try:
-        result_data = json.loads(record.get('result_data', '[]'))
-        if not result_data:
-            result_data = []
-    except:
-        result_data = []
+    result_data = record.get('points') or []
     
     # If no data, create empty rows
     if not result_data:
@@ -1149,13 +2984,13 @@ def generate_calibration_pdf(record):
             pdf.ln()
     else:
         for row in result_data:
-            pdf.cell(col_widths[0], 5, str(row.get('percent', '')), border=1, align='C', fill=True)
-            pdf.cell(col_widths[1], 5, str(row.get('nominal_bar', '')), border=1, align='C', fill=True)
-            pdf.cell(col_widths[2], 5, str(row.get('nominal_output', '')), border=1, align='C', fill=True)
-            pdf.cell(col_widths[3], 5, str(row.get('as_found', '')), border=1, align='C', fill=True)
-            pdf.cell(col_widths[4], 5, str(row.get('as_left', '')), border=1, align='C', fill=True)
-            pdf.cell(col_widths[5], 5, str(row.get('found_error', '')), border=1, align='C', fill=True)
-            pdf.cell(col_widths[6], 5, str(row.get('left_error', '')), border=1, align='C', fill=True)
+            pdf.cell(col_widths[0], 5, _fmt_point(row.get('percent'), "g"), border=1, align='C', fill=True)
+            pdf.cell(col_widths[1], 5, _fmt_point(row.get('nominal_input'), "g"), border=1, align='C', fill=True)
+            pdf.cell(col_widths[2], 5, _fmt_point(row.get('nominal_output'), ".2f"), border=1, align='C', fill=True)
+            pdf.cell(col_widths[3], 5, _fmt_point(row.get('as_found'), ".2f"), border=1, align='C', fill=True)
+            pdf.cell(col_widths[4], 5, _fmt_point(row.get('as_left'), ".2f"), border=1, align='C', fill=True)
+            pdf.cell(col_widths[5], 5, _fmt_point(row.get('found_error'), ".2f"), border=1, align='C', fill=True)
+            pdf.cell(col_widths[6], 5, _fmt_point(row.get('left_error'), ".2f"), border=1, align='C', fill=True)
             pdf.ln()
     
     pdf.ln(3)
@@ -1247,13 +3082,10 @@ def generate_calibration_pdf(record):
             pdf.ln(8)
             
             try:
-                with tempfile.NamedTemporaryFile(delete=False, suffix=".png", mode='wb') as tmp:
-                    tmp.write(signature_data)
-                    tmp.flush()
-                    current_x = pdf.get_x()
-                    current_y = pdf.get_y()
-                    pdf.image(tmp.name, x=current_x + 10, y=current_y, w=60, h=25)
-                    pdf.ln(28)
+                current_x = pdf.get_x()
+                current_y = pdf.get_y()
+                pdf_image(pdf, signature_data, x=current_x + 10, y=current_y, w=60, h=25)
+                pdf.ln(28)
             except:
                 pass
     
@@ -1262,10 +3094,660 @@ def generate_calibration_pdf(record):
     except:
         return pdf.output(dest="S").encode("latin-1", errors="ignore")
 
+# ---------------------------
+# PDF CACHE
+# ---------------------------
+PDF_CACHE_MAX_BYTES = 64 * 1024 * 1024
+PDF_CACHE_DIR = os.environ.get("PDF_CACHE_DIR")  # opsional: tier disk, kosong = hanya memory
+PDF_LAYOUT_VERSION = 3  # naikkan jika layout PDF berubah supaya cache disk lama tidak dipakai
+
+class PdfCache:
+    """Rendered PDFs keyed by (kind, record key) + content version.
+    In-memory LRU bounded by total bytes, with an optional on-disk tier."""
+
+    def __init__(self, max_bytes, cache_dir=None):
+        self.max_bytes = max_bytes
+        self.cache_dir = cache_dir
+        self.entries = OrderedDict()  # (kind, key) -> (version, pdf_bytes)
+        self.size = 0
+        self.lock = threading.Lock()
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def _disk_path(self, kind, key, version=None):
+        name = f"{kind}_{hashlib.sha256(str(key).encode()).hexdigest()[:16]}_"
+        return os.path.join(self.cache_dir, name + (f"{version}.pdf" if version else "*.pdf"))
+
+    def _put(self, kind, key, version, data):
+        with self.lock:
+            old = self.entries.pop((kind, key), None)
+            if old:
+                self.size -= len(old[1])
+            self.entries[(kind, key)] = (version, data)
+            self.size += len(data)
+            while self.size > self.max_bytes and len(self.entries) > 1:
+                _, (_, evicted) = self.entries.popitem(last=False)
+                self.size -= len(evicted)
+
+    def get_or_build(self, kind, key, version, build):
+        """Return cached PDF bytes for this version, otherwise build(), store and return it"""
+        version = f"{PDF_LAYOUT_VERSION}-{version}"
+        with self.lock:
+            entry = self.entries.get((kind, key))
+            if entry and entry[0] == version:
+                self.entries.move_to_end((kind, key))
+                return entry[1]
+
+        if self.cache_dir:
+            path = self._disk_path(kind, key, version)
+            if os.path.exists(path):
+                with open(path, 'rb') as f:
+                    data = f.read()
+                self._put(kind, key, version, data)
+                return data
+
+        data = build()
+        self._put(kind, key, version, data)
+        if self.cache_dir:
+            self._remove_disk(kind, key)
+            tmp_path = path + ".tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        return data
+
+    def _remove_disk(self, kind, key):
+        for path in glob.glob(self._disk_path(kind, key)):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def invalidate(self, kind, key):
+        with self.lock:
+            old = self.entries.pop((kind, key), None)
+            if old:
+                self.size -= len(old[1])
+        if self.cache_dir:
+            self._remove_disk(kind, key)
+
+pdf_cache = _process_singleton("pdf_cache", lambda: PdfCache(PDF_CACHE_MAX_BYTES, PDF_CACHE_DIR))
+
+def pdf_version(rows):
+    """Content version of the list rows behind a PDF: every listed field is hashed (approval, input_by,
+    details, photo refs, equipment data), so any change the PDF would show gives a new version"""
+    parts = [json.dumps({k: str(v) for k, v in dict(r).items()}, sort_keys=True) for r in rows]
+    return hashlib.sha256("|".join(parts).encode()).hexdigest()[:16]
+
+# ---------------------------
+# BULK EXPORT
+# ---------------------------
+EXPORT_WORKERS = max(1, min(4, os.cpu_count() or 1))
+EXPORT_ID_CHUNK = 500
+EXPORT_MAP_CHUNK = 8
+EXPORT_RENDER_BATCH = EXPORT_WORKERS * EXPORT_MAP_CHUNK * 4  # item yang sedang dirender sekaligus
+
+def _safe_file_name(text):
+    return re.sub(r'[^A-Za-z0-9._-]+', '_', str(text)).strip('_') or 'report'
+
+def _is_wrapping_rewinder(df):
+    return (df['machine'] == 'Papper Machine 1') & (df['sub_area'] == 'WRAPPING & REWINDER')
+
+def plan_export(date_from, date_to, include_checklists=True, include_calibrations=True, filters=None):
+    """List every report in the date range as a light (kind, file_name, ids) entry; nothing is loaded yet.
+    Extra filters (e.g. approval_status, user_id) are applied to both report types."""
+    filters = {k: v for k, v in (filters or {}).items() if v not in (None, "")}
+    plan = []
+    if include_checklists:
+        df, _ = get_checklist_page(dict(filters, date_from=date_from, date_to=date_to), limit=None)
+        if not df.empty:
+            wrapping = _is_wrapping_rewinder(df)
+            for (date, shift), session in df[wrapping].groupby(['date', 'shift'], sort=True):
+                plan.append(("wrapping_rewinder", _safe_file_name(f"wrapping_rewinder_{date}_{shift}") + ".pdf",
+                             session['id'].tolist()))
+            for checklist_id in df[~wrapping]['id'].tolist():
+                plan.append(("checklist", f"checklist_{checklist_id}.pdf", [checklist_id]))
+    if include_calibrations:
+        cal_filters = {k: v for k, v in filters.items() if k in CALIBRATION_FILTERS}
+        df, _ = get_calibration_page(dict(cal_filters, date_from=date_from, date_to=date_to), limit=None)
+        for calibration_id, doc_no in zip(df['id'].tolist(), df['doc_no'].tolist()):
+            plan.append(("calibration", _safe_file_name(f"calibration_{calibration_id}_{doc_no or ''}") + ".pdf",
+                         [calibration_id]))
+    return plan
+
+def _chunks(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def _plan_batches(plan):
+    """Consecutive plan entries holding about EXPORT_ID_CHUNK reports together"""
+    batch, size = [], 0
+    for entry in plan:
+        batch.append(entry)
+        size += len(entry[2])
+        if size >= EXPORT_ID_CHUNK:
+            yield batch
+            batch, size = [], 0
+    if batch:
+        yield batch
+
+def iter_export_items(plan):
+    """Yield the (kind, file_name, payload) render items of an export plan. Records (with photos) are
+    loaded EXPORT_ID_CHUNK at a time, so only one batch is in memory while it is being rendered."""
+    for batch in _plan_batches(plan):
+        checklist_ids = [i for kind, _, ids in batch if kind != "calibration" for i in ids]
+        calibration_ids = [i for kind, _, ids in batch if kind == "calibration" for i in ids]
+        records = {("checklist", rec['id']): rec for rec in get_checklist_records(checklist_ids).to_dict('records')}
+        records.update({("calibration", rec['id']): rec for rec in get_calibration_records(calibration_ids)})
+        for kind, file_name, ids in batch:
+            # Report yang dihapus setelah plan dibuat dilewati
+            found = [records[key] for key in ((kind if kind == "calibration" else "checklist", i) for i in ids) if key in records]
+            if not found:
+                continue
+            if kind == "wrapping_rewinder":
+                yield kind, file_name, (found, found[0]['date'], found[0]['shift'], found[0].get('input_by', 'N/A'))
+            else:
+                yield kind, file_name, found[0]
+
+def _render_export_item(item):
+    """Render one export item with the normal PDF generators (runs in a worker process)"""
+    kind, file_name, payload = item
+    if kind == "wrapping_rewinder":
+        records, date, shift, user_name = payload
+        return file_name, generate_pdf_wrapping_rewinder(pd.DataFrame(records), date, shift, user_name)
+    if kind == "checklist":
+        return file_name, generate_pdf(payload, "Checklist Maintenance")
+    return file_name, generate_calibration_pdf(payload)
+
+class StreamingPdfMerger:
+    """Concatenate PDFs into a binary file page by page. Each appended PDF's objects are written out
+    right away with new object numbers; only their offsets and the page references stay in memory
+    (pypdf's PdfWriter keeps the whole merged document until write())."""
+
+    def __init__(self, out):
+        self.out = out
+        self.start = out.tell()
+        self.offsets = [None]  # nomor object -> offset di file
+        self.page_refs = []
+        self.pages_num = self._reserve()
+        out.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+
+    def _reserve(self):
+        self.offsets.append(None)
+        return len(self.offsets) - 1
+
+    def _write(self, num, obj):
+        self.offsets[num] = self.out.tell() - self.start
+        self.out.write(f"{num} 0 obj\n".encode())
+        obj.write_to_stream(self.out)
+        self.out.write(b"\nendobj\n")
+
+    def append(self, pdf_bytes):
+        from pypdf import PdfReader
+        from pypdf.generic import ArrayObject, DictionaryObject, IndirectObject, NameObject
+
+        numbers, pending = {}, []
+
+        def ref(indirect):
+            key = (indirect.idnum, indirect.generation)
+            if key not in numbers:
+                numbers[key] = self._reserve()
+                pending.append(indirect)
+            return IndirectObject(numbers[key], 0, None)
+
+        def renumber(obj):
+            # Ubah referensi di tempat: reader hanya dipakai untuk PDF ini lalu dibuang
+            if isinstance(obj, DictionaryObject):
+                for key, value in list(obj.items()):
+                    obj[key] = ref(value) if isinstance(value, IndirectObject) else renumber(value)
+            elif isinstance(obj, ArrayObject):
+                for i, value in enumerate(obj):
+                    obj[i] = ref(value) if isinstance(value, IndirectObject) else renumber(value)
+            return obj
+
+        reader = PdfReader(BytesIO(pdf_bytes))
+        pages = list(reader.pages)
+        # Nomor page disiapkan dulu supaya referensi ke page (mis. dari annotation) ikut dipetakan
+        for page in pages:
+            num = numbers[(page.indirect_reference.idnum, page.indirect_reference.generation)] = self._reserve()
+            self.page_refs.append(IndirectObject(num, 0, None))
+        for page, page_ref in zip(pages, self.page_refs[-len(pages):]):
+            # reader.pages sudah berisi atribut warisan dari page tree (Resources, MediaBox)
+            del page[NameObject("/Parent")]
+            renumber(page)
+            page[NameObject("/Parent")] = IndirectObject(self.pages_num, 0, None)
+            self._write(page_ref.idnum, page)
+        while pending:
+            indirect = pending.pop()
+            self._write(numbers[(indirect.idnum, indirect.generation)], renumber(indirect.get_object()))
+
+    def close(self):
+        """Write the page tree, catalog, xref table and trailer"""
+        from pypdf.generic import ArrayObject, DictionaryObject, NameObject, NumberObject, IndirectObject
+
+        self._write(self.pages_num, DictionaryObject({
+            NameObject("/Type"): NameObject("/Pages"),
+            NameObject("/Kids"): ArrayObject(self.page_refs),
+            NameObject("/Count"): NumberObject(len(self.page_refs)),
+        }))
+        catalog_num = self._reserve()
+        self._write(catalog_num, DictionaryObject({
+            NameObject("/Type"): NameObject("/Catalog"),
+            NameObject("/Pages"): IndirectObject(self.pages_num, 0, None),
+        }))
+        xref = self.out.tell() - self.start
+        self.out.write(f"xref\n0 {len(self.offsets)}\n0000000000 65535 f\r\n".encode())
+        for offset in self.offsets[1:]:
+            self.out.write(f"{offset:010d} 00000 n\r\n".encode())
+        self.out.write(f"trailer\n<< /Size {len(self.offsets)} /Root {catalog_num} 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode())
+
+def render_export(items, out, fmt="zip", total=None, progress=None):
+    """Render items across a process pool and write them to the binary file `out` as one ZIP or one
+    merged PDF, both written as reports finish. items may be a generator (see iter_export_items);
+    it is consumed EXPORT_RENDER_BATCH items at a time. progress(done, total) is called as reports finish."""
+    merged = StreamingPdfMerger(out) if fmt == "pdf" else zipfile.ZipFile(out, 'w', zipfile.ZIP_DEFLATED)
+    try:
+        done = 0
+        # spawn: worker fork dari proses Streamlit ikut mewarisi thread & lock yang sedang dipegang
+        with ProcessPoolExecutor(max_workers=EXPORT_WORKERS, mp_context=multiprocessing.get_context("spawn")) as pool:
+            # pool.map mengirim seluruh iterable sekaligus, jadi item diberikan per batch
+            for batch in _chunks(items, EXPORT_RENDER_BATCH):
+                for file_name, pdf_bytes in pool.map(export_worker.render_export_item, batch, chunksize=EXPORT_MAP_CHUNK):
+                    if fmt == "pdf":
+                        merged.append(pdf_bytes)
+                    else:
+                        merged.writestr(file_name, pdf_bytes)
+                    done += 1
+                    if progress:
+                        progress(done, total)
+    finally:
+        merged.close()
+
+# ---------------------------
+# BACKGROUND JOBS
+# ---------------------------
+JOB_WORKERS = 2
+JOB_PROGRESS_INTERVAL = 0.5  # detik, batas frekuensi update progress ke DB
+JOB_HEARTBEAT_INTERVAL = 30  # detik, runner menandai job-nya masih hidup
+JOB_HEARTBEAT_TIMEOUT = 120  # detik tanpa heartbeat = runner dianggap mati
+JOB_RESULT_CHUNK = 1024 * 1024
+JOB_RESULT_RETENTION_DAYS = 7  # hasil job lebih tua dari ini dihapus dari DB (status 'expired')
+JOB_COLS = ["id", "kind", "user_id", "status", "progress", "message", "created_at", "started_at",
+            "finished_at", "result_name", "result_mime", "error"]
+
+def _now_iso():
+    return datetime.now(pytz.timezone('Asia/Singapore')).isoformat()
+
+@writes("jobs")
+def _insert_job(c, kind, user_id, created_at, runner):
+    c.execute("INSERT INTO jobs (kind, user_id, status, created_at, runner, heartbeat_at) VALUES (?, ?, 'queued', ?, ?, ?)",
+              (kind, user_id, created_at, runner, created_at))
+    return c.lastrowid
+
+@writes("jobs")
+def _update_job(c, job_id, **fields):
+    assignments = ", ".join(f"{name} = ?" for name in fields)
+    c.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", list(fields.values()) + [job_id])
+
+@writes("jobs")
+def _finish_job(c, job_id, finished_at, result_name, result_mime, result):
+    """Mark a job done with its result: bytes, or a binary file that is copied into the BLOB in chunks.
+    Results older than JOB_RESULT_RETENTION_DAYS are dropped in the same transaction."""
+    cutoff = (datetime.fromisoformat(finished_at) - timedelta(days=JOB_RESULT_RETENTION_DAYS)).isoformat()
+    c.execute("UPDATE jobs SET status = 'expired', result = NULL WHERE status = 'done' AND finished_at < ?", (cutoff,))
+    if isinstance(result, (bytes, bytearray)):
+        c.execute("""UPDATE jobs SET status = 'done', progress = 1.0, finished_at = ?, result = ?,
+                     result_name = ?, result_mime = ? WHERE id = ?""",
+                  (finished_at, result, result_name, result_mime, job_id))
+        return
+    size = result.seek(0, os.SEEK_END)
+    result.seek(0)
+    c.execute("""UPDATE jobs SET status = 'done', progress = 1.0, finished_at = ?, result = zeroblob(?),
+                 result_name = ?, result_mime = ? WHERE id = ?""",
+              (finished_at, size, result_name, result_mime, job_id))
+    with c.connection.blobopen("jobs", "result", job_id) as blob:
+        for chunk in iter(lambda: result.read(JOB_RESULT_CHUNK), b""):
+            blob.write(chunk)
+
+def _job_runner_alive(runner, own_runners, heartbeat_at, cutoff):
+    """Runner ids are "pid:token". Our own pid with an unknown token is a previous process (pid reused
+    after a restart); another runner counts as alive while it keeps the heartbeat of its jobs fresh."""
+    if runner in own_runners:
+        return True
+    if runner.split(":")[0] == str(os.getpid()):
+        return False
+    return heartbeat_at is not None and heartbeat_at >= cutoff
+
+@writes("jobs")
+def _fail_interrupted_jobs(c, now, own_runners):
+    """Fail queued/running jobs whose runner is gone; jobs of other live processes are left alone"""
+    cutoff = (datetime.fromisoformat(now) - timedelta(seconds=JOB_HEARTBEAT_TIMEOUT)).isoformat()
+    c.execute("""
+        SELECT runner, MAX(heartbeat_at) FROM jobs
+        WHERE status IN ('queued', 'running') AND runner IS NOT NULL
+        GROUP BY runner
+    """)
+    dead = [runner for runner, heartbeat_at in c.fetchall()
+            if not _job_runner_alive(runner, own_runners, heartbeat_at, cutoff)]
+    c.execute(f"""
+        UPDATE jobs SET status = 'failed', error = 'Interrupted (server restart)', finished_at = ?
+        WHERE status IN ('queued', 'running') AND (runner IS NULL OR runner IN ({", ".join("?" * len(dead))}))
+    """, [now] + dead)
+
+@writes("jobs")
+def _job_heartbeat(c, runner_id, now, own_runners):
+    """Mark the jobs of this runner alive and fail those of runners that stopped beating"""
+    c.execute("UPDATE jobs SET heartbeat_at = ? WHERE runner = ? AND status IN ('queued', 'running')",
+              (now, runner_id))
+    _fail_interrupted_jobs(c, now, own_runners)
+
+class JobRunner:
+    """Thread pool for long operations. Jobs are queued per user and workers take users
+    round-robin, so one user with many jobs cannot starve the others."""
+
+    def __init__(self, path, workers):
+        self.path = path
+        self.runner_id = f"{os.getpid()}:{uuid.uuid4().hex[:12]}"
+        self.queues = OrderedDict()  # user_id -> deque of (job_id, fn, args)
+        self.cond = threading.Condition()
+        self.threads = [threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True)
+                        for i in range(workers)]
+        self.threads.append(threading.Thread(target=self._heartbeat, name="job-heartbeat", daemon=True))
+        for thread in self.threads:
+            thread.start()
+
+    def _heartbeat(self):
+        while True:
+            time.sleep(JOB_HEARTBEAT_INTERVAL)
+            try:
+                get_writer(self.path).submit(_job_heartbeat, self.runner_id, _now_iso(), _own_runner_ids()).result()
+            except Exception:
+                traceback.print_exc()
+
+    def submit(self, job_id, user_id, fn, args):
+        with self.cond:
+            self.queues.setdefault(user_id, deque()).append((job_id, fn, args))
+            self.cond.notify()
+
+    def _next(self):
+        with self.cond:
+            while not self.queues:
+                self.cond.wait()
+            user_id, jobs = next(iter(self.queues.items()))
+            job = jobs.popleft()
+            # User ini pindah ke belakang antrian (round-robin)
+            del self.queues[user_id]
+            if jobs:
+                self.queues[user_id] = jobs
+            return job
+
+    def _work(self):
+        while True:
+            job_id, fn, args = self._next()
+            submit = get_writer(self.path).submit
+            last_update = [0.0]
+
+            def progress(done, total, message=None):
+                now = time.monotonic()
+                if done < total and now - last_update[0] < JOB_PROGRESS_INTERVAL:
+                    return
+                last_update[0] = now
+                submit(_update_job, job_id, progress=done / total if total else 1.0,
+                       message=message or f"{done} / {total}")
+
+            try:
+                submit(_update_job, job_id, status='running', started_at=_now_iso()).result()
+                result_name, result_mime, result = fn(progress, *args)
+                try:
+                    submit(_finish_job, job_id, _now_iso(), result_name, result_mime, result).result()
+                finally:
+                    if hasattr(result, "close"):
+                        result.close()
+            except Exception as e:
+                if not isinstance(e, ValueError):  # ValueError = pesan untuk user, bukan bug
+                    traceback.print_exc()
+                # Worker thread tidak boleh mati walaupun DB sedang bermasalah
+                try:
+                    submit(_update_job, job_id, status='failed', finished_at=_now_iso(), error=str(e)).result()
+                except Exception:
+                    traceback.print_exc()
+
+_job_runners = _process_singleton("job_runners", dict)
+_job_runners_lock = _process_singleton("job_runners_lock", threading.Lock)
+
+def _own_runner_ids():
+    return {r.runner_id for r in list(_job_runners.values())}
+
+def get_job_runner():
+    with _job_runners_lock:
+        runner = _job_runners.get(DB_PATH)
+        if runner is None:
+            runner = _job_runners[DB_PATH] = JobRunner(DB_PATH, JOB_WORKERS)
+            # Job queued/running milik proses yang sudah mati tidak akan pernah selesai
+            run_write(_fail_interrupted_jobs, _now_iso(), _own_runner_ids())
+        return runner
+
+def submit_job(kind, user_id, fn, *args):
+    """Run fn(progress, *args) -> (file_name, mime, bytes or binary file) in the background, returns the job id.
+    progress(done, total, message=None) may be called by fn to report progress."""
+    runner = get_job_runner()
+    job_id = run_write(_insert_job, kind, user_id, _now_iso(), runner.runner_id)
+    runner.submit(job_id, user_id, fn, args)
+    return job_id
+
+def get_user_jobs(user_id, limit=10):
+    """Latest jobs of a user (without the result BLOB)"""
+    with db_conn() as conn:
+        c = conn.cursor()
+        c.execute(f"SELECT {', '.join(JOB_COLS)} FROM jobs WHERE user_id = ? ORDER BY id DESC LIMIT ?", (user_id, limit))
+        rows = c.fetchall()
+    return [dict(zip(JOB_COLS, row)) for row in rows]
+
+def get_jobs(job_ids):
+    """Jobs by id (without the result BLOB)"""
+    job_ids = [int(i) for i in job_ids]
+    if not job_ids:
+        return []
+    with db_conn() as conn:
+        c = conn.cursor()
+        c.execute(f"SELECT {', '.join(JOB_COLS)} FROM jobs WHERE id IN ({', '.join('?' * len(job_ids))}) ORDER BY id DESC", job_ids)
+        rows = c.fetchall()
+    return [dict(zip(JOB_COLS, row)) for row in rows]
+
+def get_job_result(job_id, user_id):
+    """(file_name, mime, bytes) of a finished job owned by user_id, else None"""
+    with db_conn() as conn:
+        c = conn.cursor()
+        c.execute("SELECT result_name, result_mime, result FROM jobs WHERE id = ? AND user_id = ? AND status = 'done'",
+                  (job_id, user_id))
+        row = c.fetchone()
+    return row
+
+def export_job(progress, date_from, date_to, include_checklists, include_calibrations, filters, fmt):
+    """Background job: bulk period export (see plan_export / render_export)"""
+    progress(0, 1, "Mengambil data...")
+    plan = plan_export(date_from, date_to, include_checklists, include_calibrations, filters)
+    if not plan:
+        raise ValueError("Tidak ada report pada periode ini")
+    out = tempfile.TemporaryFile()
+    try:
+        render_export(iter_export_items(plan), out, fmt, len(plan),
+                      lambda done, total: progress(done, total, f"{done} / {total} report"))
+    except BaseException:
+        out.close()
+        raise
+    return (f"reports_{date_from}_{date_to}.{fmt}",
+            "application/zip" if fmt == "zip" else "application/pdf",
+            out)
+
+# ---------------------------
+# UI HELPERS
+# ---------------------------
+SUB_AREA_OPTIONS = {
+    "Papper Machine 1": [
+        "WRAPPING & REWINDER",
+        "POPE REEL & KUSTER",
+        "DRYER GROUP 1 & 2",
+        "DRYER GROUP 3, 4 & 5",
+        "DRYER GROUP 6 & 7",
+        "PRESS 1, 2 & 3",
+        "WIRE AREA",
+        "STOCK PREPARATION AREA"
+    ],
+    "Papper Machine 2": ["Wire Section", "Press Section", "Dryer Section", "Calendar", "Reel"],
+    "Boiler": ["Feed Pump", "Burner", "Economizer", "Air Fan", "Water Softener"],
+    "WWTP": ["Blower", "Screening", "Clarifier", "Sludge Pump", "Equalization Tank"],
+    "Other": ["Workshop", "Office", "Warehouse"]
+}
+SHIFT_OPTIONS = ["Pagi", "Siang", "Malam"]
+
+def _date_range_filters(date_range):
+    filters = {}
+    if len(date_range) > 0:
+        filters['date_from'] = date_range[0]
+        filters['date_to'] = date_range[-1]
+    return filters
+
+def checklist_filters_ui(key):
+    """Filter widgets for checklist lists, returns a filters dict for get_checklist_page"""
+    q = st.text_input("🔍 Cari", placeholder="mis. bearing noise", key=f"{key}_q")
+    with st.expander("🔎 Filter", expanded=False):
+        col1, col2, col3 = st.columns(3)
+        date_range = col1.date_input("Rentang Tanggal", value=(), key=f"{key}_f_date")
+        machine = col1.selectbox("Machine / Area", [""] + list(SUB_AREA_OPTIONS), key=f"{key}_f_machine")
+        sub_area = col2.selectbox("Sub Area", [""] + SUB_AREA_OPTIONS.get(machine, []), key=f"{key}_f_sub_area")
+        shift = col2.selectbox("Shift", [""] + SHIFT_OPTIONS, key=f"{key}_f_shift")
+        status = col3.selectbox("Status", ["", "Pending", "Approved"], key=f"{key}_f_status")
+    filters = _date_range_filters(date_range)
+    filters.update({'machine': machine, 'sub_area': sub_area, 'shift': shift, 'approval_status': status, 'q': q.strip()})
+    return filters
+
+def calibration_filters_ui(key):
+    """Filter widgets for calibration lists, returns a filters dict for get_calibration_page"""
+    q = st.text_input("🔍 Cari", placeholder="mis. PT/1, pressure transmitter", key=f"{key}_q")
+    with st.expander("🔎 Filter", expanded=False):
+        col1, col2, col3 = st.columns(3)
+        date_range = col1.date_input("Rentang Tanggal", value=(), key=f"{key}_f_date")
+        plant = col2.text_input("Plant", key=f"{key}_f_plant")
+        status = col3.selectbox("Status", ["", "Pending", "Approved"], key=f"{key}_f_status")
+    filters = _date_range_filters(date_range)
+    filters.update({'plant': plant.strip(), 'approval_status': status, 'q': q.strip()})
+    return filters
+
+def list_cursor(key, filters):
+    """Keyset cursor of the page currently shown for list `key`; back to page 1 when filters change"""
+    signature = repr(sorted((k, str(v)) for k, v in filters.items()))
+    if st.session_state.get(f"{key}_filters") != signature:
+        st.session_state[f"{key}_filters"] = signature
+        st.session_state[f"{key}_cursors"] = [None]
+    return st.session_state[f"{key}_cursors"][-1]
+
+def list_page(key, filters, page_fn, search_fn):
+    """Rows for a list view: ranked search results when the search box is used, otherwise the current keyset page"""
+    cursor = list_cursor(key, filters)
+    if filters.get('q'):
+        return search_fn(filters['q'], filters), None
+    return page_fn(filters, cursor)
+
+def pick_download_id(key, label, page_ids):
+    """ID chosen from the current page, or typed in for a report on another page"""
+    col_sel, col_typed = st.columns([2, 1])
+    sel = col_sel.selectbox(label, [""] + page_ids, key=key)
+    typed = col_typed.text_input("atau ketik ID", key=f"{key}_typed").strip()
+    return typed or sel
+
+def download_row(sel, filters, page_fn):
+    """List row for a picked ID (None if empty / not found); the user_id filter still restricts technicians"""
+    if not sel:
+        return None
+    if not sel.isdigit():
+        st.warning("⚠️ ID harus berupa angka")
+        return None
+    found, _ = page_fn({'id': int(sel), 'user_id': filters.get('user_id')}, limit=None)
+    if found.empty:
+        st.warning(f"⚠️ ID {sel} tidak ditemukan")
+        return None
+    return found.iloc[0]
+
+def render_list_footer(key, filters, shown, next_cursor, total):
+    if filters.get('q'):
+        st.caption(f"🔍 {shown} hasil paling relevan dari {total} yang cocok")
+    else:
+        render_pager(key, next_cursor, total)
+
+def render_pager(key, next_cursor, total):
+    cursors = st.session_state[f"{key}_cursors"]
+    col_prev, col_info, col_next = st.columns([1, 2, 1])
+    if col_prev.button("⬅️ Prev", key=f"{key}_prev", disabled=len(cursors) == 1, use_container_width=True):
+        cursors.pop()
+        st.rerun()
+    pages = max(1, -(-total // PAGE_SIZE))
+    col_info.markdown(f"<p class='small-muted' style='text-align:center'>Halaman {len(cursors)} / {pages}</p>", unsafe_allow_html=True)
+    if col_next.button("Next ➡️", key=f"{key}_next", disabled=next_cursor is None, use_container_width=True):
+        cursors.append(next_cursor)
+        st.rerun()
+
+def render_bulk_export(key, user, include_checklists, include_calibrations):
+    """Date-range export of every report as ZIP / merged PDF, runs as a background job"""
+    with st.expander("📦 Export Periode (ZIP / PDF gabungan)", expanded=False):
+        col1, col2, col3 = st.columns(3)
+        date_range = col1.date_input("Rentang Tanggal", value=(), key=f"{key}_date")
+        status = col2.selectbox("Status", ["Approved", "Pending", ""], key=f"{key}_status",
+                                format_func=lambda x: x or "Semua")
+        fmt = col3.radio("Format", ["zip", "pdf"], key=f"{key}_fmt", horizontal=True,
+                         format_func=lambda x: "ZIP" if x == "zip" else "PDF gabungan")
+        if st.button("⚙️ Buat Export", key=f"{key}_run", disabled=len(date_range) == 0):
+            job_id = submit_job("export", user['id'], export_job, date_range[0], date_range[-1],
+                                include_checklists, include_calibrations, {'approval_status': status}, fmt)
+            st.success(f"✅ Export dijalankan di background (Job #{job_id})")
+        render_user_jobs(key, user)
+
+def render_user_jobs(key, user):
+    """The user's latest background jobs; results are only loaded from the DB on request"""
+    jobs = get_user_jobs(user['id'], limit=5)
+    if not jobs:
+        return
+    st.markdown("**⏳ Job Saya**")
+    active_ids = [job['id'] for job in jobs if job['status'] in ('queued', 'running')]
+    if active_ids:
+        render_job_progress(active_ids)
+    for job in jobs:
+        if job['status'] == 'done':
+            col_info, col_action = st.columns([3, 1])
+            col_info.write(f"✅ #{job['id']} {job['kind']} — {job['result_name']}")
+            if col_action.button("📥 Ambil hasil", key=f"{key}_job_{job['id']}"):
+                result = get_job_result(job['id'], user['id'])
+                if result:
+                    st.download_button(f"📥 Download {result[0]}", data=result[2], file_name=result[0],
+                                       mime=result[1], key=f"{key}_job_dl_{job['id']}")
+        elif job['status'] == 'failed':
+            st.caption(f"❌ #{job['id']} {job['kind']} — {job['error']}")
+        elif job['status'] == 'expired':
+            st.caption(f"⌛ #{job['id']} {job['kind']} — hasil sudah dihapus (lebih dari {JOB_RESULT_RETENTION_DAYS} hari)")
+
+@st.fragment(run_every="2s")
+def render_job_progress(job_ids):
+    """Polls running jobs; reruns the whole page once one of them has finished"""
+    jobs = get_jobs(job_ids)
+    if any(job['status'] not in ('queued', 'running') for job in jobs):
+        st.rerun()
+    for job in jobs:
+        st.write(f"⏳ #{job['id']} {job['kind']} — {job['status']} {job['message'] or ''}")
+        st.progress(min(1.0, job['progress'] or 0.0))
+
 # ---------------------------
 # MAIN APP
 # ---------------------------
 def main():
+    # Hanya di halaman: import modul ini (CLI, worker export, test) tidak menyentuh UI
+    st.set_page_config(page_title="Maintenance & Calibration System", layout="wide")
+    st.markdown(hide_streamlit_style, unsafe_allow_html=True)
     inject_bootstrap()
     init_db()
 
@@ -1276,9 +3758,8 @@ def main():
     st.markdown("<div class='card'><h2>Maintenance & Calibration System</h2><p class='small-muted'>Gunakan akun yang sudah ditentukan.</p></div>", unsafe_allow_html=True)
 
     if not st.session_state['auth']:
-        conn = get_conn()
-        usernames = pd.read_sql("SELECT username FROM users", conn)['username'].tolist()
-        conn.close()
+        with db_conn() as conn:
+            usernames = pd.read_sql("SELECT username FROM users", conn)['username'].tolist()
 
         st.subheader("🔐 Login")
         with st.form("login_form"):
@@ -1339,26 +3820,10 @@ def main():
             with st.form("checklist_form", clear_on_submit=True):
                 col1, col2 = st.columns([3, 1])
                 date = col1.date_input("Tanggal", value=datetime.today())
-                machine = col1.selectbox("Machine / Area", ["Papper Machine 1", "Papper Machine 2", "Boiler", "WWTP", "Other"])
+                machine = col1.selectbox("Machine / Area", list(SUB_AREA_OPTIONS))
                 
-                sub_area_options = {
-                    "Papper Machine 1": [
-                        "WRAPPING & REWINDER",
-                        "POPE REEL & KUSTER",
-                        "DRYER GROUP 1 & 2",
-                        "DRYER GROUP 3, 4 & 5",
-                        "DRYER GROUP 6 & 7",
-                        "PRESS 1, 2 & 3",
-                        "WIRE AREA",
-                        "STOCK PREPARATION AREA"
-                    ],
-                    "Papper Machine 2": ["Wire Section", "Press Section", "Dryer Section", "Calendar", "Reel"],
-                    "Boiler": ["Feed Pump", "Burner", "Economizer", "Air Fan", "Water Softener"],
-                    "WWTP": ["Blower", "Screening", "Clarifier", "Sludge Pump", "Equalization Tank"],
-                    "Other": ["Workshop", "Office", "Warehouse"]
-                }
-                sub_area = col1.selectbox("Sub Area", sub_area_options.get(machine, ["N/A"]))
-                shift = col2.selectbox("Shift", ["Pagi", "Siang", "Malam"])
+                sub_area = col1.selectbox("Sub Area", SUB_AREA_OPTIONS.get(machine, ["N/A"]))
+                shift = col2.selectbox("Shift", SHIFT_OPTIONS)
                 
                 is_wrapping_rewinder = (machine == "Papper Machine 1" and sub_area == "WRAPPING & REWINDER")
                 
@@ -1492,10 +3957,14 @@ def main():
                             st.rerun()
 
         st.subheader("📋 Daftar Checklist")
-        df = get_checklists() if user['role'] in ['admin', 'manager'] else get_checklists(user_id=user['id'])
+        filters = checklist_filters_ui("checklist")
+        if user['role'] not in ['admin', 'manager']:
+            filters['user_id'] = user['id']
+        df, next_cursor = list_page("checklist", filters, get_checklist_page, search_checklists)
         if not df.empty:
+            total = count_checklists(filters)
             # Tampilan mobile-friendly
-            st.info(f"Total: {len(df)} checklist")
+            st.info(f"Total: {total} checklist")
             
             # Compact display untuk mobile
             display_df = df[['id', 'date', 'machine', 'sub_area', 'shift', 'item', 'condition', 'approval_status']]
@@ -1504,11 +3973,12 @@ def main():
             st.markdown('<div class="checklist-mobile">', unsafe_allow_html=True)
             st.dataframe(display_df, use_container_width=True, hide_index=True, height=400)
             st.markdown('</div>', unsafe_allow_html=True)
+            render_list_footer("checklist", filters, len(df), next_cursor, total)
             
             # Approval untuk Manager
             if user['role'] == 'manager':
                 st.markdown("### ✅ Approval Checklist")
-                pending_df = df[df['approval_status'] == 'Pending']
+                pending_df, _ = get_checklist_page({'approval_status': 'Pending'}, limit=None)
                 
                 if not pending_df.empty:
                     # Cek apakah ada WRAPPING & REWINDER
@@ -1593,6 +4063,11 @@ def main():
                                 st.write(f"**Sub Area:** {preview_data['sub_area']}")
                                 st.write(f"**Item:** {preview_data['item']}")
                                 st.write(f"**Condition:** {preview_data['condition']}")
+                                refs = [(preview_data['image_before_ref'], "Before"), (preview_data['image_after_ref'], "After")]
+                                thumbs = get_attachment_thumbnails([ref for ref, _ in refs])
+                                photos = [(thumbs[ref], label) for ref, label in refs if ref in thumbs]
+                                if photos:
+                                    st.image([thumb for thumb, _ in photos], caption=[label for _, label in photos], width=150)
                             
                             st.markdown("#### ✍️ Tanda Tangan")
                             
@@ -1651,15 +4126,26 @@ def main():
                 
                 if sel_session:
                     selected_date, selected_shift = sel_session.split(" - Shift ")
-                    session_df = wrapping_df[(wrapping_df['date'] == selected_date) & (wrapping_df['shift'] == selected_shift)]
+                    
+                    # Ambil semua part sesi ini, bisa saja terpotong di batas halaman
+                    session_df, _ = get_checklist_page({
+                        'machine': 'Papper Machine 1', 'sub_area': 'WRAPPING & REWINDER',
+                        'date_from': selected_date, 'date_to': selected_date, 'shift': selected_shift,
+                        'user_id': filters.get('user_id')
+                    }, limit=None)
                     
                     if not session_df.empty:
                         first_rec = session_df.iloc[0]
-                        pdf_bytes = generate_pdf_wrapping_rewinder(
-                            session_df, 
-                            selected_date, 
-                            selected_shift,
-                            first_rec.get('input_by', 'N/A')
+                        pdf_bytes = pdf_cache.get_or_build(
+                            "wrapping_rewinder",
+                            (selected_date, selected_shift, filters.get('user_id')),
+                            pdf_version(session_df.to_dict('records')),
+                            lambda: generate_pdf_wrapping_rewinder(
+                                get_checklist_records(session_df['id'].tolist()), 
+                                selected_date, 
+                                selected_shift,
+                                first_rec.get('input_by', 'N/A')
+                            )
                         )
                         st.download_button(
                             "📄 Download PDF - WRAPPING & REWINDER", 
@@ -1673,13 +4159,19 @@ def main():
             non_wrapping_df = df[~((df['machine'] == 'Papper Machine 1') & (df['sub_area'] == 'WRAPPING & REWINDER'))]
             
             if not non_wrapping_df.empty:
-                sel = st.selectbox("Pilih ID untuk download", [""] + non_wrapping_df['id'].astype(str).tolist(), key="pdf_individual")
-                if sel:
-                    rec = df[df['id'] == int(sel)].iloc[0].to_dict()
-                    pdf_bytes = generate_pdf(rec, "Checklist Maintenance")
+                sel = pick_download_id("pdf_individual", "Pilih ID untuk download", non_wrapping_df['id'].astype(str).tolist())
+                row = download_row(sel, filters, get_checklist_page)
+                if row is not None:
+                    pdf_bytes = pdf_cache.get_or_build(
+                        "checklist", int(sel), pdf_version([row]),
+                        lambda: generate_pdf(get_checklist_record(int(sel)), "Checklist Maintenance")
+                    )
                     st.download_button("📄 Download PDF", data=pdf_bytes, file_name=f"checklist_{sel}.pdf", mime="application/pdf")
             else:
                 st.info("Tidak ada checklist individual untuk di-download")
+            
+            if user['role'] in ['admin', 'manager']:
+                render_bulk_export("export_checklist", user, include_checklists=True, include_calibrations=False)
                 
         else:
             st.info("Belum ada data checklist.")
@@ -1691,27 +4183,33 @@ def main():
         if user['role'] == "admin":
             st.subheader("📝 Input Calibration Report")
             
-            # Get historical data for autocomplete
-            df_history = get_calibrations()
+            # Saran autocomplete dari index suggestions (terbaru dulu)
+            history = get_suggestions({
+                'doc_no': 20, 'name': 20, 'environmental_temp': 10, 'humidity': 10,
+                'id_number': 20, 'function_loc': 20, 'plant': 10, 'location': 20,
+                'input': 10, 'output': 10, 'manufacturer': 20, 'model': 20, 'serial_no': 20,
+                'range_in': 10, 'range_out': 10, 'interval_cal': 10,
+            })
             
-            # Helper function to get unique history
-            def get_history_list(df, column, limit=20):
-                if df.empty:
-                    return []
-                values = df[column].dropna().unique().tolist()
-                # Filter empty strings and sort by most recent (reverse)
-                values = [str(x).strip() for x in values if x and str(x).strip()]
-                return sorted(list(set(values)))[:limit]
+            # Data peralatan diisi dari master instrumen (report terakhir Tag ID tersebut)
+            prefill_tag = st.text_input("🔎 Prefill dari Tag ID", key="calibration_prefill_tag", placeholder="e.g., PT/1",
+                                        help="Isi data peralatan dari report terakhir instrumen ini")
+            prefill = get_instrument(prefill_tag) or {}
+            if prefill:
+                st.caption(f"✅ {prefill['id_number']}: report terakhir {prefill['last_date'] or '-'}, "
+                           f"next due {prefill['next_due_date'] or '-'}")
+            elif prefill_tag.strip():
+                st.caption("ℹ️ Tag ID belum ada di master instrumen, isi data peralatan manual.")
             
             with st.form("calibration_form", clear_on_submit=True):
                 st.markdown("#### 📋 Basic Information")
                 col1, col2 = st.columns(2)
                 
                 # Get histories
-                doc_no_history = get_history_list(df_history, 'doc_no', 20)
-                name_history = get_history_list(df_history, 'name', 20)
-                temp_history = get_history_list(df_history, 'environmental_temp', 10)
-                humid_history = get_history_list(df_history, 'humidity', 10)
+                doc_no_history = history['doc_no']
+                name_history = history['name']
+                temp_history = history['environmental_temp']
+                humid_history = history['humidity']
                 
                 # Use markdown for datalist suggestion (HTML5 datalist)
                 st.markdown(f"""
@@ -1734,6 +4232,7 @@ def main():
                 # Name with autocomplete
                 name = col1.text_input(
                     "Name", 
+                    value=prefill.get('equipment_name', ""),
                     placeholder="Rotary Pump",
                     help=f"💡 Previous: {', '.join(name_history[:3])}" if name_history else None
                 )
@@ -1758,22 +4257,23 @@ def main():
                 col1, col2 = st.columns(2)
                 
                 # Get equipment histories
-                tag_history = get_history_list(df_history, 'id_number', 20)
-                func_history = get_history_list(df_history, 'function_loc', 20)
-                plant_history = get_history_list(df_history, 'plant', 10)
-                loc_history = get_history_list(df_history, 'location', 20)
-                input_history = get_history_list(df_history, 'input', 10)
-                output_history = get_history_list(df_history, 'output', 10)
-                mfg_history = get_history_list(df_history, 'manufacturer', 20)
-                model_history = get_history_list(df_history, 'model', 20)
-                sn_history = get_history_list(df_history, 'serial_no', 20)
-                range_in_history = get_history_list(df_history, 'range_in', 10)
-                range_out_history = get_history_list(df_history, 'range_out', 10)
-                interval_history = get_history_list(df_history, 'interval_cal', 10)
+                tag_history = history['id_number']
+                func_history = history['function_loc']
+                plant_history = history['plant']
+                loc_history = history['location']
+                input_history = history['input']
+                output_history = history['output']
+                mfg_history = history['manufacturer']
+                model_history = history['model']
+                sn_history = history['serial_no']
+                range_in_history = history['range_in']
+                range_out_history = history['range_out']
+                interval_history = history['interval_cal']
                 
                 # Tag ID with autocomplete
                 tag_id = col1.text_input(
                     "Tag ID", 
+                    value=prefill.get('id_number', ""),
                     placeholder="e.g., PT/1",
                     help=f"💡 Previous: {', '.join(tag_history[:3])}" if tag_history else None
                 )
@@ -1781,6 +4281,7 @@ def main():
                 # Function Loc with autocomplete
                 function_loc = col1.text_input(
                     "Function Loc", 
+                    value=prefill.get('function_loc', ""),
                     placeholder="e.g., PM1",
                     help=f"💡 Previous: {', '.join(func_history[:3])}" if func_history else None
                 )
@@ -1788,16 +4289,18 @@ def main():
                 # Plant with autocomplete
                 plant = col1.text_input(
                     "Plant", 
+                    value=prefill.get('plant', ""),
                     placeholder="e.g., 1",
                     help=f"💡 Previous: {', '.join(plant_history[:3])}" if plant_history else None
                 )
                 
-                description = col1.text_area("Description", placeholder="Pressure outlet col DDK - pressure 70 (DUMP 107)")
-                device_name = col1.text_area("Device Name", placeholder="Pressure transmitter - pressure Hx (DUMP 107)")
+                description = col1.text_area("Description", value=prefill.get('description', ""), placeholder="Pressure outlet col DDK - pressure 70 (DUMP 107)")
+                device_name = col1.text_area("Device Name", value=prefill.get('service_name', ""), placeholder="Pressure transmitter - pressure Hx (DUMP 107)")
                 
                 # Location with autocomplete
                 location = col1.text_input(
                     "Location", 
+                    value=prefill.get('location', ""),
                     placeholder="e.g., Field Area A",
                     help=f"💡 Previous: {', '.join(loc_history[:3])}" if loc_history else None
                 )
@@ -1805,6 +4308,7 @@ def main():
                 # Input with autocomplete
                 input_type = col1.text_input(
                     "Input", 
+                    value=prefill.get('input', ""),
                     placeholder="e.g., Pressure",
                     help=f"💡 Previous: {', '.join(input_history[:3])}" if input_history else None
                 )
@@ -1812,6 +4316,7 @@ def main():
                 # Output with autocomplete
                 output_type = col1.text_input(
                     "Output", 
+                    value=prefill.get('output', ""),
                     placeholder="e.g., 4-20 mA",
                     help=f"💡 Previous: {', '.join(output_history[:3])}" if output_history else None
                 )
@@ -1819,6 +4324,7 @@ def main():
                 # Manufacturer with autocomplete
                 manufacturer = col2.text_input(
                     "Manufacturer", 
+                    value=prefill.get('manufacturer', ""),
                     placeholder="e.g., Keller",
                     help=f"💡 Previous: {', '.join(mfg_history[:3])}" if mfg_history else None
                 )
@@ -1826,6 +4332,7 @@ def main():
                 # Model with autocomplete
                 model = col2.text_input(
                     "Model", 
+                    value=prefill.get('model', ""),
                     placeholder="e.g., -",
                     help=f"💡 Previous: {', '.join(model_history[:3])}" if model_history else None
                 )
@@ -1833,6 +4340,7 @@ def main():
                 # Serial No with autocomplete
                 serial_no = col2.text_input(
                     "Serial No", 
+                    value=prefill.get('serial_no', ""),
                     placeholder="e.g., -",
                     help=f"💡 Previous: {', '.join(sn_history[:3])}" if sn_history else None
                 )
@@ -1840,6 +4348,7 @@ def main():
                 # Range In with autocomplete
                 range_in = col2.text_input(
                     "Range In", 
+                    value=prefill.get('range_in', ""),
                     placeholder="e.g., 0 to 10 bar",
                     help=f"💡 Previous: {', '.join(range_in_history[:3])}" if range_in_history else None
                 )
@@ -1847,6 +4356,7 @@ def main():
                 # Range Out with autocomplete
                 range_out = col2.text_input(
                     "Range Out", 
+                    value=prefill.get('range_out', ""),
                     placeholder="e.g., 4 to 20 mA",
                     help=f"💡 Previous: {', '.join(range_out_history[:3])}" if range_out_history else None
                 )
@@ -1854,6 +4364,7 @@ def main():
                 # Interval Cal with autocomplete
                 interval_cal = col2.text_input(
                     "Interval Cal", 
+                    value=prefill.get('interval_cal', ""),
                     placeholder="e.g., 6 months",
                     help=f"💡 Previous: {', '.join(interval_history[:3])}" if interval_history else None
                 )
@@ -1907,34 +4418,37 @@ def main():
                     with col_af:
                         if idx == 0:
                             st.markdown("**A.s Found**")
-                        st.number_input(f"af_{idx}", value=0.0, format="%.2f", label_visibility="collapsed", key=f"as_found_{idx}")
+                        st.number_input(f"af_{idx}", value=None, format="%.2f", label_visibility="collapsed", key=f"as_found_{idx}")
                     
                     with col_al:
                         if idx == 0:
                             st.markdown("**A.s Left**")
-                        st.number_input(f"al_{idx}", value=0.0, format="%.2f", label_visibility="collapsed", key=f"as_left_{idx}")
+                        st.number_input(f"al_{idx}", value=None, format="%.2f", label_visibility="collapsed", key=f"as_left_{idx}")
                     
                     with col_fe:
                         if idx == 0:
                             st.markdown("**A.s Found Error (%)**")
-                        st.number_input(f"fe_{idx}", value=0.0, format="%.2f", label_visibility="collapsed", key=f"found_err_{idx}")
+                        st.number_input(f"fe_{idx}", value=None, format="%.2f", label_visibility="collapsed", key=f"found_err_{idx}")
                     
                     with col_le:
                         if idx == 0:
                             st.markdown("**A.s Left Error (%)**")
-                        st.number_input(f"le_{idx}", value=0.0, format="%.2f", label_visibility="collapsed", key=f"left_err_{idx}")
+                        st.number_input(f"le_{idx}", value=None, format="%.2f", label_visibility="collapsed", key=f"left_err_{idx}")
                     
                     # Collect data
                     result_data.append({
                         "percent": st.session_state.get(f"percent_{idx}", row_data.get('percent', '')),
                         "nominal_bar": st.session_state.get(f"nom_bar_{idx}", row_data.get('nominal_bar', '')),
                         "nominal_output": st.session_state.get(f"nom_out_{idx}", row_data.get('nominal_output', '')),
-                        "as_found": st.session_state.get(f"as_found_{idx}", 0.0),
-                        "as_left": st.session_state.get(f"as_left_{idx}", 0.0),
-                        "found_error": st.session_state.get(f"found_err_{idx}", 0.0),
-                        "left_error": st.session_state.get(f"left_err_{idx}", 0.0)
+                        "as_found": st.session_state.get(f"as_found_{idx}"),
+                        "as_left": st.session_state.get(f"as_left_{idx}"),
+                        "found_error": st.session_state.get(f"found_err_{idx}"),
+                        "left_error": st.session_state.get(f"left_err_{idx}")
                     })
                 
+                st.caption("ℹ️ Kolom Error (% of span) yang dikosongkan dihitung otomatis dari Range Out saat disimpan; Status As Found / As Left "
+                           "yang dikosongkan diisi Pass/Fail terhadap Reject if Error.")
+                
                 st.markdown("---")
                 st.markdown("#### 📊 Additional Information")
                 
@@ -2004,29 +4518,70 @@ def main():
                         'approved_by_date': approved_by_date.strftime("%Y-%m-%d") if approved_by_date else ''
                     }
                     
+                    calibration_data = evaluate_calibration(calibration_data)
                     if save_calibration(user['id'], calibration_data):
                         # Clear form
                         if 'cal_result_rows' in st.session_state:
                             del st.session_state.cal_result_rows
                         st.rerun()
         
+        # Jadwal kalibrasi: overdue + jatuh tempo
+        st.markdown("---")
+        with st.expander("📅 Jadwal Kalibrasi (Due / Overdue)", expanded=False):
+            due_days = st.number_input("Jatuh tempo dalam (hari)", min_value=0, max_value=365, value=30, step=7, key="due_days")
+            due_df = get_due_calibrations(int(due_days))
+            if due_df.empty:
+                st.info("Tidak ada instrumen yang jatuh tempo.")
+            else:
+                overdue = int((due_df['days_left'] < 0).sum())
+                st.write(f"**{len(due_df)}** instrumen, **{overdue}** overdue")
+                st.dataframe(due_df[['id_number', 'next_due_date', 'days_left', 'equipment_name', 'plant', 'location', 'doc_no', 'date']],
+                             use_container_width=True, hide_index=True)
+        
+        with st.expander("📈 Drift Instrumen", expanded=False):
+            st.caption("Error As Found (% of span) per instrumen dari seluruh riwayat kalibrasi. "
+                       "Prediksi reject = As Left terakhir + drift/tahun sampai Reject if Error; "
+                       "Shorten / Extend membandingkannya dengan jadwal kalibrasi berikutnya.")
+            drift_df = get_instrument_drift()
+            if drift_df.empty:
+                st.info("Belum ada riwayat kalibrasi per instrumen.")
+            else:
+                plants = sorted(p for p in drift_df['plant'].unique() if p)
+                drift_plant = st.selectbox("Plant", ["Semua"] + plants, key="drift_plant")
+                if drift_plant != "Semua":
+                    drift_df = drift_df[drift_df['plant'] == drift_plant]
+                counts = drift_df['recommendation'].value_counts()
+                st.write(f"**{len(drift_df)}** instrumen: **{counts.get('Shorten', 0)}** Shorten, "
+                         f"**{counts.get('Extend', 0)}** Extend, **{counts.get('Keep', 0)}** Keep")
+                st.dataframe(drift_df, use_container_width=True, hide_index=True)
+                drift_tag = st.selectbox("Riwayat Tag ID", [""] + drift_df['id_number'].tolist(), key="drift_tag")
+                if drift_tag:
+                    history_df = get_drift_history(drift_tag)
+                    st.line_chart(history_df.set_index('date')[['max_found_error', 'max_left_error', 'reject_error']])
+                    st.dataframe(history_df, use_container_width=True, hide_index=True)
+        
         # Display existing calibration reports
         st.markdown("---")
         st.subheader("📋 Daftar Calibration Reports")
         
-        df = get_calibrations() if user['role'] in ['admin', 'manager'] else get_calibrations(user_id=user['id'])
+        filters = calibration_filters_ui("calibration")
+        if user['role'] not in ['admin', 'manager']:
+            filters['user_id'] = user['id']
+        df, next_cursor = list_page("calibration", filters, get_calibration_page, search_calibrations)
         
         if not df.empty:
-            st.info(f"Total: {len(df)} calibration reports")
+            total = count_calibrations(filters)
+            st.info(f"Total: {total} calibration reports")
             
             # Compact display
             display_df = df[['id', 'doc_no', 'date', 'name', 'equipment_name', 'model', 'approval_status']]
             st.dataframe(display_df, use_container_width=True, hide_index=True, height=400)
+            render_list_footer("calibration", filters, len(df), next_cursor, total)
             
             # Approval section for Manager
             if user['role'] == 'manager':
                 st.markdown("### ✅ Approval Calibration")
-                pending_df = df[df['approval_status'] == 'Pending']
+                pending_df, _ = get_calibration_page({'approval_status': 'Pending'}, limit=None)
                 
                 if not pending_df.empty:
                     sel_approve = st.selectbox("Pilih ID untuk Approve", [""] + pending_df['id'].astype(str).tolist(), key="approve_calibration")
@@ -2082,33 +4637,98 @@ def main():
             # Download PDF
             st.markdown("---")
             st.subheader("📄 Download PDF Report")
-            sel = st.selectbox("Pilih ID untuk download PDF", [""] + df['id'].astype(str).tolist(), key="pdf_cal")
-            
-            if sel:
-                rec = df[df['id'] == int(sel)].iloc[0].to_dict()
-                pdf_bytes = generate_calibration_pdf(rec)
+            sel = pick_download_id("pdf_cal", "Pilih ID untuk download PDF", df['id'].astype(str).tolist())
+            row = download_row(sel, filters, get_calibration_page)
+            if row is not None:
+                pdf_bytes = pdf_cache.get_or_build(
+                    "calibration", int(sel), pdf_version([row]),
+                    lambda: generate_calibration_pdf(get_calibration_record(int(sel)))
+                )
                 st.download_button(
                     "📄 Download Calibration PDF", 
                     data=pdf_bytes, 
-                    file_name=f"calibration_{rec.get('doc_no', sel)}.pdf", 
+                    file_name=f"calibration_{row.get('doc_no', sel)}.pdf", 
                     mime="application/pdf",
                     use_container_width=True
                 )
+            
+            if user['role'] in ['admin', 'manager']:
+                render_bulk_export("export_calibration", user, include_checklists=False, include_calibrations=True)
         else:
             st.info("Belum ada calibration report.")
 
     # === Admin Dashboard ===
     elif menu == "Admin Dashboard":
         st.header("Admin Dashboard")
+        st.subheader("📊 Kondisi Checklist")
+        weeks = st.selectbox("Periode", [4, 12, 26, 52, 104], index=1, format_func=lambda w: f"{w} minggu terakhir",
+                             key="dash_weeks")
+        period_end = _today()
+        period_start = period_end - timedelta(weeks=weeks - 1)
+        overall = get_checklist_condition_stats(None, period_start, period_end).iloc[0]
+        backlog = get_approval_backlog(period_end)
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Item diperiksa", int(overall['total']))
+        col2.metric("Minor/Bad", f"{overall['minor_bad_rate']:.1f}%" if pd.notna(overall['minor_bad_rate']) else "-")
+        col3.metric("NG (komponen)", f"{overall['ng_rate']:.1f}%" if pd.notna(overall['ng_rate']) else "-")
+        col4.metric("Menunggu approval", int(backlog['pending'].sum()) if not backlog.empty else 0)
+
+        if overall['total']:
+            tabs = st.tabs(["Machine", "Sub Area", "Item", "Shift", "Mingguan", "Komponen"])
+            for tab, by in zip(tabs, ["machine", "sub_area", "item", "shift", "week"]):
+                with tab:
+                    stats = get_checklist_condition_stats(by, period_start, period_end)
+                    if by == "week":
+                        st.line_chart(stats.set_index(by)[['minor_bad_rate', 'ng_rate']])
+                    else:
+                        st.bar_chart(stats.head(20).set_index(by)[['minor_bad_rate', 'ng_rate']])
+                    st.dataframe(stats, use_container_width=True, hide_index=True)
+            with tabs[-1]:
+                component_machine = st.selectbox("Machine / Area", [""] + list(SUB_AREA_OPTIONS), key="dash_component_machine")
+                components = get_checklist_component_stats(period_start, period_end, component_machine)
+                if components.empty:
+                    st.info("Tidak ada checklist dengan detail komponen pada periode ini.")
+                else:
+                    st.bar_chart(components.set_index('component')[['ng_rate']])
+                    st.dataframe(components, use_container_width=True, hide_index=True)
+        else:
+            st.info("Belum ada checklist pada periode ini.")
+
+        st.markdown("**⏳ Umur Backlog Approval**")
+        if backlog.empty:
+            st.success("Tidak ada report yang menunggu approval.")
+        else:
+            st.dataframe(backlog, use_container_width=True, hide_index=True)
+
         st.subheader("📋 Checklist Semua Pengguna")
-        df_check = get_checklists()
+        check_filters = checklist_filters_ui("admin_checklist")
+        df_check, next_cursor = list_page("admin_checklist", check_filters, get_checklist_page, search_checklists)
         if not df_check.empty:
             st.dataframe(df_check[['id', 'date', 'machine', 'sub_area', 'shift', 'item', 'condition', 'note', 'approval_status']], use_container_width=True)
+            render_list_footer("admin_checklist", check_filters, len(df_check), next_cursor, count_checklists(check_filters))
 
         st.subheader("📋 Calibration Semua Pengguna")
-        df_cal = get_calibrations()
+        cal_filters = calibration_filters_ui("admin_calibration")
+        df_cal, next_cursor = list_page("admin_calibration", cal_filters, get_calibration_page, search_calibrations)
         if not df_cal.empty:
             st.dataframe(df_cal[['id', 'doc_no', 'date', 'name', 'equipment_name', 'model', 'approval_status']], use_container_width=True)
+            render_list_footer("admin_calibration", cal_filters, len(df_cal), next_cursor, count_calibrations(cal_filters))
+
+        with st.expander("🧮 Rollup Checklist", expanded=False):
+            st.caption("Tabel rollup harian / mingguan diperbarui otomatis saat checklist disimpan. "
+                       "Hitung ulang dari seluruh data checklist hanya untuk backfill atau perbaikan "
+                       "(sama dengan `python app.py rebuild-rollups`).")
+            if st.button("🔄 Hitung Ulang Rollup", key="rollup_rebuild"):
+                with st.spinner("Menghitung ulang rollup..."):
+                    counts = rebuild_checklist_rollups()
+                st.success("✅ " + ", ".join(f"{table}: {rows} baris" for table, rows in counts.items()))
+
+        with st.expander("🔁 Audit Hasil Kalibrasi", expanded=False):
+            st.caption("Hitung ulang error % of span dan Pass/Fail semua report, hasilnya CSV perbandingan dengan data tersimpan.")
+            if st.button("⚙️ Jalankan Audit", key="calibration_audit_run"):
+                job_id = submit_job("audit", user['id'], calibration_audit_job)
+                st.success(f"✅ Audit dijalankan di background (Job #{job_id})")
+            render_user_jobs("calibration_audit", user)
 
     if st.button("🚪 Logout"):
         st.session_state['auth'] = False
@@ -2116,4 +4736,9 @@ def main():
         st.rerun()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    # python app.py rebuild-rollups -> backfill tabel rollup checklist tanpa membuka UI
+    if sys.argv[1:2] == ["rebuild-rollups"]:
+        for table, rows in rebuild_checklist_rollups().items():
+            print(f"{table}: {rows} rows")
+    else:
+        main()
\ No newline at end of file
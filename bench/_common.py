@@ -0,0 +1,32 @@
+"""Shared setup for the benchmark scripts: import app against a throwaway database"""
+import atexit
+import os
+import shutil
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app  # noqa: E402
+
+
+def temp_db():
+    """Point app at a new, migrated database in a temp directory and return its path.
+    The directory is deleted when the benchmark exits."""
+    directory = tempfile.mkdtemp(prefix="bench_")
+    atexit.register(shutil.rmtree, directory, ignore_errors=True)
+    path = os.path.join(directory, "maintenance_app.db")
+    app.DB_PATH = path
+    app.init_db()
+    return path
+
+
+def sample_calibration(i):
+    return {
+        'doc_no': f'CAL-{i}', 'date': '2025-01-01', 'name': 'Pump', 'equipment_name': 'Pump',
+        'id_number': f'PT/{i % 50}', 'plant': '1', 'range_in': '0 to 10 bar', 'range_out': '4 to 20 mA',
+        'interval_cal': '6 months', 'description': 'Pressure outlet', 'calibrators': 'Fluke',
+        'reject_error_value': '1.00',
+        'result_data': [{'percent': p, 'nominal_bar': p / 10, 'nominal_output': 4 + p * 0.16,
+                         'as_found': 4 + p * 0.16, 'as_left': 4 + p * 0.16} for p in (0, 25, 50, 75, 100)],
+    }
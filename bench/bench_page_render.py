@@ -0,0 +1,52 @@
+"""Read latency of one list page render (page rows + total count, query cache cleared).
+
+before: every query opens a fresh sqlite3 connection with default settings and closes it.
+after:  connections borrowed from the process-wide pool (WAL, mmap, page cache pragmas).
+
+    python bench/bench_page_render.py [calibrations] [renders]
+"""
+import sqlite3
+import statistics
+import sys
+import time
+
+from _common import app, sample_calibration, temp_db
+
+
+def render_page():
+    app.query_cache.clear()
+    app.get_calibration_page({})
+    app.count_calibrations({})
+    app.get_checklist_page({})
+    app.count_checklists({})
+
+
+def connect_per_call():
+    return sqlite3.connect(app.DB_PATH)
+
+
+def timings(renders):
+    samples = []
+    for _ in range(renders):
+        start = time.perf_counter()
+        render_page()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples), sorted(samples)[int(len(samples) * 0.95) - 1]
+
+
+if __name__ == "__main__":
+    calibrations = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    renders = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    temp_db()
+    for i in range(calibrations):
+        app.submit_write(app._insert_calibration, 1, sample_calibration(i), "2025-01-01T00:00:00")
+    app.run_write(lambda conn: None)
+
+    pooled_get_conn = app.get_conn
+    app.get_conn = connect_per_call
+    before = timings(renders)
+    app.get_conn = pooled_get_conn
+    after = timings(renders)
+    print(f"{calibrations} calibrations, {renders} renders (median / p95 ms)")
+    print(f"before: {before[0]:7.2f} / {before[1]:7.2f}")
+    print(f"after:  {after[0]:7.2f} / {after[1]:7.2f}")
@@ -0,0 +1,60 @@
+"""Calibration saves per second with several technicians submitting at once.
+
+Both runs open a connection per save, insert the report with app._insert_calibration and commit.
+The only difference is the schema check save_calibration used to do before every insert:
+
+before: twelve ALTER TABLE ADD COLUMN attempts (all fail, the columns exist) before the insert.
+after:  the insert alone (the columns are added once by migration 002).
+
+    python bench/bench_saves.py [technicians] [saves_per_technician]
+"""
+import sqlite3
+import sys
+import threading
+import time
+
+from _common import app, sample_calibration, temp_db
+
+OLD_ALTER_COLUMNS = ["location", "interval_cal", "reject_error_value", "reject_error_span", "status_as_found",
+                     "status_as_left", "next_cal_date", "calibration_node", "calibration_by_name",
+                     "calibration_by_date", "approved_by_name", "approved_by_date"]
+
+
+def save(path, data, alter_columns):
+    conn = sqlite3.connect(path, timeout=30)
+    c = conn.cursor()
+    for col in alter_columns:
+        try:
+            c.execute(f"ALTER TABLE calibration ADD COLUMN {col} TEXT")
+        except sqlite3.OperationalError:
+            pass
+    app._insert_calibration(c, 1, data, "2025-01-01T00:00:00")
+    conn.commit()
+    conn.close()
+
+
+def run(alter_columns, technicians, per_technician):
+    path = temp_db()
+
+    def technician(t):
+        for i in range(per_technician):
+            save(path, sample_calibration(t * per_technician + i), alter_columns)
+
+    threads = [threading.Thread(target=technician, args=(t,)) for t in range(technicians)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    return technicians * per_technician / elapsed
+
+
+if __name__ == "__main__":
+    technicians = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    per_technician = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    before = run(OLD_ALTER_COLUMNS, technicians, per_technician)
+    after = run([], technicians, per_technician)
+    print(f"{technicians} technicians x {per_technician} saves")
+    print(f"before: {before:8.1f} saves/s")
+    print(f"after:  {after:8.1f} saves/s  ({after / before:.1f}x)")
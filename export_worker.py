@@ -0,0 +1,9 @@
+"""Process-pool entry point for the bulk period export (see render_export in app.py).
+
+Under `streamlit run` the functions in app.py belong to a module named __main__, which a
+spawned worker cannot import. Workers call this module instead; it imports app by name."""
+
+
+def render_export_item(item):
+    import app
+    return app._render_export_item(item)
@@ -0,0 +1,18 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app  # noqa: E402
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """Fresh, fully migrated database file for one test"""
+    path = str(tmp_path / "maintenance_app.db")
+    monkeypatch.setattr(app, "DB_PATH", path)
+    app.init_db()
+    yield path
+    app.query_cache.clear()
@@ -0,0 +1,37 @@
+"""Migration 003 moves checklist photos into attachments, one row per distinct image"""
+import sqlite3
+
+import app
+
+PHOTO = b"\xff\xd8\xff\xe0" + b"same photo" * 100
+
+
+def test_duplicate_photos_stored_once(tmp_path, monkeypatch):
+    path = str(tmp_path / "maintenance_app.db")
+    conn = sqlite3.connect(path)
+    # Schema sebelum migrasi 003: foto masih BLOB di tiap baris checklist
+    for version, migration in enumerate(app.MIGRATIONS[:2], start=1):
+        migration(conn.cursor())
+        conn.execute(f"PRAGMA user_version = {version}")
+    conn.executemany("""
+        INSERT INTO checklist (user_id, date, machine, sub_area, shift, item, condition, image_before, image_after, created_at)
+        VALUES (1, '2025-01-01', 'Papper Machine 1', 'PM1', '1', ?, 'Good', ?, ?, '2025-01-01T08:00:00')
+    """, [("Motor A", PHOTO, b""), ("Motor B", PHOTO, None)])
+    conn.commit()
+    conn.close()
+
+    monkeypatch.setattr(app, "DB_PATH", path)
+    app.init_db()
+
+    conn = sqlite3.connect(path)
+    assert conn.execute("SELECT COUNT(*), MIN(data) FROM attachments").fetchone() == (1, PHOTO)
+    rows = conn.execute("SELECT id, image_before_ref, image_after_ref, image_before, image_after FROM checklist ORDER BY id").fetchall()
+    conn.close()
+    ref = rows[0][1]
+    assert [row[1:] for row in rows] == [(ref, None, None, None)] * 2
+
+    for checklist_id, *_ in rows:
+        record = app.get_checklist_record(checklist_id)
+        assert record['image_before'] == PHOTO
+        assert record['image_after'] is None
+    app.query_cache.clear()
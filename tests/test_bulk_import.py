@@ -0,0 +1,31 @@
+import json
+
+import pytest
+
+import app
+
+
+def _record(i, **extra):
+    return dict({'user_id': 1, 'date': '2025-01-01', 'machine': 'Boiler', 'sub_area': 'Feed',
+                 'shift': '1', 'item': f'Item {i}', 'condition': 'Baik', 'note': ''}, **extra)
+
+
+def _stored_details(db):
+    with app.db_conn() as conn:
+        return [row[0] for row in conn.execute("SELECT details FROM checklist ORDER BY id")]
+
+
+def test_bulk_import_serializes_non_string_details(db):
+    records = [_record(0, details={'a': 1}), _record(1, details=[1, 2]), _record(2, details=3.5),
+               _record(3, details='{"raw": true}'), _record(4)]
+    assert app.bulk_import_checklists(records) == 5
+    stored = _stored_details(db)
+    assert [json.loads(d) for d in stored[:4]] == [{'a': 1}, [1, 2], 3.5, {'raw': True}]
+    assert stored[4] is None
+
+
+def test_bulk_import_is_all_or_nothing(db):
+    records = [_record(i) for i in range(12000)] + [_record(-1, details=object())]
+    with pytest.raises(TypeError):
+        app.bulk_import_checklists(records)
+    assert _stored_details(db) == []
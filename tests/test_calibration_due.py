@@ -0,0 +1,68 @@
+"""Interval parsing and the precomputed due list"""
+from datetime import date
+
+import pytest
+
+import app
+
+AS_OF = date(2025, 3, 1)
+
+
+@pytest.mark.parametrize("text,expected", [
+    ("6 months", (6, 0)),
+    ("6 Month", (6, 0)),
+    ("3 bulan", (3, 0)),
+    ("1 year", (12, 0)),
+    ("2 thn", (24, 0)),
+    ("1.5 years", (18, 0)),
+    ("1,5 tahun", (18, 0)),
+    ("2 weeks", (0, 14)),
+    ("90 days", (0, 90)),
+    ("yearly", (12, 0)),
+    ("Quarterly", (3, 0)),
+    ("", None),
+    (None, None),
+    ("sometimes", None),
+    ("six months", None),
+    ("6 months or 1000 hours", None),
+])
+def test_parse_interval(text, expected):
+    assert app.parse_interval(text) == expected
+
+
+def test_next_due_date():
+    assert app.next_due_date("2025-01-15", "6 months") == date(2025, 7, 15)
+    assert app.next_due_date("2025-01-31", "1 month") == date(2025, 2, 28)
+    assert app.next_due_date("2025-01-15", "1.5 years") == date(2026, 7, 15)
+    # Next Calibration Date dari form menang atas interval
+    assert app.next_due_date("2025-01-15", "6 months", "2025-03-01") == date(2025, 3, 1)
+    assert app.next_due_date("2025-01-15", "kadang-kadang") is None
+    assert app.next_due_date("", "6 months") is None
+
+
+def _save(doc_no, tag, cal_date, interval, next_cal_date=None):
+    return app.run_write(app._insert_calibration, 1, {'doc_no': doc_no, 'id_number': tag, 'date': cal_date,
+                                                      'interval_cal': interval, 'next_cal_date': next_cal_date},
+                         f"{cal_date}T08:00:00")
+
+
+def _due(days=30):
+    df = app.get_due_calibrations(days, as_of=AS_OF)
+    return list(zip(df['id_number'], df['doc_no'], df['days_left']))
+
+
+def test_due_list_is_rebuilt_after_a_new_report(db):
+    _save("CAL-1", "PT/1", "2024-09-10", "6 months")   # due 2025-03-10
+    _save("CAL-2", "TT/2", "2024-08-20", "6 months")   # overdue sejak 2025-02-20
+    _save("CAL-3", "FT/3", "2025-01-01", "1 year")     # due 2026, di luar horizon
+    assert _due() == [("TT/2", "CAL-2", -9), ("PT/1", "CAL-1", 9)]
+
+    # Report baru untuk PT/1 menggantikan yang lama di daftar due
+    _save("CAL-4", "PT/1", "2025-02-28", "6 months")
+    assert _due() == [("TT/2", "CAL-2", -9)]
+
+    _save("CAL-5", "LT/5", "2024-03-10", "1 year", next_cal_date="2025-03-20")
+    assert _due() == [("TT/2", "CAL-2", -9), ("LT/5", "CAL-5", 19)]
+    assert _due(10) == [("TT/2", "CAL-2", -9)]
+    # Di luar horizon harian: range scan langsung di calibration_latest
+    assert _due(400)[-1] == ("FT/3", "CAL-3", 306)
@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+
+import app
+
+
+def _report(rows, **extra):
+    return dict({'range_out': '4 to 20 mA', 'reject_error_value': '1.00', 'result_data': rows}, **extra)
+
+
+def _row(percent, as_found=None, as_left=None, found_error=None, left_error=None):
+    return {'percent': str(percent), 'nominal_bar': '', 'nominal_output': f"{4 + percent * 0.16:.2f}",
+            'as_found': as_found, 'as_left': as_left, 'found_error': found_error, 'left_error': left_error}
+
+
+def test_each_reading_is_evaluated_on_its_own():
+    data = app.evaluate_calibration(_report([_row(0, as_found=4.16), _row(50, as_left=12.0), _row(100)]))
+    rows = data['result_data']
+    assert rows[0]['found_error'] == 1.0 and rows[0]['left_error'] is None
+    assert rows[1]['found_error'] is None and rows[1]['left_error'] == 0.0
+    assert rows[2]['found_error'] is None and rows[2]['left_error'] is None
+    assert data['status_as_found'] == 'Pass' and data['status_as_left'] == 'Pass'
+
+
+def test_real_zero_reading_is_not_treated_as_empty():
+    data = app.evaluate_calibration(_report([_row(0, as_found=0.0, as_left=4.0)]))
+    assert data['result_data'][0]['found_error'] == -25.0
+    assert data['status_as_found'] == 'Fail'
+
+
+def test_typed_error_cells_are_kept():
+    data = app.evaluate_calibration(_report([_row(0, as_found=4.16, as_left=4.0, found_error=0.5, left_error='')]))
+    assert data['result_data'][0]['found_error'] == 0.5
+    assert data['result_data'][0]['left_error'] == 0.0
+
+
+def test_stored_history_masks_legacy_zero_defaults_per_reading():
+    points = pd.DataFrame({'calibration_id': [1, 1], 'seq': [0, 1], 'percent': [0.0, 100.0],
+                           'nominal_input': np.nan, 'nominal_output': [4.0, 20.0],
+                           'as_found': [4.16, 0.0], 'as_left': [0.0, 20.0],
+                           'found_error': np.nan, 'left_error': np.nan})
+    calibrations = pd.DataFrame({'range_out': ['4 to 20 mA'], 'reject_error_value': ['1.00']}, index=[1])
+    evaluated, summary = app.evaluate_points(points, calibrations, zero_is_empty=True)
+    assert evaluated['found_error'].tolist()[0] == 1.0 and np.isnan(evaluated['found_error'].tolist()[1])
+    assert np.isnan(evaluated['left_error'].tolist()[0]) and evaluated['left_error'].tolist()[1] == 0.0
+    assert summary.at[1, 'status_as_found'] == 'Pass'
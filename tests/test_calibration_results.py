@@ -0,0 +1,81 @@
+import io
+import json
+import sqlite3
+
+import pandas as pd
+from pypdf import PdfReader
+
+import app
+
+POINTS = [
+    {'percent': '0', 'nominal_bar': '0', 'nominal_output': '4 mA', 'as_found': 4.01, 'as_left': 'N/A',
+     'found_error': '-', 'left_error': None},
+    {'percent': '50', 'nominal_bar': '5', 'nominal_output': '12.00', 'as_found': 12.02, 'as_left': 12.0,
+     'found_error': 0.12, 'left_error': 0.0},
+]
+
+
+def _pdf_text(record):
+    return "\n".join(page.extract_text() for page in PdfReader(io.BytesIO(app.generate_calibration_pdf(record))).pages)
+
+
+def test_result_cells_keep_their_text(db):
+    calibration_id = app.run_write(app._insert_calibration, 1, {'doc_no': 'CAL-1', 'date': '2025-01-01',
+                                                                'result_data': POINTS}, '2025-01-01T08:00:00')
+    record = app.get_calibration_record(calibration_id)
+    # Sel dibaca dari calibration_points: teks seperti diisi, selain itu angkanya
+    first, second = record['points']
+    assert pd.isna(first.pop('left_error'))
+    assert first == {'percent': '0', 'nominal_input': '0', 'nominal_output': '4 mA', 'as_found': 4.01,
+                     'as_left': 'N/A', 'found_error': '-'}
+    assert second == {'percent': '50', 'nominal_input': '5', 'nominal_output': '12.00', 'as_found': 12.02,
+                      'as_left': 12.0, 'found_error': 0.12, 'left_error': 0.0}
+    with app.db_conn() as conn:
+        assert conn.execute("SELECT result_data FROM calibration WHERE id = ?", (calibration_id,)).fetchone() == (None,)
+    # Analisis tetap membaca angka
+    points = app.get_calibration_points([calibration_id])
+    assert points['as_found'].tolist() == [4.01, 12.02]
+    assert points['nominal_output'].isna().tolist() == [True, False]
+
+    text = _pdf_text(record)
+    for cell in ("4 mA", "N/A", "12.00", "4.01"):
+        assert cell in text
+
+
+def test_legacy_json_report_renders_original_text(tmp_path, monkeypatch):
+    path = str(tmp_path / "maintenance_app.db")
+    conn = sqlite3.connect(path)
+    # Schema sebelum migrasi 009: tabel hasil hanya sebagai JSON di result_data
+    for version, migration in enumerate(app.MIGRATIONS[:8], start=1):
+        migration(conn.cursor())
+        conn.execute(f"PRAGMA user_version = {version}")
+    conn.execute("INSERT INTO calibration (user_id, doc_no, date, result_data, created_at) VALUES (1, 'OLD', '2023-01-01', ?, '')",
+                 (json.dumps([{'percent': '0', 'nominal_bar': '0,0', 'nominal_output': '4,00', 'as_found': 'rusak',
+                               'as_left': 12.5, 'found_error': '', 'left_error': None}]),))
+    conn.commit()
+    conn.close()
+
+    monkeypatch.setattr(app, "DB_PATH", path)
+    app.init_db()
+    record = app.get_calibration_records(app.get_calibration_page({}, limit=None)[0]['id'].tolist())[0]
+    assert record['points'][0]['as_left'] == 12.5
+    text = _pdf_text(record)
+    for cell in ("0,0", "4,00", "rusak", "12.50"):
+        assert cell in text
+    app.query_cache.clear()
+
+
+def test_calibration_records_introspect_schema_once(db, monkeypatch):
+    calibration_id = app.run_write(app._insert_calibration, 1, {'doc_no': 'CAL-1', 'date': '2025-01-01',
+                                                                'result_data': POINTS}, '2025-01-01T08:00:00')
+    statements = []
+
+    def get_conn():
+        conn = sqlite3.connect(app.DB_PATH)
+        conn.set_trace_callback(statements.append)
+        return conn
+
+    monkeypatch.setattr(app, "get_conn", get_conn)
+    for _ in range(3):
+        assert app.get_calibration_records([calibration_id])[0]['doc_no'] == 'CAL-1'
+    assert sum("table_info" in sql for sql in statements) <= 1
@@ -0,0 +1,19 @@
+import runpy
+import sys
+
+import app
+
+
+def test_rebuild_rollups_cli_does_not_touch_the_page(tmp_path, monkeypatch, capsys):
+    def no_ui(*args, **kwargs):
+        raise AssertionError("page setup ran in the CLI")
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(sys, "argv", ["app.py", "rebuild-rollups"])
+    monkeypatch.setattr(app.st, "set_page_config", no_ui)
+    monkeypatch.setattr(app.st, "markdown", no_ui)
+    runpy.run_path(app.__file__, run_name="__main__")
+
+    out = capsys.readouterr().out
+    assert "checklist_weekly: 0 rows" in out
+    assert (tmp_path / "maintenance_app.db").exists()
@@ -0,0 +1,16 @@
+import pytest
+
+import app
+
+
+def test_db_conn_returns_connection_on_error(db):
+    with app.db_conn() as conn:
+        pass
+    with pytest.raises(ZeroDivisionError):
+        with app.db_conn() as conn:
+            conn.execute("BEGIN")
+            1 / 0
+    assert conn in app._conn_pools[db]
+    assert not conn.in_transaction
+    with app.db_conn() as again:
+        assert again is conn
@@ -0,0 +1,52 @@
+import sqlite3
+
+import app
+
+
+def _checklist(date, created_at):
+    return {'user_id': 1, 'date': date, 'machine': 'Boiler', 'sub_area': 'Feed', 'shift': '1',
+            'item': 'Pump', 'condition': 'Good', 'note': '', 'created_at': created_at}
+
+
+def test_backlog_age_counts_from_submission(db):
+    app.bulk_import_checklists([
+        # Laporan tanggal lama yang baru di-submit kemarin: masih 0-1 hari menunggu
+        _checklist('2024-01-01', '2025-03-09T23:30:00+08:00'),
+        _checklist('2025-03-10', '2025-02-20T08:00:00+08:00'),
+    ])
+    backlog = app.get_approval_backlog('2025-03-10')
+    assert backlog[['report', 'age', 'pending', 'oldest_submitted']].values.tolist() == [
+        ['Checklist', '0-1 hari', 1, '2025-03-09'],
+        ['Checklist', '8-30 hari', 1, '2025-02-20'],
+    ]
+
+
+def _rollup(db, table):
+    conn = sqlite3.connect(db)
+    rows = conn.execute(f"SELECT total, good, minor, bad FROM {table}").fetchall()
+    conn.close()
+    return rows
+
+
+def test_rollups_count_rows_without_condition(db):
+    app.bulk_import_checklists([dict(_checklist('2025-03-10', '2025-03-10T08:00:00+08:00'), condition=None)])
+    assert _rollup(db, "checklist_daily") == [(1, 0, 0, 0)]
+    assert app.rebuild_checklist_rollups()["checklist_weekly"] == 1
+    assert _rollup(db, "checklist_daily") == [(1, 0, 0, 0)]
+    assert _rollup(db, "checklist_weekly") == [(1, 0, 0, 0)]
+
+
+def test_migration_backfills_rows_without_condition(tmp_path, monkeypatch):
+    path = str(tmp_path / "maintenance_app.db")
+    conn = sqlite3.connect(path)
+    for version, migration in enumerate(app.MIGRATIONS[:12], start=1):
+        migration(conn.cursor())
+        conn.execute(f"PRAGMA user_version = {version}")
+    conn.execute("INSERT INTO checklist (user_id, date, machine, item, condition) VALUES (1, '2025-03-10', 'Boiler', 'Pump', NULL)")
+    conn.commit()
+    conn.close()
+
+    monkeypatch.setattr(app, "DB_PATH", path)
+    app.init_db()
+    assert _rollup(path, "checklist_weekly") == [(1, 0, 0, 0)]
+    assert _rollup(path, "checklist_daily") == [(1, 0, 0, 0)]
@@ -0,0 +1,55 @@
+import numpy as np
+
+import app
+
+
+def _calibrate(date, as_found, as_left):
+    app.run_write(app._insert_calibration, 1, {
+        'doc_no': f'CAL-{date}', 'date': date, 'id_number': 'PT/1', 'plant': '1', 'range_out': '4 to 20 mA',
+        'interval_cal': '12 months', 'reject_error_value': '1.00',
+        'result_data': [{'percent': '50', 'nominal_output': '12.00', 'as_found': as_found, 'as_left': as_left}],
+    }, f'{date}T08:00:00')
+
+
+def test_day_to_date_out_of_range_is_no_date():
+    assert app._day_to_date(0) == "1970-01-01"
+    assert app._day_to_date(200_000) is not None  # na 2262, di luar batas pandas Timedelta
+    assert app._day_to_date(1e12) is None
+    assert app._day_to_date(-1e9) is None
+    assert app._day_to_date(np.inf) is None
+    assert app._day_to_date(np.nan) is None
+
+
+def test_slow_drift_predicts_date_beyond_pandas_range(db):
+    # 0.01 % of span dalam 45 tahun -> reject ribuan tahun lagi
+    _calibrate('1980-01-01', 12.0, 12.0)
+    _calibrate('2025-01-01', 12.0016, 12.0)
+    drift = app.get_instrument_drift()
+    assert drift['id_number'].tolist() == ['PT/1']
+    assert int(drift.at[0, 'predicted_reject_date'][:4]) > 2262
+    assert drift.at[0, 'recommendation'] == 'Extend'
+
+
+def test_drift_refresh_only_reruns_after_calibration_write(db, monkeypatch):
+    _calibrate('2024-01-01', 12.0, 12.0)
+    calls = []
+    compute = app.compute_instrument_drift
+    monkeypatch.setattr(app, "compute_instrument_drift", lambda *a: calls.append(1) or compute(*a))
+    app.get_instrument_drift()
+    app.get_instrument_drift(plant='1')
+    assert len(calls) == 1
+    _calibrate('2025-01-01', 12.1, 12.0)
+    app.get_instrument_drift()
+    assert len(calls) == 2
+
+
+def test_drift_refresh_retries_after_a_skipped_write(db, monkeypatch):
+    _calibrate('2024-01-01', 12.0, 12.0)
+    store = app._store_instrument_drift
+    # Write yang dilewati (mis. report baru masuk saat menghitung) tidak boleh tertutup cache
+    monkeypatch.setattr(app, "_store_instrument_drift", app.writes("instrument_drift")(lambda c, rows, computed_at: None))
+    assert app.refresh_instrument_drift() == 1
+    monkeypatch.setattr(app, "_store_instrument_drift", store)
+    assert app.refresh_instrument_drift() == 1
+    assert len(app.get_instrument_drift()) == 1
+    assert app.refresh_instrument_drift() == 0
@@ -0,0 +1,74 @@
+import io
+import time
+import zipfile
+
+import pytest
+from pypdf import PdfReader
+
+import app
+
+
+@pytest.fixture
+def reports(db):
+    app.bulk_import_checklists(
+        [{'user_id': 5, 'date': f'2025-01-{d:02d}', 'machine': 'Boiler', 'sub_area': 'Burner', 'shift': 'Siang',
+          'item': 'Motor', 'condition': 'Good', 'note': ''} for d in range(1, 6)]
+        + [{'user_id': 3, 'date': '2025-01-02', 'machine': 'Papper Machine 1', 'sub_area': 'WRAPPING & REWINDER',
+            'shift': 'Pagi', 'item': f'P{i} - Part', 'condition': 'Good', 'note': ''} for i in range(3)])
+    for i in range(3):
+        app.run_write(app._insert_calibration, 1, {'doc_no': f'CAL-{i}', 'date': '2025-01-03', 'id_number': 'PT/1',
+                                                   'result_data': []}, '2025-01-03T08:00:00')
+    return db
+
+
+def _wait(job_id, user_id):
+    for _ in range(600):
+        job = app.get_jobs([job_id])[0]
+        if job['status'] not in ('queued', 'running'):
+            return job
+        time.sleep(0.1)
+    raise AssertionError("export job did not finish")
+
+
+@pytest.mark.parametrize("fmt", ["zip", "pdf"])
+def test_export_job_streams_result_into_job(reports, fmt):
+    job_id = app.submit_job("export", 1, app.export_job, '2025-01-01', '2025-01-31', True, True, {}, fmt)
+    job = _wait(job_id, 1)
+    assert job['status'] == 'done', job['error']
+    name, mime, data = app.get_job_result(job_id, 1)
+    assert name == f"reports_2025-01-01_2025-01-31.{fmt}"
+    if fmt == "zip":
+        names = zipfile.ZipFile(io.BytesIO(data)).namelist()
+        assert len(names) == 5 + 1 + 3
+        assert "wrapping_rewinder_2025-01-02_Pagi.pdf" in names
+    else:
+        assert mime == "application/pdf"
+        assert len(PdfReader(io.BytesIO(data)).pages) >= 9
+
+
+def test_export_items_load_records_in_batches(reports, monkeypatch):
+    monkeypatch.setattr(app, "EXPORT_ID_CHUNK", 2)
+    loaded = []
+    get_checklist_records = app.get_checklist_records
+    monkeypatch.setattr(app, "get_checklist_records", lambda ids: loaded.append(len(ids)) or get_checklist_records(ids))
+    plan = app.plan_export('2025-01-01', '2025-01-31')
+    assert len(plan) == 5 + 1 + 3
+    assert not loaded
+    items = app.iter_export_items(plan)
+    first = next(items)
+    assert first[0] == "wrapping_rewinder" and len(first[2][0]) == 3
+    assert loaded == [3]
+    assert [name for _, name, _ in items] == [name for _, name, _ in plan[1:]]
+    assert max(loaded[1:]) <= 2
+
+
+def test_streaming_merger_keeps_every_page_in_order(reports):
+    records = app.get_calibration_records(app.get_calibration_page({}, limit=None)[0]['id'].tolist())
+    out = io.BytesIO()
+    merger = app.StreamingPdfMerger(out)
+    for record in records:
+        merger.append(app.generate_calibration_pdf(record))
+    merger.close()
+    pages = PdfReader(io.BytesIO(out.getvalue())).pages
+    assert len(pages) == len(records)
+    assert [record['doc_no'] in page.extract_text() for record, page in zip(records, pages)] == [True] * len(records)
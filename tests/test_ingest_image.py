@@ -0,0 +1,35 @@
+import io
+
+from PIL import Image
+
+import app
+
+
+def _jpeg(size, orientation=None, quality=30):
+    img = Image.effect_noise(size, 64).convert("RGB")
+    exif = Image.Exif()
+    if orientation is not None:
+        exif[app.EXIF_ORIENTATION] = orientation
+    buf = io.BytesIO()
+    img.save(buf, "JPEG", quality=quality, exif=exif.tobytes())
+    return buf.getvalue()
+
+
+def test_small_photo_without_orientation_is_kept():
+    data = _jpeg((80, 40))
+    image, thumb = app.ingest_image(data)
+    assert image is data
+    assert thumb
+
+
+def test_rotated_photo_is_stored_upright_without_orientation_tag():
+    data = _jpeg((80, 40), orientation=6)  # 90° rotated camera photo
+    image, _ = app.ingest_image(data)
+    stored = Image.open(io.BytesIO(image))
+    assert stored.size == (40, 80)
+    assert stored.getexif().get(app.EXIF_ORIENTATION) is None
+
+
+def test_empty_upload_is_no_photo():
+    assert app.ingest_image(b"") is None
+    assert app.ingest_image(None) is None
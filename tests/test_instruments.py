@@ -0,0 +1,79 @@
+"""Equipment data is kept once per Tag ID; every report still reads its own values through calibration_full"""
+import io
+import sqlite3
+
+from pypdf import PdfReader
+
+import app
+
+EQUIPMENT = {'equipment_name': 'Pressure Transmitter', 'plant': '1', 'location': 'Line 1', 'manufacturer': 'Yokogawa',
+             'model': 'EJA110', 'serial_no': 'S-100', 'range_in': '0 to 10 bar', 'range_out': '4 to 20 mA'}
+
+
+def _save(doc_no, cal_date, **changes):
+    data = dict(EQUIPMENT, doc_no=doc_no, date=cal_date, id_number='PT/1', **changes)
+    return app.run_write(app._insert_calibration, 1, data, f"{cal_date}T08:00:00")
+
+
+def _raw(path, sql, params=()):
+    conn = sqlite3.connect(path)
+    rows = conn.execute(sql, params).fetchall()
+    conn.close()
+    return rows
+
+
+def _pdf_text(record):
+    return "\n".join(page.extract_text() for page in PdfReader(io.BytesIO(app.generate_calibration_pdf(record))).pages)
+
+
+def test_old_reports_keep_their_values_when_the_master_changes(db):
+    first = _save("CAL-1", "2024-01-10", location=None)
+    second = _save("CAL-2", "2025-01-10", manufacturer='Rosemount', model='3051', location='Line 2')
+    # Report lama yang disimpan belakangan tidak mengganti master
+    backfill = _save("CAL-0", "2023-01-10", manufacturer='Endress')
+
+    assert _raw(db, "SELECT manufacturer, model, location FROM instruments WHERE id_number = 'PT/1'") == \
+        [('Rosemount', '3051', 'Line 2')]
+    # Nilai yang sama dengan master tidak disimpan ulang per report
+    assert _raw(db, "SELECT manufacturer, model, serial_no FROM calibration WHERE id = ?", (second,)) == [(None, None, None)]
+
+    records = {r['id']: r for r in app.get_calibration_records([first, second, backfill])}
+    assert (records[first]['manufacturer'], records[first]['model'], records[first]['location']) == ('Yokogawa', 'EJA110', '')
+    assert (records[second]['manufacturer'], records[second]['model'], records[second]['location']) == ('Rosemount', '3051', 'Line 2')
+    assert (records[backfill]['manufacturer'], records[backfill]['model']) == ('Endress', 'EJA110')
+    for record in records.values():
+        assert record['serial_no'] == 'S-100'
+        assert record['range_in'] == '0 to 10 bar'
+
+    text = _pdf_text(records[first])
+    assert "Yokogawa" in text and "EJA110" in text and "Rosemount" not in text
+
+
+def test_migration_moves_equipment_into_instruments(tmp_path, monkeypatch):
+    path = str(tmp_path / "maintenance_app.db")
+    conn = sqlite3.connect(path)
+    # Schema sebelum migrasi 010/011: data peralatan lengkap di tiap report
+    for version, migration in enumerate(app.MIGRATIONS[:9], start=1):
+        migration(conn.cursor())
+        conn.execute(f"PRAGMA user_version = {version}")
+    reports = [("CAL-1", "2024-01-10", "Yokogawa", "EJA110", None),
+               ("CAL-2", "2025-01-10", "Rosemount", "EJA110", "Line 2")]
+    for doc_no, cal_date, manufacturer, model, location in reports:
+        conn.execute("""
+            INSERT INTO calibration (user_id, doc_no, date, id_number, equipment_name, manufacturer, model, location, created_at)
+            VALUES (1, ?, ?, 'PT/1', 'Pressure Transmitter', ?, ?, ?, ?)
+        """, (doc_no, cal_date, manufacturer, model, location, f"{cal_date}T08:00:00"))
+    conn.commit()
+    conn.close()
+
+    monkeypatch.setattr(app, "DB_PATH", path)
+    app.init_db()
+
+    assert _raw(path, "SELECT manufacturer, model, location FROM instruments WHERE id_number = 'PT/1'") == \
+        [('Rosemount', 'EJA110', 'Line 2')]
+    assert _raw(path, "SELECT doc_no, manufacturer, model, location FROM calibration ORDER BY date") == \
+        [("CAL-1", "Yokogawa", None, ""), ("CAL-2", None, None, None)]
+    assert _raw(path, "SELECT doc_no, manufacturer, model, location, equipment_name FROM calibration_full ORDER BY date") == \
+        [("CAL-1", "Yokogawa", "EJA110", "", "Pressure Transmitter"),
+         ("CAL-2", "Rosemount", "EJA110", "Line 2", "Pressure Transmitter")]
+    app.query_cache.clear()
@@ -0,0 +1,89 @@
+import os
+import time
+from datetime import datetime, timedelta
+
+import app
+
+
+def _job(db, job_id):
+    with app.db_conn() as conn:
+        return conn.execute("SELECT status, result FROM jobs WHERE id = ?", (job_id,)).fetchone()
+
+
+def _wait(job_id):
+    for _ in range(100):
+        job = app.get_jobs([job_id])[0]
+        if job['status'] not in ('queued', 'running'):
+            return job
+        time.sleep(0.05)
+    raise AssertionError("job did not finish")
+
+
+def _text_job(progress, text):
+    return "result.txt", "text/plain", text.encode()
+
+
+def test_new_runner_only_fails_jobs_of_dead_runners(db):
+    now = datetime.fromisoformat(app._now_iso())
+    fresh = now.isoformat()
+    stale = (now - timedelta(seconds=app.JOB_HEARTBEAT_TIMEOUT + 1)).isoformat()
+    runners = {
+        "legacy": (None, fresh),
+        "stopped_beating": ("12345:abc", stale),
+        "restarted_same_pid": (f"{os.getpid()}:previous", fresh),
+        "other_live_process": ("12345:def", fresh),
+    }
+    job_ids = {name: app.run_write(app._insert_job, "export", 1, created_at, runner)
+               for name, (runner, created_at) in runners.items()}
+
+    app.get_job_runner()
+
+    statuses = {name: _job(db, job_id)[0] for name, job_id in job_ids.items()}
+    assert statuses == {"legacy": "failed", "stopped_beating": "failed", "restarted_same_pid": "failed",
+                        "other_live_process": "queued"}
+
+
+def test_heartbeat_keeps_own_jobs_and_fails_silent_runners(db):
+    runner = app.get_job_runner()
+    now = datetime.fromisoformat(app._now_iso())
+    old = (now - timedelta(seconds=app.JOB_HEARTBEAT_TIMEOUT + 1)).isoformat()
+    own = app.run_write(app._insert_job, "export", 1, old, runner.runner_id)
+    other = app.run_write(app._insert_job, "export", 1, old, "12345:abc")
+
+    app.run_write(app._job_heartbeat, runner.runner_id, now.isoformat(), {runner.runner_id})
+
+    assert _job(db, own)[0] == 'queued'
+    assert _job(db, other)[0] == 'failed'
+    with app.db_conn() as conn:
+        assert conn.execute("SELECT heartbeat_at FROM jobs WHERE id = ?", (own,)).fetchone()[0] == now.isoformat()
+
+
+def test_finished_job_expires_old_results(db):
+    old_finish = (datetime.fromisoformat(app._now_iso()) - timedelta(days=app.JOB_RESULT_RETENTION_DAYS + 1)).isoformat()
+    old_id = app.run_write(app._insert_job, "export", 1, old_finish, "x:y")
+    app.run_write(app._finish_job, old_id, old_finish, "old.zip", "application/zip", b"old")
+
+    job_id = app.submit_job("export", 1, _text_job, "new")
+    assert _wait(job_id)['status'] == 'done'
+    assert _job(db, old_id) == ('expired', None)
+    assert app.get_job_result(job_id, 1) == ("result.txt", "text/plain", b"new")
+
+
+def test_worker_survives_failed_status_update(db, monkeypatch):
+    real_update = app._update_job
+    calls = []
+
+    @app.writes("jobs")
+    def flaky_update(c, job_id, **fields):
+        if fields.get('status') == 'running' and not calls:
+            calls.append(job_id)
+            raise RuntimeError("disk I/O error")
+        return real_update(c, job_id, **fields)
+
+    monkeypatch.setattr(app, "_update_job", flaky_update)
+    monkeypatch.setattr(app, "JOB_WORKERS", 1)
+    failed = app.submit_job("export", 1, _text_job, "a")
+    assert _wait(failed)['status'] == 'failed'
+    # Satu-satunya worker harus tetap hidup untuk job berikutnya
+    job_id = app.submit_job("export", 1, _text_job, "b")
+    assert _wait(job_id)['status'] == 'done'
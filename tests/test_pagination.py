@@ -0,0 +1,30 @@
+"""Keyset pages cover every row exactly once, including rows without a date"""
+import app
+
+
+def _pages(page_fn, filters, limit):
+    ids, cursor = [], None
+    while True:
+        df, cursor = page_fn(filters, cursor, limit)
+        ids += df['id'].tolist()
+        if cursor is None:
+            return ids
+
+
+def test_pages_include_rows_without_date(db):
+    dates = ['2025-01-03', None, '2025-01-01', None, '2025-01-02', '2025-01-01', None]
+    app.bulk_import_checklists([{'user_id': 1, 'date': d, 'machine': 'PM1', 'item': f'Item {i}', 'condition': 'Good'}
+                                for i, d in enumerate(dates)])
+    everything = app.get_checklist_page({}, limit=None)[0]['id'].tolist()
+    assert len(everything) == len(dates)
+    for limit in (1, 2, 3, 4, 10):
+        assert _pages(app.get_checklist_page, {}, limit) == everything, limit
+    assert _pages(app.get_checklist_page, {'user_id': 1}, 2) == everything
+
+
+def test_calibration_pages_include_rows_without_date(db):
+    for i, d in enumerate(['2025-01-02', None, '2025-01-01', None]):
+        app.run_write(app._insert_calibration, 1, {'doc_no': f'CAL-{i}', 'date': d}, '2025-01-05T08:00:00')
+    everything = app.get_calibration_page({}, limit=None)[0]['id'].tolist()
+    assert len(everything) == 4
+    assert _pages(app.get_calibration_page, {}, 1) == everything
@@ -0,0 +1,47 @@
+import io
+import tempfile
+
+from PIL import Image
+
+import app
+
+
+def _image(fmt, mode="RGB"):
+    buf = io.BytesIO()
+    Image.new(mode, (64, 48), (200, 10, 10, 128) if mode == "RGBA" else (200, 10, 10)).save(buf, fmt)
+    return buf.getvalue()
+
+
+def test_pdf_generation_leaves_no_temp_files(db, tmp_path, monkeypatch):
+    temp_dir = tmp_path / "tmp"
+    temp_dir.mkdir()
+    monkeypatch.setattr(tempfile, "tempdir", str(temp_dir))
+
+    jpeg, png, signature = _image("JPEG"), _image("PNG"), _image("PNG", "RGBA")
+    app.bulk_import_checklists([
+        {'user_id': 3, 'date': '2025-01-01', 'machine': 'Papper Machine 1', 'sub_area': 'WRAPPING & REWINDER',
+         'shift': 'Pagi', 'item': f'P{i} - Part', 'condition': 'Good', 'note': 'n',
+         'image_before': jpeg, 'image_after': png} for i in range(3)
+    ])
+    now = "2025-01-02T08:00:00"
+    app.run_write(app._approve_checklists, [1, 2, 3], "Manager", now, signature)
+    calibration_id = app.run_write(app._insert_calibration, 1, {
+        'doc_no': 'CAL-1', 'date': '2025-01-01', 'id_number': 'PT/1', 'range_out': '4 to 20 mA',
+        'reject_error_value': '1.00',
+        'result_data': [{'percent': '0', 'nominal_bar': '0', 'nominal_output': '4.00', 'as_found': 4.01, 'as_left': 4.0}],
+    }, now)
+    app.run_write(app._approve_calibration, calibration_id, "Manager", now, signature)
+
+    checklists = app.get_checklist_records([1, 2, 3])
+    checklist = app.get_checklist_record(1)
+    calibration = app.get_calibration_record(calibration_id)
+    for i in range(1000):
+        if i % 3 == 0:
+            pdf = app.generate_pdf(checklist, "Checklist Maintenance")
+        elif i % 3 == 1:
+            pdf = app.generate_pdf_wrapping_rewinder(checklists, "2025-01-01", "Pagi", "Farid")
+        else:
+            pdf = app.generate_calibration_pdf(calibration)
+        assert b"/Subtype /Image" in pdf
+
+    assert list(temp_dir.iterdir()) == []
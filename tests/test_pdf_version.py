@@ -0,0 +1,18 @@
+import pandas as pd
+
+import app
+
+ROW = {'id': 7, 'approval_status': 'Pending', 'approved_at': '', 'input_by': 'Farid',
+       'details': '{"a": 1}', 'image_before_ref': 'abc', 'image_after_ref': None}
+
+
+def test_pdf_version_changes_with_rendered_fields():
+    base = app.pdf_version([ROW])
+    for field, value in [('input_by', 'Tisna'), ('details', '{"a": 2}'), ('image_before_ref', 'def'),
+                         ('image_after_ref', 'xyz'), ('approval_status', 'Approved')]:
+        assert app.pdf_version([dict(ROW, **{field: value})]) != base, field
+
+
+def test_pdf_version_same_for_dict_and_series():
+    assert app.pdf_version([ROW]) == app.pdf_version([pd.Series(ROW)])
+    assert app.pdf_version([ROW]) == app.pdf_version([dict(reversed(list(ROW.items())))])
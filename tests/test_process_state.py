@@ -0,0 +1,24 @@
+import runpy
+
+import app
+
+
+def test_rerun_reuses_process_state(db):
+    # Streamlit re-executes app.py on every rerun; process-wide state must survive that
+    app.get_writer()
+    app.get_job_runner()
+    namespace = runpy.run_path(app.__file__, run_name=app.__name__)
+    for name in ("_migrated_dbs", "_migrate_lock", "_conn_pools", "_writers", "_job_runners", "query_cache"):
+        assert namespace[name] is getattr(app, name), name
+    assert namespace["get_writer"](db) is app.get_writer(db)
+
+
+def test_init_db_runs_migrations_once(db, monkeypatch):
+    def fail(conn):
+        raise AssertionError("migrations ran again")
+
+    monkeypatch.setattr(app, "run_migrations", fail)
+    app.init_db()
+    conn = app.get_conn()
+    assert app.get_schema_version(conn) == app.SCHEMA_VERSION
+    conn.close()
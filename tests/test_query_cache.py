@@ -0,0 +1,34 @@
+import os
+import subprocess
+import sys
+
+import app
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+OTHER_PROCESS = """
+import sys
+sys.path.insert(0, sys.argv[1])
+import app
+app.DB_PATH = sys.argv[2]
+app.init_db()
+app.bulk_import_checklists([{'user_id': 1, 'date': '2025-01-01', 'machine': 'Boiler', 'sub_area': 'Feed',
+                             'shift': '1', 'item': 'Pump', 'condition': 'Good', 'note': ''}])
+"""
+
+
+def _import_in_other_process(db):
+    subprocess.run([sys.executable, "-c", OTHER_PROCESS, ROOT, db], check=True, capture_output=True)
+
+
+def test_cached_count_sees_write_from_another_process(db):
+    assert app.count_checklists({}) == 0
+    _import_in_other_process(db)
+    assert app.count_checklists({}) == 1
+
+
+def test_unrelated_table_write_keeps_cache(db, monkeypatch):
+    app.count_checklists({})
+    app.run_write(app.writes("jobs")(lambda c: None))
+    monkeypatch.setattr(app, "_count_rows", lambda *a: (_ for _ in ()).throw(AssertionError("recounted")))
+    assert app.count_checklists({}) == 0
@@ -0,0 +1,68 @@
+"""The list, filter, approval and session queries must be served by the migration indexes"""
+import sqlite3
+
+import pytest
+
+import app
+
+CHECKLIST_PLANS = [
+    ({}, "idx_checklist_date"),
+    ({'user_id': 3}, "idx_checklist_user_date"),
+    ({'machine': 'Papper Machine 1'}, "idx_checklist_machine_date"),
+    ({'approval_status': 'Pending'}, "idx_checklist_status_date"),
+    ({'machine': 'Papper Machine 1', 'sub_area': 'WRAPPING & REWINDER', 'shift': '1',
+      'date_from': '2025-01-01', 'date_to': '2025-01-01'}, "idx_checklist_session"),
+]
+
+CALIBRATION_PLANS = [
+    ({}, "idx_calibration_date"),
+    ({'user_id': 3}, "idx_calibration_user_date"),
+    ({'id_number': 'PT/1'}, "idx_calibration_tag_date"),
+    ({'approval_status': 'Pending'}, "idx_calibration_status_date"),
+]
+
+def traced_statements(monkeypatch, call):
+    """Run a read helper on an unpooled connection and return the SQL it executed (parameters inlined)"""
+    statements = []
+
+    def get_conn():
+        conn = sqlite3.connect(app.DB_PATH)
+        conn.set_trace_callback(statements.append)
+        return conn
+
+    monkeypatch.setattr(app, "get_conn", get_conn)
+    call()
+    return [s for s in statements if s.lstrip().upper().startswith("SELECT")]
+
+def query_plan(db, sql):
+    conn = sqlite3.connect(db)
+    plan = [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql)]
+    conn.close()
+    return plan
+
+def assert_uses_index(db, statements, index):
+    assert statements
+    for sql in statements:
+        plan = query_plan(db, sql)
+        assert any(f"USING INDEX {index}" in step for step in plan), plan
+        assert not any(step.startswith("SCAN") and "USING" not in step for step in plan), plan
+
+@pytest.mark.parametrize("filters,index", CHECKLIST_PLANS)
+def test_checklist_page_uses_index(db, monkeypatch, filters, index):
+    statements = traced_statements(monkeypatch, lambda: app.get_checklist_page(filters))
+    assert_uses_index(db, statements, index)
+
+@pytest.mark.parametrize("filters,index", CALIBRATION_PLANS)
+def test_calibration_page_uses_index(db, monkeypatch, filters, index):
+    statements = traced_statements(monkeypatch, lambda: app.get_calibration_page(filters))
+    assert_uses_index(db, statements, index)
+
+def test_approval_lists_use_status_index(db, monkeypatch):
+    statements = traced_statements(monkeypatch, lambda: app.get_checklist_page({'approval_status': 'Pending'}, limit=None))
+    assert_uses_index(db, statements, "idx_checklist_status_date")
+    statements = traced_statements(monkeypatch, lambda: app.get_calibration_page({'approval_status': 'Pending'}, limit=None))
+    assert_uses_index(db, statements, "idx_calibration_status_date")
+
+def test_next_page_cursor_stays_on_index(db, monkeypatch):
+    statements = traced_statements(monkeypatch, lambda: app.get_checklist_page({'user_id': 3}, cursor=("2025-01-01", 10)))
+    assert_uses_index(db, statements, "idx_checklist_user_date")
@@ -0,0 +1,72 @@
+"""The incremental rollup updates on save must give exactly the tables a full rebuild gives"""
+import sqlite3
+
+import pytest
+
+import app
+
+DETAILS = [
+    {'Motor': 'OK', 'Bearing': 'NG', 'Belt': None},
+    {'Motor': 'OK', 'Bearing': 'OK'},
+    {'Motor': None, 'Belt': None},       # komponen tanpa status sama sekali
+    ['OK', 'NG'],
+    'NG',
+    {'Motor': {'status': 'NG'}, 'Fan': 1, 'Pump': True},
+    {},
+    None,
+]
+
+
+def _rows():
+    rows = []
+    dates = ['2025-03-10', '2025-03-11', '2025-03-16', '2025-03-17', None, '', 'kemarin', '2025-3-1', '2025-03-12 08:00']
+    conditions = ['Good', 'Minor', 'Bad', None, 'good']
+    for i in range(60):
+        rows.append({
+            'user_id': 1 + i % 3,
+            'date': dates[i % len(dates)],
+            'machine': ['Boiler', 'Papper Machine 1', None][i % 3],
+            'sub_area': ['Feed', None][i % 2],
+            'shift': ['1', '2', 'Malam'][i % 3],
+            'item': ['Pump', 'Fan', ''][i % 3],
+            'condition': conditions[i % len(conditions)],
+            'note': '',
+            'details': DETAILS[i % len(DETAILS)],
+        })
+    # details yang bukan JSON valid
+    rows.append(dict(rows[0], details='not json'))
+    rows.append(dict(rows[1], details=''))
+    return rows
+
+
+def _tables(db):
+    conn = sqlite3.connect(db)
+    tables = {table: sorted(conn.execute(f"SELECT * FROM {table}").fetchall()) for table in app.CHECKLIST_ROLLUP_TABLES}
+    conn.close()
+    return tables
+
+
+def test_incremental_rollups_match_rebuild(db):
+    rows = _rows()
+    for i in range(0, len(rows), 7):
+        app.bulk_import_checklists(rows[i:i + 7])
+    for date in ('2025-03-10', '2025-03-18'):
+        app.run_write(app._insert_checklist_items, 2, date, 'Boiler', 'Feed', '1',
+                      [{'item': 'Pump', 'condition': 'Good', 'note': '', 'details': DETAILS[0]},
+                       {'item': 'Pump', 'condition': 'Bad', 'note': '', 'details': None}],
+                      None, None, '2025-03-18T08:00:00')
+    incremental = _tables(db)
+    assert all(incremental.values())
+
+    app.rebuild_checklist_rollups()
+    assert _tables(db) == incremental
+
+
+@pytest.mark.parametrize("details", [{'Motor': None}, {'Motor': None, 'Belt': None}])
+def test_rebuild_counts_components_without_status(db, details):
+    app.bulk_import_checklists([{'user_id': 1, 'date': '2025-03-10', 'machine': 'Boiler', 'item': 'Pump',
+                                 'condition': 'Good', 'details': details}])
+    before = _tables(db)
+    app.rebuild_checklist_rollups()
+    assert _tables(db) == before
+    assert {row[-3:] for row in before["checklist_component_daily"]} == {(name, 0, 0) for name in details}
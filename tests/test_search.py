@@ -0,0 +1,77 @@
+"""Full-text search stays in sync with checklist and calibration rows through the FTS triggers"""
+import app
+
+
+def _checklist_ids(text, filters=None):
+    return sorted(app.search_checklists(text, filters)['id'].tolist())
+
+
+def _calibration_ids(text):
+    return sorted(app.search_calibrations(text)['id'].tolist())
+
+
+def _exec(sql, params=()):
+    app.run_write(lambda c: c.execute(sql, params))
+
+
+def test_checklist_search_follows_insert_update_delete(db):
+    app.bulk_import_checklists([
+        {'user_id': 1, 'date': '2025-01-01', 'machine': 'Boiler', 'item': 'Feed pump', 'condition': 'Good',
+         'note': 'Bearing bunyi kasar'},
+        {'user_id': 2, 'date': '2025-01-02', 'machine': 'Boiler', 'item': 'Burner', 'condition': 'Minor',
+         'note': 'Nozzle kotor'},
+    ])
+    pump, burner = sorted(app.get_checklist_page({}, limit=None)[0]['id'].tolist())
+    assert _checklist_ids("bearing") == [pump]
+    assert _checklist_ids("bear") == [pump]  # kata terakhir = prefix
+    assert _checklist_ids("feed bearing") == [pump]
+    assert _checklist_ids("nozzle bearing") == []
+    assert _checklist_ids("nozzle", {'user_id': 1}) == []
+
+    _exec("UPDATE checklist SET note = 'Bearing sudah diganti' WHERE id = ?", (burner,))
+    assert _checklist_ids("nozzle") == []
+    assert _checklist_ids("bearing") == [pump, burner]
+
+    # Update kolom lain (approval) tidak mengubah index
+    _exec("UPDATE checklist SET approval_status = 'Approved' WHERE id = ?", (pump,))
+    assert _checklist_ids("bearing") == [pump, burner]
+
+    _exec("DELETE FROM checklist WHERE id = ?", (pump,))
+    assert _checklist_ids("bearing") == [burner]
+    assert _checklist_ids("feed") == []
+
+
+def test_calibration_search_follows_insert_update_delete(db):
+    first = app.run_write(app._insert_calibration, 1, {'doc_no': 'CAL-1', 'date': '2025-01-01', 'id_number': 'PT/101',
+                                                      'description': 'Pressure outlet pump'}, '2025-01-01T08:00:00')
+    second = app.run_write(app._insert_calibration, 1, {'doc_no': 'CAL-2', 'date': '2025-01-02', 'id_number': 'TT/7',
+                                                       'description': 'Temperature header'}, '2025-01-02T08:00:00')
+    assert _calibration_ids("PT/101") == [first]
+    assert _calibration_ids("header") == [second]
+
+    _exec("UPDATE calibration SET description = 'Pressure header' WHERE id = ?", (second,))
+    assert _calibration_ids("temperature") == []
+    assert _calibration_ids("pressure") == [first, second]
+
+    _exec("DELETE FROM calibration WHERE id = ?", (first,))
+    assert _calibration_ids("pressure") == [second]
+    assert _calibration_ids("PT/101") == []
+
+
+def test_search_filter_pages_with_keyset_cursor(db):
+    app.bulk_import_checklists(
+        [{'user_id': 1, 'date': f'2025-01-{d:02d}', 'machine': 'Boiler', 'item': 'Motor', 'condition': 'Good',
+          'note': 'Vibrasi tinggi' if d % 2 else 'Normal'} for d in range(1, 10)])
+    expected = app.get_checklist_page({'q': 'vibrasi'}, limit=None)[0]['id'].tolist()
+    assert len(expected) == 5
+    assert app.count_checklists({'q': 'vibrasi'}) == 5
+
+    ids, cursor = [], None
+    while True:
+        df, cursor = app.get_checklist_page({'q': 'vibrasi'}, cursor, 2)
+        assert len(df) <= 2
+        ids += df['id'].tolist()
+        if cursor is None:
+            break
+    assert ids == expected
+    assert sorted(ids) == _checklist_ids("vibrasi")
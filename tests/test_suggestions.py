@@ -0,0 +1,61 @@
+"""The suggestion index holds the same values as DISTINCT over the reports, newest first"""
+import sqlite3
+
+import app
+
+REPORTS = [
+    {'doc_no': 'CAL-1', 'name': 'Andi', 'id_number': 'PT/1', 'plant': '1', 'range_in': '0 to 10 bar',
+     'interval_cal': '6 months', 'manufacturer': 'Yokogawa'},
+    {'doc_no': 'CAL-2', 'name': ' Andi ', 'id_number': 'PT/2', 'plant': '1', 'range_in': '0 to 16 bar',
+     'interval_cal': '', 'manufacturer': 'Rosemount'},
+    {'doc_no': 'CAL-3', 'name': 'Budi', 'id_number': 'PT/1', 'plant': '2', 'range_in': '0 to 10 bar',
+     'interval_cal': '1 year', 'manufacturer': None},
+]
+
+
+def _distinct(path, field):
+    """The values the form used to offer: distinct, trimmed, non-empty"""
+    conn = sqlite3.connect(path)
+    rows = conn.execute(f"SELECT DISTINCT TRIM({field}) FROM calibration_full WHERE TRIM(COALESCE({field}, '')) != ''").fetchall()
+    conn.close()
+    return {row[0] for row in rows}
+
+
+def _all_suggestions():
+    return app.get_suggestions({field: 1000 for field in app.SUGGESTION_FIELDS})
+
+
+def test_saving_reports_updates_suggestions(db):
+    for i, report in enumerate(REPORTS):
+        app.run_write(app._insert_calibration, 1, dict(report, date='2025-01-01'), f'2025-01-0{i + 1}T08:00:00')
+        suggestions = _all_suggestions()
+        for field in app.SUGGESTION_FIELDS:
+            assert set(suggestions[field]) == _distinct(db, field), field
+    suggestions = _all_suggestions()
+    assert suggestions['name'] == ['Budi', 'Andi']
+    assert suggestions['id_number'] == ['PT/1', 'PT/2']
+    assert suggestions['interval_cal'] == ['1 year', '6 months']
+    assert app.get_suggestions({'range_in': 1}) == {'range_in': ['0 to 10 bar']}
+
+
+def test_migration_backfills_suggestions(tmp_path, monkeypatch):
+    path = str(tmp_path / "maintenance_app.db")
+    conn = sqlite3.connect(path)
+    # Schema sebelum migrasi 008, report lama langsung di tabel calibration
+    for version, migration in enumerate(app.MIGRATIONS[:7], start=1):
+        migration(conn.cursor())
+        conn.execute(f"PRAGMA user_version = {version}")
+    for i, report in enumerate(REPORTS):
+        cols = list(report)
+        conn.execute(f"INSERT INTO calibration (user_id, date, created_at, {', '.join(cols)}) VALUES (1, '2025-01-01', ?, {', '.join('?' * len(cols))})",
+                     [f'2025-01-0{i + 1}T08:00:00'] + [report[col] for col in cols])
+    conn.commit()
+    conn.close()
+
+    monkeypatch.setattr(app, "DB_PATH", path)
+    app.init_db()
+    suggestions = _all_suggestions()
+    for field in app.SUGGESTION_FIELDS:
+        assert set(suggestions[field]) == _distinct(path, field), field
+    assert suggestions['name'] == ['Budi', 'Andi']
+    app.query_cache.clear()
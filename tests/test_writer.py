@@ -0,0 +1,54 @@
+import concurrent.futures
+import sqlite3
+import threading
+import time
+
+import pytest
+
+import app
+
+
+def _block(c, started, release):
+    started.set()
+    release.wait(5)
+
+
+def _insert_user(c, username):
+    c.execute("INSERT INTO users (username, role) VALUES (?, 'technician')", (username,))
+
+
+def _slow_value(c, seconds):
+    time.sleep(seconds)
+    return "committed"
+
+
+def _user_exists(username):
+    with app.db_conn() as conn:
+        return conn.execute("SELECT 1 FROM users WHERE username=?", (username,)).fetchone() is not None
+
+
+def test_run_write_timeout_cancels_queued_job(db, monkeypatch):
+    monkeypatch.setattr(app, "WRITE_TIMEOUT", 0.2)
+    started, release = threading.Event(), threading.Event()
+    blocker = app.submit_write(_block, started, release)
+    assert started.wait(5)
+    with pytest.raises(concurrent.futures.TimeoutError):
+        app.run_write(_insert_user, "never_written")
+    release.set()
+    blocker.result(5)
+    app.run_write(lambda c: None)
+    assert not _user_exists("never_written")
+
+
+def test_run_write_waits_for_running_job(db, monkeypatch):
+    monkeypatch.setattr(app, "WRITE_TIMEOUT", 0.1)
+    assert app.run_write(_slow_value, 0.4) == "committed"
+
+
+def test_writer_open_failure_fails_queued_jobs(tmp_path, monkeypatch):
+    path = str(tmp_path / "missing_dir" / "maintenance_app.db")
+    monkeypatch.setattr(app, "DB_PATH", path)
+    writer = app.get_writer()
+    with pytest.raises(sqlite3.OperationalError):
+        writer.submit(_insert_user, "x").result(5)
+    assert app._writers.get(path) is not writer